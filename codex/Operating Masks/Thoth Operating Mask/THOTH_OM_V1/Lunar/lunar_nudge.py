@@ -18,6 +18,18 @@ Public API
 - compute_nudges(frac: float) -> dict[str,float]
 - sample(ts: datetime|None) -> dict (phase+nudges snapshot)
 
+Batch API (NumPy, imported lazily; the scalar API stays dependency-free)
+- phase_fractions(ts: datetime64[] | epoch seconds[]) -> float64[]
+- phase_indices(frac: float64[]) -> int64[]  (index into PHASE_NAMES)
+- nudge_matrix(idx, caps) -> float64[n, len(LEVERS)]
+- sample_batch(ts, caps) -> dict of arrays; element-wise identical to the scalar path
+
+Hot path (per_gate mode)
+- PhaseCalendar(start_year, end_year): phase-bin transition instants (µs, exact to
+  the scalar path) with bisect lookup; outside the range it falls back to phase_fraction()
+- nudge_tables(caps) -> 8 frozen, pre-clamped nudge mappings (cached per caps)
+- nudges_at(ts, caps) -> frozen mapping: one binary search + one tuple index
+
 CLI
 - `python lunar_nudge.py`        → JSON snapshot now
 - `python lunar_nudge.py --iso 2025-10-19T12:00:00Z`
@@ -28,8 +40,11 @@ from __future__ import annotations
 import math
 import sys
 import json
+import bisect
 import datetime as dt
-from typing import Dict, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
 
 # --- Constants (module‑level for speed) ---
 SYNODIC: float = 29.530588853
@@ -47,14 +62,37 @@ PHASE_NAMES = (
     "Waning Crescent",
 )
 
+# Nudge levers in column order of nudge_matrix()
+LEVERS = (
+    "severance",
+    "harmonizers",
+    "voice_clarity",
+    "coherence",
+    "integration",
+    "translation",
+    "grounding",
+    "sealing",
+    "call_harmonizers_bias",
+)
+
 __all__ = [
     "SYNODIC",
     "REF_NEW_MOON",
     "PHASE_NAMES",
+    "LEVERS",
     "phase_fraction",
     "phase_name",
     "compute_nudges",
     "sample",
+    "phase_fractions",
+    "phase_indices",
+    "nudge_matrix",
+    "sample_batch",
+    "PhaseCalendar",
+    "calendar",
+    "phase_bin",
+    "nudge_tables",
+    "nudges_at",
 ]
 
 # --- Core phase functions ---
@@ -124,12 +162,22 @@ def compute_nudges(frac: float, caps: Tuple[float, float] | None = None) -> Dict
     """
     Return nudges keyed by conceptual levers. Optional (lo,hi) caps.
     """
-    n = _nudges_for(phase_name(frac))
-    if caps:
-        lo, hi = float(caps[0]), float(caps[1])
-        for k, v in n.items():
-            n[k] = _clamp(float(v), lo, hi)
-    return n
+    return dict(nudge_tables(caps)[int(frac * 8.0 + 0.5) & 7])
+
+@lru_cache(maxsize=32)
+def _nudge_tables(caps: Tuple[float, float] | None) -> Tuple[Mapping[str, float], ...]:
+    out = []
+    for name in PHASE_NAMES:
+        n = _nudges_for(name)
+        if caps:
+            lo, hi = caps
+            n = {k: _clamp(float(v), lo, hi) for k, v in n.items()}
+        out.append(MappingProxyType(n))
+    return tuple(out)
+
+def nudge_tables(caps: Tuple[float, float] | None = None) -> Tuple[Mapping[str, float], ...]:
+    """Read-only nudges per phase bin (PHASE_NAMES order), clamped to caps; cached."""
+    return _nudge_tables((float(caps[0]), float(caps[1])) if caps else None)
 
 def sample(ts: dt.datetime | None = None, caps: Tuple[float, float] | None = None) -> Dict[str, object]:
     f = phase_fraction(ts)
@@ -140,6 +188,114 @@ def sample(ts: dt.datetime | None = None, caps: Tuple[float, float] | None = Non
         "timestamp": _to_utc(ts).isoformat(),
     }
 
+# --- Phase calendar (bisect over precomputed bin transitions) ---
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_US = dt.timedelta(microseconds=1)
+_REF_US = (REF_NEW_MOON - _EPOCH) // _US
+
+def _bin_at_us(us: int) -> int:
+    # scalar path on an exact µs instant
+    return int(phase_fraction(_EPOCH + dt.timedelta(microseconds=us)) * 8.0 + 0.5) & 7
+
+class PhaseCalendar:
+    """Phase-bin transition instants for [start_year, end_year) in epoch µs.
+
+    Each transition is the first microsecond at which phase_name(phase_fraction(t))
+    changes, so bin_at() agrees with the scalar path everywhere in range."""
+
+    def __init__(self, start_year: int = 1990, end_year: int = 2100):
+        self.start_us = (dt.datetime(int(start_year), 1, 1, tzinfo=dt.timezone.utc) - _EPOCH) // _US
+        self.end_us = (dt.datetime(int(end_year), 1, 1, tzinfo=dt.timezone.utc) - _EPOCH) // _US
+        cycle_us = SYNODIC * 86400e6
+        k = math.floor((self.start_us - _REF_US) / cycle_us) - 1
+        edges, bins = [self.start_us], [_bin_at_us(self.start_us)]
+        while True:
+            for j in range(8):
+                us = _REF_US + round((k + (2 * j + 1) / 16.0) * cycle_us)
+                new = (j + 1) & 7
+                # snap to the exact first µs of the new bin under float rounding
+                while _bin_at_us(us - 1) == new:
+                    us -= 1
+                while _bin_at_us(us) != new:
+                    us += 1
+                if us >= self.end_us:
+                    self.edges, self.bins = edges, bins
+                    return
+                if us > edges[-1]:
+                    edges.append(us)
+                    bins.append(new)
+            k += 1
+
+    def bin_at(self, us: int) -> int:
+        if self.start_us <= us < self.end_us:
+            return self.bins[bisect.bisect_right(self.edges, us) - 1]
+        return _bin_at_us(us)
+
+@lru_cache(maxsize=4)
+def calendar(start_year: int = 1990, end_year: int = 2100) -> PhaseCalendar:
+    return PhaseCalendar(start_year, end_year)
+
+def _ts_us(ts) -> int:
+    if ts is None or isinstance(ts, dt.datetime):
+        return (_to_utc(ts) - _EPOCH) // _US
+    return round(float(ts) * 1e6)  # epoch seconds
+
+def phase_bin(ts: dt.datetime | float | None = None, cal: PhaseCalendar | None = None) -> int:
+    """Index into PHASE_NAMES for a datetime or epoch seconds (None = now)."""
+    return (cal or calendar()).bin_at(_ts_us(ts))
+
+def nudges_at(ts: dt.datetime | float | None = None, caps: Tuple[float, float] | None = None,
+              cal: PhaseCalendar | None = None) -> Mapping[str, float]:
+    """Frozen, pre-clamped nudges for the phase bin at ts."""
+    return nudge_tables(caps)[phase_bin(ts, cal)]
+
+# --- Batch API (vectorized; NumPy imported on first use) ---
+
+def _epoch_us(ts):
+    """int64 microseconds since the Unix epoch from datetime64 or epoch-second arrays.
+    Epoch floats are rounded to microseconds, like datetime.fromtimestamp()."""
+    import numpy as np
+    a = np.asarray(ts)
+    if np.issubdtype(a.dtype, np.datetime64):
+        return a.astype("datetime64[us]").astype(np.int64)
+    return np.rint(a.astype(np.float64) * 1e6).astype(np.int64)
+
+def phase_fractions(ts):
+    """phase_fraction() over an array: same µs delta, same /86400 and float modulo."""
+    import numpy as np
+    delta_s = (_epoch_us(ts) - _REF_US) / 1e6  # exact int64 -> correctly rounded, as timedelta.total_seconds()
+    d = delta_s / 86400.0
+    return np.mod(d, SYNODIC) / SYNODIC
+
+def phase_indices(frac):
+    """phase_name() bins as indices into PHASE_NAMES."""
+    import numpy as np
+    return (np.asarray(frac, dtype=np.float64) * 8.0 + 0.5).astype(np.int64) & 7
+
+def _nudge_table(caps: Tuple[float, float] | None = None):
+    import numpy as np
+    table = np.array([[_nudges_for(name)[k] for k in LEVERS] for name in PHASE_NAMES], dtype=np.float64)
+    if caps:
+        lo, hi = float(caps[0]), float(caps[1])
+        table = np.where(table > hi, hi, np.where(table < lo, lo, table))  # _clamp() semantics
+    return table
+
+def nudge_matrix(idx, caps: Tuple[float, float] | None = None):
+    """compute_nudges() for every phase index: rows follow idx, columns follow LEVERS."""
+    import numpy as np
+    return _nudge_table(caps)[np.asarray(idx, dtype=np.int64)]
+
+def sample_batch(ts, caps: Tuple[float, float] | None = None) -> Dict[str, object]:
+    frac = phase_fractions(ts)
+    idx = phase_indices(frac)
+    return {
+        "phase_fraction": frac,
+        "phase_index": idx,
+        "phase_names": PHASE_NAMES,
+        "levers": LEVERS,
+        "nudges": nudge_matrix(idx, caps),
+    }
+
 # --- CLI ---
 def _parse_iso(s: str) -> dt.datetime:
     # Accept 'Z' suffix; avoid heavy parsing libs
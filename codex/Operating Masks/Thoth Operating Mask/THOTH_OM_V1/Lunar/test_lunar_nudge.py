@@ -0,0 +1,55 @@
+import datetime as dt
+
+import pytest
+
+import lunar_nudge as ln
+
+UTC = dt.timezone.utc
+# hourly for ~two synodic months, plus a few instants either side of the epoch
+STAMPS = [dt.datetime(2025, 9, 1, tzinfo=UTC) + dt.timedelta(minutes=61 * i) for i in range(1420)] + \
+         [dt.datetime(1969, 12, 31, 23, 59, 59, 999_999, tzinfo=UTC), dt.datetime(2000, 1, 6, 18, 14, tzinfo=UTC)]
+
+
+def test_batch_fractions_and_bins_match_the_scalar_path():
+    np = pytest.importorskip("numpy")
+    epoch = np.array([(t - ln._EPOCH).total_seconds() for t in STAMPS])
+    for ts in (np.array([t.replace(tzinfo=None) for t in STAMPS], dtype="datetime64[us]"), epoch):
+        frac = ln.phase_fractions(ts)
+        assert frac.tolist() == [ln.phase_fraction(t) for t in STAMPS]
+        idx = ln.phase_indices(frac)
+        assert [ln.PHASE_NAMES[i] for i in idx] == [ln.phase_name(f) for f in frac]
+
+
+@pytest.mark.parametrize("caps", [None, (0.9, 1.1)])
+def test_nudge_matrix_rows_match_compute_nudges(caps):
+    pytest.importorskip("numpy")
+    out = ln.sample_batch([(t - ln._EPOCH).total_seconds() for t in STAMPS[:200]], caps)
+    for f, row in zip(out["phase_fraction"], out["nudges"]):
+        assert dict(zip(out["levers"], row.tolist())) == ln.compute_nudges(f, caps)
+
+
+def test_calendar_agrees_with_the_scalar_bin_at_every_transition():
+    cal = ln.PhaseCalendar(2024, 2026)
+    assert len(cal.edges) > 8 * 24
+    for us, b in zip(cal.edges[1:], cal.bins[1:]):
+        assert ln._bin_at_us(us) == b and ln._bin_at_us(us - 1) != b
+        assert cal.bin_at(us) == b and cal.bin_at(us - 1) == ln._bin_at_us(us - 1)
+
+
+def test_phase_bin_matches_phase_name_in_and_out_of_range():
+    cal = ln.PhaseCalendar(2025, 2026)
+    for t in STAMPS[::7]:
+        assert ln.PHASE_NAMES[ln.phase_bin(t, cal)] == ln.phase_name(ln.phase_fraction(t))
+    assert ln.phase_bin(STAMPS[0].timestamp(), cal) == ln.phase_bin(STAMPS[0], cal)
+
+
+def test_nudge_tables_are_cached_frozen_and_clamped():
+    tables = ln.nudge_tables((0.95, 1.05))
+    assert ln.nudge_tables([0.95, 1.05]) is tables and len(tables) == 8
+    assert max(v for t in tables for v in t.values()) == 1.05
+    assert min(v for t in tables for v in t.values()) == 0.95
+    with pytest.raises(TypeError):
+        tables[0]["severance"] = 2.0
+    t = STAMPS[100]
+    assert ln.nudges_at(t, (0.95, 1.05)) is tables[ln.phase_bin(t)]
+    assert dict(ln.nudges_at(t)) == ln.compute_nudges(ln.phase_fraction(t))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Braid executor — runs the G1..G7 gate flow of Thoth_engine_1.0.yaml on asyncio.
+
+- flow.sequence (or a router gate_order) is executed gate by gate with pluggable gate
+  callables: fn(packet, ctx) -> packet.out ({payload, residuals, metrics, ts}); plain
+  functions and coroutines both work
+- hooks: flow.hooks.after_each_gate runs after every gate execution,
+  flow.hooks.before_bff once before the BFF step (callables registered by name); a
+  configured hook name with no registered callable is reported on stderr once
+- Limits from the thresholds view: total gate executions ≤ min(gates.total_cap,
+  meta_gate.safety.hard_stop_after_total_gates); a gate re-runs (out["repeat"]) at most
+  meta_gate.safety.max_gate_iterations times, each re-run waiting
+  meta_gate.safety.cooldown_s on the loop's monotonic clock
+- A gate whose metrics.coherence falls below gates.triggers.early_severance_below
+  ends the session: downstream gates are never evaluated (reported as skipped)
+- Sessions are independent coroutines; run_many() overlaps them on one event loop
+  (cooldowns are awaited, not slept, so a waiting session never blocks the others)
+- The record carries the coherence_hash of the gate outputs (braid_hash.py, updated
+  per gate execution; `ts` excluded)
+- With a GateMemo (gate_memo.py; load_executor() builds one from runtime.yaml memo:)
+  registered gates are memoized on (gate, packet, thresholds version,
+  ctx["harmonizers"]); the gates must then be deterministic
+
+Usage:
+  python scripts/braid_executor.py demo -n 200 --concurrency 50
+  python scripts/braid_executor.py demo -n 20 --cooldown 0.05 --profile strict
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import NamedTuple
+import os, sys, json, time, uuid, asyncio, inspect, datetime as dt
+
+from braid_hash import BraidHasher
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+SEQUENCE = ("G1", "G2", "G3", "G4", "G5", "G6", "G7")
+
+class ExecutorError(Exception):
+    pass
+
+class Limits(NamedTuple):
+    total_cap: int = 7
+    max_gate_iterations: int = 2
+    cooldown_s: float = 2.0
+    early_severance_below: float | None = 0.28
+
+    @classmethod
+    def from_thresholds(cls, thresholds) -> "Limits":
+        """From a threshold_layers view (dotted keys) or a thresholds dict."""
+        if not hasattr(thresholds, "explain"):
+            from threshold_layers import flatten
+            root = thresholds.get("thresholds", thresholds) if isinstance(thresholds.get("thresholds"), dict) else thresholds
+            thresholds = flatten(root)
+        d = cls()
+        caps = [c for c in (thresholds.get("gates.total_cap"),
+                            thresholds.get("meta_gate.safety.hard_stop_after_total_gates")) if c is not None]
+        return cls(total_cap=int(min(caps)) if caps else d.total_cap,
+                   max_gate_iterations=int(thresholds.get("meta_gate.safety.max_gate_iterations", d.max_gate_iterations)),
+                   cooldown_s=float(thresholds.get("meta_gate.safety.cooldown_s", d.cooldown_s)),
+                   early_severance_below=thresholds.get("gates.triggers.early_severance_below", d.early_severance_below))
+
+def _now_iso() -> str:
+    return dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def _harmonizer_state(ctx: dict):
+    return ctx.get("harmonizers")
+
+async def _call(fn, *args):
+    res = fn(*args)
+    return await res if inspect.isawaitable(res) else res
+
+class BraidExecutor:
+    def __init__(self, limits: Limits = Limits(), sequence=SEQUENCE, hooks: dict | None = None,
+                 memo=None, thresholds=None):
+        self.limits = limits
+        self.sequence = tuple(sequence)
+        self.hook_names = {"after_each_gate": [], "before_bff": [], **(hooks or {})}
+        self.gates: dict[str, object] = {}
+        self.hooks: dict[str, object] = {}
+        self.bff = None
+        self.memo = memo                   # GateMemo or None
+        self.thresholds = thresholds       # memo key part (thresholds_version)
+        self._unhooked: set[str] = set()   # configured hook names already reported missing
+
+    @classmethod
+    def from_engine(cls, engine: dict, thresholds, memo=None) -> "BraidExecutor":
+        flow = engine.get("flow") or {}
+        hooks = {k: [v] if isinstance(v, str) else list(v or []) for k, v in (flow.get("hooks") or {}).items()}
+        return cls(Limits.from_thresholds(thresholds), flow.get("sequence") or SEQUENCE, hooks, memo, thresholds)
+
+    def register(self, gate_id: str, fn) -> "BraidExecutor":
+        """Register a gate callable; memoized when the executor has a memo."""
+        if self.memo is not None:
+            from gate_memo import thresholds_version
+            fn = self.memo.wrap(gate_id, fn, thresholds_version(self.thresholds), _harmonizer_state)
+        self.gates[gate_id] = fn
+        return self
+
+    def register_hook(self, name: str, fn) -> "BraidExecutor":
+        """e.g. register_hook("harmonizers.apply", fn(gate_id, out, ctx))."""
+        self.hooks[name] = fn
+        return self
+
+    def _check_hooks(self) -> None:
+        for point, names in self.hook_names.items():
+            for name in names or ():
+                if name not in self.hooks and name not in self._unhooked:
+                    self._unhooked.add(name)
+                    print(f"[!] flow.hooks.{point}: no callable registered for {name!r}; skipped",
+                          file=sys.stderr)
+
+    async def _hooks(self, point: str, *args) -> None:
+        for name in self.hook_names.get(point) or ():
+            fn = self.hooks.get(name)
+            if fn is not None:
+                await _call(fn, *args)
+
+    async def _gate(self, gate: str, packet: dict, ctx: dict, hasher: BraidHasher, **tag) -> tuple:
+        """Run one gate (re-runs on out["repeat"], cooldowns, total cap, severance);
+        ctx["executed"] counts executions against the cap. Returns (out, status, ran)
+        with status completed | severed | capped."""
+        loop = asyncio.get_running_loop()
+        lim = ctx["limits"]
+        last_end, out, status = None, None, "completed"
+        for it in range(1, lim.max_gate_iterations + 1):
+            if ctx["executed"] >= lim.total_cap:
+                status = "capped"
+                break
+            if last_end is not None:
+                wait = lim.cooldown_s - (loop.time() - last_end)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            start = loop.time()
+            out = await _call(self.gates[gate], packet, ctx)
+            last_end = loop.time()
+            ctx["executed"] += 1
+            out = {"ts": _now_iso(), **out}        # the gate's own dict stays untouched
+            coh = (out.get("metrics") or {}).get("coherence")
+            ctx["outputs"][gate] = out
+            hasher.set(gate, {k: v for k, v in out.items() if k != "ts"})
+            ctx["trace"].append({"gate": gate, "iteration": it, **tag, "coherence": coh,
+                                 "ms": round((last_end - start) * 1000, 3)})
+            await self._hooks("after_each_gate", gate, out, ctx)
+            if lim.early_severance_below is not None and coh is not None and coh < lim.early_severance_below:
+                status = "severed"
+                break
+            if not out.get("repeat"):
+                break
+            packet = out.get("payload", packet) if isinstance(out.get("payload"), dict) else packet
+        return out, status, last_end is not None
+
+    async def run(self, packet: dict, order=None, session_id: str | None = None) -> dict:
+        """One session through the braid; returns its execution record."""
+        loop = asyncio.get_running_loop()
+        order = tuple(order or self.sequence)
+        missing = [g for g in order if g not in self.gates]
+        if missing:
+            raise ExecutorError(f"no callable registered for gates {missing}")
+        self._check_hooks()
+        ctx = {"session_id": session_id or str(uuid.uuid4()), "limits": self.limits, "outputs": {}, "trace": [],
+               "executed": 0}
+        hasher = BraidHasher()
+        t0 = loop.time()
+        status, skipped = "completed", []
+        for i, gate in enumerate(order):
+            out, status, ran = await self._gate(gate, packet, ctx, hasher)
+            if status != "completed":
+                # a gate that ran at least once is not skipped, even when capped mid-iteration
+                skipped = list(order[i + 1:]) if status == "severed" or ran else list(order[i:])
+                break
+            packet = out.get("payload", packet) if isinstance(out.get("payload"), dict) else packet
+        bff = None
+        if status == "completed":
+            await self._hooks("before_bff", ctx)
+            if self.bff is not None:
+                bff = await _call(self.bff, ctx["outputs"], ctx)
+        return {"session_id": ctx["session_id"], "status": status, "executed": ctx["executed"],
+                "skipped": skipped, "trace": ctx["trace"], "outputs": ctx["outputs"], "bff": bff,
+                "coherence_hash": hasher.hexdigest(),
+                "elapsed_ms": round((loop.time() - t0) * 1000, 3)}
+
+    async def run_many(self, packets, concurrency: int | None = None, order=None) -> list[dict]:
+        """Overlapping sessions on the running loop (at most `concurrency` in flight)."""
+        sem = asyncio.Semaphore(concurrency) if concurrency else None
+        async def one(p):
+            if sem is None:
+                return await self.run(p, order)
+            async with sem:
+                return await self.run(p, order)
+        return await asyncio.gather(*(one(p) for p in packets))
+
+def load_executor(root: Path = ROOT, thresholds=None, profile: str | None = None,
+                  memo=None) -> BraidExecutor:
+    """Executor configured from engine/Thoth_engine_1.0.yaml and the thresholds view.
+    memo=None builds the gate memo from runtime.yaml (memo:); memo=False disables it."""
+    import yaml
+    path = root / "engine" / "Thoth_engine_1.0.yaml"
+    if not path.exists():
+        path = root / "Thoth_engine_1.0.yaml"          # source tree (flat, not yet loaded)
+    engine = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    if thresholds is None:
+        from mask_runtime import threshold_view
+        thresholds = threshold_view(root, profile)
+    if memo is None:
+        from gate_memo import from_config, load_config
+        memo = from_config(load_config(root))
+    return BraidExecutor.from_engine(engine, thresholds, memo or None)
+
+def main(argv) -> int:
+    import argparse, random
+    ap = argparse.ArgumentParser(prog="braid_executor.py", description="Braid flow executor")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    dp = sp.add_parser("demo", help="Run synthetic sessions concurrently and report throughput")
+    dp.add_argument("-n", type=int, default=100)
+    dp.add_argument("--concurrency", type=int, default=0)
+    dp.add_argument("--profile")
+    dp.add_argument("--cooldown", type=float, help="override meta_gate.safety.cooldown_s")
+    dp.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    ex = load_executor(ROOT, profile=args.profile, memo=False)   # random gates: nothing to memoize
+    if args.cooldown is not None:
+        ex.limits = ex.limits._replace(cooldown_s=args.cooldown)
+    rng = random.Random(args.seed)
+
+    async def gate(packet, ctx):
+        await asyncio.sleep(0)
+        coh = rng.uniform(0.2, 1.0)
+        return {"payload": packet, "residuals": [round(1 - coh, 4)],
+                "metrics": {"coherence": coh, "intensity": 0.5, "stability": 0.5}, "repeat": coh < 0.5}
+    for g in ex.sequence:
+        ex.register(g, gate)
+    t = time.perf_counter()
+    res = asyncio.run(ex.run_many([{"i": i} for i in range(args.n)], args.concurrency or None))
+    wall = time.perf_counter() - t
+    counts = {}
+    for r in res:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(json.dumps({"sessions": args.n, "wall_s": round(wall, 3), "sessions_per_s": round(args.n / wall, 1),
+                      "gate_executions": sum(r["executed"] for r in res), "status": counts,
+                      "limits": ex.limits._asdict()}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
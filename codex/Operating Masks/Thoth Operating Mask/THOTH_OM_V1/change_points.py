@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Change points — streaming drift detection on per-turn coherence.
+
+- Two one-sided detectors for a *drop* in coherence, O(1) state per thread:
+  CUSUM against the running mean since the last reset, and Page-Hinkley
+- Config: thresholds_1.1.yaml functions.severance.triggers.coherence_drift
+  (next to the static coherence_below floor)
+- An alarm emits a `coherence_drop` telemetry event (consumed by overlay_policy rules,
+  see overlays.py resolve) and resets the thread's detectors for the new regime
+- finish_turn() feeds it; state persists to thread/change_points.json on every
+  alarm, every `persist_every` turns and at interpreter exit
+
+Usage:
+  python scripts/change_points.py status
+  python scripts/change_points.py replay --thread T42     # run detectors over telemetry.jsonl
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json, atexit, datetime as dt
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+STATE = ROOT / "thread" / "change_points.json"
+EVENT = "coherence_drop"
+DEFAULTS = {"enabled": True, "warmup": 8, "persist_every": 20,
+            "cusum": {"k": 0.02, "h": 0.15}, "page_hinkley": {"delta": 0.01, "lambda": 0.2}}
+# per-thread state: [n, mean, cusum_s, ph_u, ph_umax]
+N, MEAN, CUSUM_S, PH_U, PH_MAX = range(5)
+
+def load_config(root: Path = ROOT) -> dict:
+    cfg = {}
+    try:
+        import yaml
+        thr = yaml.safe_load((root / "thresholds_1.1.yaml").read_text(encoding="utf-8")) or {}
+        thr = thr.get("thresholds", thr)
+        cfg = ((((thr.get("functions") or {}).get("severance") or {}).get("triggers") or {}).get("coherence_drift") or {})
+    except Exception:
+        pass
+    out = {**DEFAULTS, **cfg}
+    out["cusum"] = {**DEFAULTS["cusum"], **(cfg.get("cusum") or {})}
+    out["page_hinkley"] = {**DEFAULTS["page_hinkley"], **(cfg.get("page_hinkley") or {})}
+    return out
+
+class DriftDetector:
+    """CUSUM + Page-Hinkley for downward shifts, keyed by thread."""
+
+    def __init__(self, cfg: dict | None = None, state_path: Path | None = STATE):
+        cfg = cfg or DEFAULTS
+        self.warmup = int(cfg.get("warmup", 8))
+        self.k = float(cfg["cusum"]["k"]); self.h = float(cfg["cusum"]["h"])
+        self.delta = float(cfg["page_hinkley"]["delta"]); self.lam = float(cfg["page_hinkley"]["lambda"])
+        self.persist_every = max(1, int(cfg.get("persist_every", 20)))
+        self.state_path = state_path
+        self.threads: dict[str, list[float]] = {}
+        self.events = 0
+        if state_path is not None:
+            try:
+                self.threads = json.loads(state_path.read_text(encoding="utf-8")).get("threads") or {}
+            except Exception:
+                pass
+
+    def update(self, thread: str, x: float) -> dict | None:
+        """Feed one coherence value; returns the alarm (detector, baseline, ...) or None."""
+        s = self.threads.get(thread)
+        if s is None:
+            s = self.threads[thread] = [0, 0.0, 0.0, 0.0, 0.0]
+        x = float(x)
+        alarm = None
+        if s[N] >= self.warmup:
+            mu = s[MEAN]
+            # CUSUM: accumulated shortfall below the baseline beyond the slack k
+            s[CUSUM_S] = max(0.0, s[CUSUM_S] + (mu - x) - self.k)
+            # Page-Hinkley: cumulative deviation; a drop pulls U below its running max
+            s[PH_U] += x - mu + self.delta
+            s[PH_MAX] = max(s[PH_MAX], s[PH_U])
+            if s[CUSUM_S] > self.h:
+                alarm = {"detector": "cusum", "stat": round(s[CUSUM_S], 4)}
+            elif s[PH_MAX] - s[PH_U] > self.lam:
+                alarm = {"detector": "page_hinkley", "stat": round(s[PH_MAX] - s[PH_U], 4)}
+        if alarm:
+            alarm.update(thread=thread, baseline=round(s[MEAN], 4), value=x, turns=int(s[N]))
+            self.threads[thread] = [1, x, 0.0, 0.0, 0.0]  # new regime starts here
+        else:
+            s[N] += 1
+            s[MEAN] += (x - s[MEAN]) / s[N]
+        self.events += 1
+        if self.state_path is not None and (alarm or self.events % self.persist_every == 0):
+            self.save()
+        return alarm
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps({"threads": self.threads}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+def emit(alarm: dict, root: Path = ROOT) -> dict:
+    """Append the alarm as a `coherence_drop` telemetry event; returns the event."""
+    event = {"ts": dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"), "event": EVENT, **alarm}
+    tp = root / "thread" / "telemetry.jsonl"
+    tp.parent.mkdir(parents=True, exist_ok=True)
+    with tp.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+    return event
+
+# --- runtime hook: one resident detector, rebuilt when thresholds change ---
+_DETECTOR = None
+_DETECTOR_MTIME = None
+
+def get_detector(root: Path = ROOT) -> DriftDetector | None:
+    global _DETECTOR, _DETECTOR_MTIME
+    try:
+        mtime = (root / "thresholds_1.1.yaml").stat().st_mtime
+    except OSError:
+        mtime = None
+    if _DETECTOR is None or mtime != _DETECTOR_MTIME:
+        cfg = load_config(root)
+        if _DETECTOR is not None:
+            _DETECTOR.save()
+        _DETECTOR = DriftDetector(cfg, root / "thread" / "change_points.json") if cfg.get("enabled", True) else None
+        _DETECTOR_MTIME = mtime
+    return _DETECTOR
+
+@atexit.register
+def _save_on_exit() -> None:
+    if _DETECTOR is not None:
+        _DETECTOR.save()
+
+def observe(coherence: float, thread: str | None = None) -> dict | None:
+    """Feed one turn; returns the emitted coherence_drop event, if any."""
+    det = get_detector()
+    if det is None:
+        return None
+    alarm = det.update(thread or "-", coherence)
+    return emit(alarm) if alarm else None
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="change_points.py", description="Coherence drift detection")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    sp.add_parser("status", help="Print per-thread detector state")
+    rp = sp.add_parser("replay", help="Run the detectors over telemetry (no events written)")
+    rp.add_argument("--file", default=str(ROOT / "thread" / "telemetry.jsonl"))
+    rp.add_argument("--thread", help="only this thread")
+    args = ap.parse_args(argv)
+
+    cfg = load_config()
+    if args.cmd == "status":
+        det = DriftDetector(cfg)
+        out = {t: {"turns": int(s[N]), "baseline": round(s[MEAN], 4), "cusum": round(s[CUSUM_S], 4),
+                   "page_hinkley": round(s[PH_MAX] - s[PH_U], 4)} for t, s in sorted(det.threads.items())}
+        print(json.dumps({"config": cfg, "threads": out}, indent=2))
+        return 0
+    det = DriftDetector(cfg, state_path=None)
+    with open(args.file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(r, dict) or r.get("coherence") is None:
+                continue
+            thread = r.get("thread") or "-"
+            if args.thread and thread != args.thread:
+                continue
+            alarm = det.update(thread, r["coherence"])
+            if alarm:
+                print(json.dumps({"ts": r.get("ts") or r.get("timestamp"), "event": EVENT, **alarm}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Gate memo — content-addressed memoization of deterministic gate outputs.
+
+- braided-feedback-function.yaml: "for equal inputs, outputs must be identical", so a
+  gate output is cached under the coherence_hash (braid_hash.py) of (gate id, input
+  packet, effective thresholds version, harmonizer state)
+- Tier 1: in-memory LRU (memo.capacity entries); tier 2 (optional): one JSON file
+  per key under memo.disk.path, evicted oldest-used first past memo.disk.max_mb
+- Regenerated turns (on_fail: regenerate_once) and rebraid attempts re-run the braid
+  with mostly unchanged inputs: those gates become lookups
+- Outputs are stored without their `ts` and handed out as shallow copies; treat the
+  nested values as read-only
+- BraidExecutor.register() wraps every gate when the executor has a memo
+  (braid_executor.load_executor() builds it from runtime.yaml memo:)
+- The BFF (bff_engine.py) carries EWMA state across turns, so its key also holds the
+  stream's state before the turn and the entry the state after it
+  (BFFEngine.executor_step(memo=...))
+- Metrics: hits (memory / disk), misses, evictions, disk bytes
+
+Usage:
+  python scripts/gate_memo.py stats
+  python scripts/gate_memo.py clear
+"""
+from __future__ import annotations
+from pathlib import Path
+from collections import OrderedDict
+import os, sys, json, inspect
+
+from braid_hash import coherence_hash
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+DEFAULTS = {"enabled": True, "capacity": 2048,
+            "disk": {"enabled": False, "path": str(ROOT / "thread" / "memo"), "max_mb": 64}}
+VOLATILE = ("ts",)
+
+def thresholds_version(thresholds) -> object:
+    """Hashable identity of the effective thresholds: the layer versions of a
+    threshold_layers view (plus its request overrides), else the content."""
+    if hasattr(thresholds, "layers"):
+        front = [sorted(l.entries.items()) for l in getattr(thresholds, "_front", ())]
+        return [[l.name, l.version] for l in thresholds.layers] + front
+    return coherence_hash(thresholds)
+
+class GateMemo:
+    def __init__(self, capacity: int = 2048, disk_dir: Path | None = None, disk_max_bytes: int = 64 << 20):
+        self.capacity = max(1, int(capacity))
+        self.mem: OrderedDict[str, dict] = OrderedDict()
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max = int(disk_max_bytes)
+        self.stats = {"hits_mem": 0, "hits_disk": 0, "misses": 0, "evict_mem": 0, "evict_disk": 0,
+                      "disk_bytes": 0}
+        self._disk: OrderedDict[str, int] = OrderedDict()   # key -> size, least recently used first
+        if self.disk_dir is not None:
+            self._scan()
+
+    # --- keys ---
+    @staticmethod
+    def key(gate_id: str, packet, thresholds_ver, harmonizer_state=None) -> str:
+        return coherence_hash({"gate": gate_id, "packet": packet, "thresholds": thresholds_ver,
+                               "harmonizers": harmonizer_state})
+
+    # --- disk tier ---
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _scan(self) -> None:
+        files = []
+        for p in self.disk_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_atime, p.stem, st.st_size))
+        for _, k, size in sorted(files):
+            self._disk[k] = size
+            self.stats["disk_bytes"] += size
+
+    def _disk_get(self, key: str):
+        if self.disk_dir is None or key not in self._disk:
+            return None
+        try:
+            value = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.stats["disk_bytes"] -= self._disk.pop(key, 0)
+            return None
+        self._disk.move_to_end(key)
+        return value
+
+    def _disk_put(self, key: str, value: dict) -> None:
+        data = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        if len(data) > self.disk_max:
+            return
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+        self.stats["disk_bytes"] += len(data) - self._disk.pop(key, 0)
+        self._disk[key] = len(data)
+        while self.stats["disk_bytes"] > self.disk_max and self._disk:
+            old, size = self._disk.popitem(last=False)
+            try:
+                self._path(old).unlink()
+            except OSError:
+                pass
+            self.stats["disk_bytes"] -= size
+            self.stats["evict_disk"] += 1
+
+    # --- public ---
+    def get(self, key: str):
+        value = self.mem.get(key)
+        if value is not None:
+            self.mem.move_to_end(key)
+            self.stats["hits_mem"] += 1
+        else:
+            value = self._disk_get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits_disk"] += 1
+            self._mem_put(key, value)
+        return dict(value)
+
+    def _mem_put(self, key: str, value: dict) -> None:
+        self.mem[key] = value
+        self.mem.move_to_end(key)
+        if len(self.mem) > self.capacity:
+            self.mem.popitem(last=False)
+            self.stats["evict_mem"] += 1
+
+    def put(self, key: str, value: dict) -> None:
+        value = {k: v for k, v in value.items() if k not in VOLATILE}
+        self._mem_put(key, value)
+        if self.disk_dir is not None:
+            self._disk_put(key, value)
+
+    def wrap(self, gate_id: str, fn, thresholds=None, harmonizer_state=None):
+        """Memoized gate callable for BraidExecutor.register(): fn(packet, ctx).
+        `thresholds` / `harmonizer_state` may be callables of ctx (read per call)."""
+        def resolve(x, ctx):
+            return x(ctx) if callable(x) else x
+        async def call(packet, ctx):
+            key = self.key(gate_id, packet, thresholds_version(resolve(thresholds, ctx)),
+                           resolve(harmonizer_state, ctx))
+            hit = self.get(key)
+            if hit is not None:
+                return hit
+            out = fn(packet, ctx)
+            if inspect.isawaitable(out):
+                out = await out
+            self.put(key, out)
+            return out
+        return call
+
+    def clear(self) -> None:
+        self.mem.clear()
+        if self.disk_dir is not None:
+            for k in list(self._disk):
+                try:
+                    self._path(k).unlink()
+                except OSError:
+                    pass
+            self._disk.clear()
+            self.stats["disk_bytes"] = 0
+
+    def metrics(self) -> dict:
+        s = self.stats
+        hits = s["hits_mem"] + s["hits_disk"]
+        total = hits + s["misses"]
+        return {**s, "entries_mem": len(self.mem),
+                "entries_disk": len(self._disk), "hit_rate": round(hits / total, 4) if total else None}
+
+def load_config(root: Path = ROOT) -> dict:
+    try:
+        import yaml
+        cfg = (yaml.safe_load((root / "runtime" / "runtime.yaml").read_text(encoding="utf-8")) or {}).get("memo") or {}
+    except Exception:
+        cfg = {}
+    return {**DEFAULTS, **cfg, "disk": {**DEFAULTS["disk"], **(cfg.get("disk") or {})}}
+
+def from_config(cfg: dict | None = None) -> GateMemo | None:
+    """GateMemo per runtime.yaml memo: block, or None when disabled."""
+    cfg = load_config() if cfg is None else cfg
+    if not cfg.get("enabled", True):
+        return None
+    disk = cfg["disk"]
+    return GateMemo(cfg.get("capacity", 2048), Path(disk["path"]) if disk.get("enabled") else None,
+                    int(float(disk.get("max_mb", 64)) * (1 << 20)))
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="gate_memo.py", description="Gate memo disk tier")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    sp.add_parser("stats", help="Disk tier size and entry count")
+    sp.add_parser("clear", help="Delete the disk tier")
+    args = ap.parse_args(argv)
+    cfg = load_config()
+    memo = GateMemo(1, Path(cfg["disk"]["path"]), int(float(cfg["disk"]["max_mb"]) * (1 << 20)))
+    if args.cmd == "clear":
+        n = len(memo._disk)
+        memo.clear()
+        print(f"[✓] Removed {n} memo entries from {cfg['disk']['path']}")
+    else:
+        print(json.dumps({"path": cfg["disk"]["path"], "enabled": cfg["disk"]["enabled"],
+                          "entries": len(memo._disk), "bytes": memo.stats["disk_bytes"],
+                          "max_mb": cfg["disk"]["max_mb"]}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Harmonizer scheduler — picks harmonizers per hook under the harmonizer safety caps.
+
+- Members, families (policy.max_parallel, rotate_on_tie) and per-member overrides from
+  harmonizers.extended.yaml; hook map, safety (max_simultaneous, cooldown_s,
+  force_serial_on_incoherent) and selection (ensure_family_coverage, rotate_on_tie)
+  from the thresholds view (thresholds win over the harmonizer file)
+- One lazy priority heap per hook: (-priority, last-fired seq, hook rank); with
+  rotate_on_tie equal priorities fire least-recently-used first (round-robin), else
+  in hook order. A grant is O(log n); entries are re-pushed only when a member fires
+- Cooldowns per (session, member) live in a hashed timing wheel (tick 0.5 s): arming
+  and expiry are O(1) amortized, a lookup is one dict read
+- Family membership and per-selection coverage are bitsets: with
+  ensure_family_coverage every family with an eligible member gets one before any
+  family gets a second
+- Caps hold process-wide: active members ≤ max_simultaneous, per family ≤
+  max_parallel, across every session sharing the scheduler; on_incoherent grants one
+  at a time per session when force_serial_on_incoherent is set
+- executor_hooks() gives BraidExecutor callables for flow.hooks
+  (harmonizers.apply / harmonizers.flush); ctx["harmonizers"] carries the export
+  fields (hooks_fired, families_activated, subsets_fired)
+
+Usage:
+  python scripts/harmonizer_scheduler.py show
+  python scripts/harmonizer_scheduler.py bench --sessions 500
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json, time, heapq, inspect
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+HOOKS = ("on_cycle_start", "on_incoherent", "on_stable", "on_overcut_risk")
+DEFAULTS = {"max_simultaneous": 4, "cooldown_s": 10.0, "force_serial_on_incoherent": True,
+            "ensure_family_coverage": True, "rotate_on_tie": True,
+            "call_harmonizers_below": 0.55, "stabilize_above": 0.66}
+
+class SchedulerError(Exception):
+    pass
+
+class TimingWheel:
+    """Hashed timing wheel: key -> expiry, bucketed by tick; advance() expires keys."""
+
+    def __init__(self, tick_s: float = 0.5, slots: int = 256):
+        self.tick_s = float(tick_s)
+        self.slots = [[] for _ in range(int(slots))]
+        self.expiry: dict = {}
+        self.tick = None
+
+    def _tick(self, t: float) -> int:
+        return int(t // self.tick_s)
+
+    def arm(self, key, until: float) -> None:
+        self.expiry[key] = until
+        tk = self._tick(until) + 1                      # fire on the tick after `until`
+        self.slots[tk % len(self.slots)].append((tk, key))
+
+    def cooling(self, key, now: float) -> bool:
+        until = self.expiry.get(key)
+        return until is not None and until > now
+
+    def advance(self, now: float) -> int:
+        """Drop expired keys; returns how many expired."""
+        t = self._tick(now)
+        if self.tick is None:
+            self.tick = t
+        n, dropped = len(self.slots), 0
+        # a jump longer than one revolution visits each slot once
+        for tk in range(self.tick + 1, t + 1) if t - self.tick < n else range(t - n + 1, t + 1):
+            slot = self.slots[tk % n]
+            if not slot:
+                continue
+            keep = []
+            for due, key in slot:
+                if due > t:
+                    keep.append((due, key))
+                elif self.expiry.get(key, now + 1) <= now:
+                    del self.expiry[key]
+                    dropped += 1
+            self.slots[tk % n] = keep
+        self.tick = max(self.tick, t)
+        return dropped
+
+def load_config(root: Path = ROOT, thresholds=None) -> dict:
+    """Members / families from engine/harmonizers.extended.yaml, hooks and caps from
+    the thresholds view (a threshold_layers view or a thresholds dict)."""
+    import yaml
+    path = root / "engine" / "harmonizers.extended.yaml"
+    if not path.exists():
+        path = root / "harmonizers.extended.yaml"      # source tree (flat, not yet loaded)
+    try:
+        doc = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except OSError:
+        doc = {}
+    h = doc.get("harmonizers") or {}
+    if thresholds is None:
+        from mask_runtime import threshold_view
+        thresholds = threshold_view(root)
+    if not hasattr(thresholds, "explain"):
+        from threshold_layers import flatten
+        thresholds = flatten(thresholds.get("thresholds", thresholds)
+                             if isinstance(thresholds.get("thresholds"), dict) else thresholds)
+    safety = h.get("safety") or {}
+    cfg = dict(DEFAULTS)
+    cfg.update({k: safety[k] for k in ("max_simultaneous", "force_serial_on_incoherent") if k in safety})
+    if (h.get("scheduling") or {}).get("cooldown_s") is not None:
+        cfg["cooldown_s"] = h["scheduling"]["cooldown_s"]
+    fair = (h.get("scheduling") or {}).get("fairness") or {}
+    if "ensure_family_coverage" in fair:
+        cfg["ensure_family_coverage"] = fair["ensure_family_coverage"]
+    for key, dotted in (("max_simultaneous", "harmonizers.safety.max_simultaneous"),
+                        ("force_serial_on_incoherent", "harmonizers.safety.force_serial_on_incoherent"),
+                        ("cooldown_s", "harmonizers.safety.cooldown_s"),
+                        ("ensure_family_coverage", "harmonizers.selection.ensure_family_coverage"),
+                        ("rotate_on_tie", "harmonizers.selection.rotate_on_tie"),
+                        ("call_harmonizers_below", "gates.triggers.call_harmonizers_below"),
+                        ("stabilize_above", "meta_gate.coherence.stabilize_above")):
+        if thresholds.get(dotted) is not None:
+            cfg[key] = thresholds[dotted]
+    hooks = {k: list(v) for k, v in (h.get("hooks") or {}).items() if isinstance(v, list)}
+    hooks.update({k: list(thresholds[f"harmonizers.hooks.{k}"]) for k in HOOKS
+                  if isinstance(thresholds.get(f"harmonizers.hooks.{k}"), (list, tuple))})
+    cfg["hooks"] = hooks
+    cfg["families"] = {name: {"members": list(f.get("members") or []), **(f.get("policy") or {})}
+                       for name, f in (h.get("families") or {}).items()}
+    cfg["overrides"] = h.get("overrides") or {}
+    return cfg
+
+class HarmonizerScheduler:
+    def __init__(self, cfg: dict, clock=time.monotonic):
+        self.cfg = {**DEFAULTS, **cfg}
+        self.clock = clock
+        self.cap = int(self.cfg["max_simultaneous"])
+        self.cooldown = float(self.cfg["cooldown_s"])
+        self.members: list[str] = []
+        self.index: dict[str, int] = {}
+        self.fam_bits: list[int] = []                        # member -> family bitset
+        self.family_names: list[str] = []
+        fam_caps, rotate = [], []
+        for fname, fam in (self.cfg.get("families") or {}).items():
+            bit = len(self.family_names)
+            self.family_names.append(fname)
+            fam_caps.append(min(int(fam.get("max_parallel", self.cap)), self.cap))
+            rotate.append(bool(fam.get("rotate_on_tie", self.cfg["rotate_on_tie"])))
+            for m in fam["members"]:
+                if m not in self.index:
+                    self.index[m] = len(self.members)
+                    self.members.append(m)
+                    self.fam_bits.append(0)
+                self.fam_bits[self.index[m]] |= 1 << bit
+        self.family_caps = fam_caps
+        self.hooks: dict[str, list[int]] = {}
+        for hook, names in (self.cfg.get("hooks") or {}).items():
+            unknown = [n for n in names if n not in self.index]
+            if unknown:
+                raise SchedulerError(f"hook {hook}: {unknown} not in any harmonizer family")
+            self.hooks[hook] = [self.index[n] for n in names]
+        ov = self.cfg.get("overrides") or {}
+        self.priority = [float((ov.get(m) or {}).get("priority", 0.0)) for m in self.members]
+        self.member_cooldown = [float(((ov.get(m) or {}).get("timing") or {}).get("cooldown_s", self.cooldown))
+                                for m in self.members]
+        # runtime state
+        self.seq = 0
+        self.last = [0] * len(self.members)                 # round-robin stamp per member
+        self.version = [0] * len(self.members)
+        self.heaps: dict[str, list] = {}
+        self.member_hooks: list[list[str]] = [[] for _ in self.members]
+        self.rank = {hook: {i: r for r, i in enumerate(idxs)} for hook, idxs in self.hooks.items()}
+        self.rotates = [any(bits >> b & 1 and rot for b, rot in enumerate(rotate)) for bits in self.fam_bits]
+        for hook, idxs in self.hooks.items():
+            for i in idxs:
+                self.member_hooks[i].append(hook)
+            self.heaps[hook] = [self._entry(hook, i) for i in idxs]
+            heapq.heapify(self.heaps[hook])
+        self.wheel = TimingWheel()
+        self.active_total = 0
+        self.active_family = [0] * len(self.family_names)
+        self.held: dict[str, set[int]] = {}                  # session -> active members
+        self.stats = {"granted": 0, "denied_cap": 0, "denied_cooldown": 0, "denied_serial": 0, "released": 0}
+
+    def _entry(self, hook: str, i: int) -> tuple:
+        return (-self.priority[i], self.last[i] if self.rotates[i] else 0, self.rank[hook][i], i, self.version[i])
+
+    def _fired(self, i: int) -> None:
+        """New round-robin stamp; re-push the member into the heaps of its hooks."""
+        self.seq += 1
+        self.last[i] = self.seq
+        self.version[i] += 1
+        for hook in self.member_hooks[i]:
+            heap = self.heaps[hook]
+            heapq.heappush(heap, self._entry(hook, i))
+            if len(heap) > 4 * len(self.hooks[hook]) + 8:     # drop stale entries
+                self.heaps[hook] = [e for e in heap if e[4] == self.version[e[3]]]
+                heapq.heapify(self.heaps[hook])
+
+    def _family_free(self, i: int) -> bool:
+        bits, b = self.fam_bits[i], 0
+        while bits:
+            if bits & 1 and self.active_family[b] >= self.family_caps[b]:
+                return False
+            bits >>= 1
+            b += 1
+        return True
+
+    def select(self, hook: str, session: str = "-", limit: int | None = None, now: float | None = None) -> list[str]:
+        """Grant up to `limit` members of `hook` for `session` (marked active until
+        release()). Never exceeds max_simultaneous / family max_parallel."""
+        if hook not in self.hooks:
+            return []
+        now = self.clock() if now is None else now
+        self.wheel.advance(now)
+        held = self.held.get(session) or set()
+        want = len(self.hooks[hook]) if limit is None else int(limit)
+        if hook == "on_incoherent" and self.cfg["force_serial_on_incoherent"]:
+            if held:
+                self.stats["denied_serial"] += 1          # this session already holds one
+                return []
+            want = min(want, 1)
+        want = min(want, self.cap - self.active_total)
+        if want <= 0:
+            self.stats["denied_cap"] += 1
+            return []
+        heap = self.heaps[hook]
+        popped, deferred, picked = [], [], []
+        covered = 0
+        while heap and len(picked) < want:
+            e = heapq.heappop(heap)
+            i = e[3]
+            if e[4] != self.version[i]:
+                continue                                  # stale
+            popped.append(e)
+            if i in held:
+                continue
+            if self.wheel.cooling((session, i), now):
+                self.stats["denied_cooldown"] += 1
+                continue
+            if not self._family_free(i):
+                self.stats["denied_cap"] += 1
+                continue
+            if self.cfg["ensure_family_coverage"] and self.fam_bits[i] and not self.fam_bits[i] & ~covered:
+                deferred.append(i)                        # its families are covered already
+                continue
+            picked.append(i)
+            covered |= self.fam_bits[i]
+            self._take(i)
+        for i in deferred:
+            if len(picked) >= want:
+                break
+            if self._family_free(i):
+                picked.append(i)
+                self._take(i)
+        for e in popped:
+            if e[3] not in picked:
+                heapq.heappush(heap, e)
+        for i in picked:
+            held.add(i)
+            self._fired(i)
+        if picked:
+            self.held[session] = held
+        self.stats["granted"] += len(picked)
+        return [self.members[i] for i in picked]
+
+    def _take(self, i: int) -> None:
+        self.active_total += 1
+        bits, b = self.fam_bits[i], 0
+        while bits:
+            if bits & 1:
+                self.active_family[b] += 1
+            bits >>= 1
+            b += 1
+
+    def release(self, session: str, names=None, now: float | None = None) -> None:
+        """End the given (default: all) active members of `session`; starts their cooldown."""
+        now = self.clock() if now is None else now
+        held = self.held.get(session) or set()
+        for i in [self.index[n] for n in names] if names is not None else list(held):
+            if i not in held:
+                continue
+            held.discard(i)
+            self.active_total -= 1
+            bits, b = self.fam_bits[i], 0
+            while bits:
+                if bits & 1:
+                    self.active_family[b] -= 1
+                bits >>= 1
+                b += 1
+            self.wheel.arm((session, i), now + self.member_cooldown[i])
+            self.stats["released"] += 1
+        if not held:
+            self.held.pop(session, None)
+
+    def hook_for(self, out: dict) -> str | None:
+        """Hook a gate output calls for: overcut risk, incoherent, stable, or none."""
+        m = out.get("metrics") or {}
+        risks = out.get("risks") or ()
+        if "overcut_risk" in risks or m.get("overcut_risk"):
+            return "on_overcut_risk"
+        coh = m.get("coherence")
+        if coh is None:
+            return None
+        if coh < float(self.cfg["call_harmonizers_below"]):
+            return "on_incoherent"
+        return "on_stable" if coh >= float(self.cfg["stabilize_above"]) else None
+
+    def executor_hooks(self, apply=None) -> dict:
+        """{"harmonizers.apply": after_each_gate, "harmonizers.flush": before_bff} for
+        BraidExecutor.register_hook(); `apply(name, gate_id, out, ctx)` runs each grant."""
+        async def run(hook, gate, out, ctx):
+            sid = ctx["session_id"]
+            st = ctx.setdefault("harmonizers", {"hooks_fired": [], "families_activated": [], "subsets_fired": []})
+            names = self.select(hook, sid)
+            try:
+                if apply is not None:
+                    for n in names:
+                        r = apply(n, gate, out, ctx)
+                        if inspect.isawaitable(r):
+                            await r
+            finally:
+                self.release(sid, names)
+            if names:
+                st["hooks_fired"].append(hook)
+                st["subsets_fired"].append(names)
+                for n in names:
+                    for b, fname in enumerate(self.family_names):
+                        if self.fam_bits[self.index[n]] >> b & 1 and fname not in st["families_activated"]:
+                            st["families_activated"].append(fname)
+
+        async def after_each_gate(gate, out, ctx):
+            if "harmonizers" not in ctx:
+                await run("on_cycle_start", gate, out, ctx)
+            hook = self.hook_for(out)
+            if hook:
+                await run(hook, gate, out, ctx)
+
+        def flush(ctx):
+            self.release(ctx["session_id"])
+        return {"harmonizers.apply": after_each_gate, "harmonizers.flush": flush}
+
+    def snapshot(self) -> dict:
+        return {"active_total": self.active_total, "cap": self.cap,
+                "active_family": dict(zip(self.family_names, self.active_family)),
+                "cooling": len(self.wheel.expiry), "sessions_holding": len(self.held), **self.stats}
+
+def main(argv) -> int:
+    import argparse, random
+    ap = argparse.ArgumentParser(prog="harmonizer_scheduler.py", description="Harmonizer scheduler")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    sp.add_parser("show", help="Resolved members, families, hooks and caps")
+    b = sp.add_parser("bench", help="Interleaved sessions on a simulated clock; checks the caps")
+    b.add_argument("--sessions", type=int, default=500)
+    b.add_argument("--steps", type=int, default=20000)
+    b.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    cfg = load_config(ROOT)
+    if args.cmd == "show":
+        print(json.dumps({k: v for k, v in cfg.items() if k != "overrides"}, indent=2))
+        return 0
+    rng = random.Random(args.seed)
+    clock = [0.0]
+    sch = HarmonizerScheduler(cfg, clock=lambda: clock[0])
+    hooks = list(sch.hooks)
+    counts = {m: 0 for m in sch.members}
+    ends = []                                     # (release time, session, names)
+    t = time.perf_counter()
+    for _ in range(args.steps):
+        clock[0] += rng.uniform(0.0, 0.02)
+        while ends and ends[0][0] <= clock[0]:
+            _, sid, names = heapq.heappop(ends)
+            sch.release(sid, names)
+        sid = f"s{rng.randrange(args.sessions)}"
+        names = sch.select(rng.choice(hooks), sid)
+        if names:
+            heapq.heappush(ends, (clock[0] + rng.uniform(0.01, 0.1), sid, names))
+        for n in names:
+            counts[n] += 1
+        if sch.active_total > sch.cap or any(a > c for a, c in zip(sch.active_family, sch.family_caps)):
+            print(f"[!] cap exceeded: {sch.snapshot()}")
+            return 1
+    dt_us = (time.perf_counter() - t) / args.steps * 1e6
+    print(json.dumps({"steps": args.steps, "us_per_step": round(dt_us, 2), "fired": counts,
+                      **sch.snapshot()}, indent=2))
+    print("[✓] caps held (max_simultaneous, family max_parallel) across all sessions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
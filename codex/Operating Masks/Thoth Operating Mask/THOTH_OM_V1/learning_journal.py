@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Learning journal — append-only JSONL with a small ring index.
+
+- append() writes one line (flush + fsync) and rewrites a tiny index holding the
+  byte offsets of the last `keep_last` entries
+- The journal never holds more than `keep_last` entries: an append past retention
+  rewrites the last keep_last lines (atomic replace), O(keep_last) and independent
+  of how long the journal has been running
+- A crash between the line write and the index write is detected (size mismatch)
+  and the index is rebuilt from the bounded file
+- The markdown view (thread/learning_log.md) is rendered on demand
+
+Usage:
+  python scripts/learning_journal.py render            # write thread/learning_log.md
+  python scripts/learning_journal.py tail -n 5         # print last entries as JSONL
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+JOURNAL = ROOT / "thread" / "learning_log.jsonl"
+MARKDOWN = ROOT / "thread" / "learning_log.md"
+DEFAULT_KEEP = 50
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class LearningJournal:
+    def __init__(self, path: Path = JOURNAL, keep_last: int = DEFAULT_KEEP):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.keep_last = max(1, int(keep_last))
+        self._index = None
+
+    # --- index ---
+    def _load_index(self) -> dict:
+        if self._index is not None:
+            return self._index
+        size = self.path.stat().st_size if self.path.exists() else 0
+        try:
+            idx = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if idx.get("size") == size:
+                self._index = idx
+                if idx["lines"] > self.keep_last:   # retention lowered since it was written
+                    idx["offsets"] = idx["offsets"][-self.keep_last:]
+                    self._compact()
+                return self._index
+        except Exception:
+            pass
+        return self._rebuild_index(size)
+
+    def _rebuild_index(self, size: int) -> dict:
+        offsets = []
+        good_end = 0
+        if self.path.exists():
+            off = 0
+            with self.path.open("rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        offsets.append(off)
+                        good_end = off + len(line)
+                    off += len(line)
+            if good_end != off:
+                # torn trailing line from a crash mid-write: drop it
+                with self.path.open("rb+") as f:
+                    f.truncate(good_end)
+        self._index = {"size": good_end, "lines": len(offsets), "offsets": offsets[-self.keep_last:]}
+        if self._index["lines"] > self.keep_last:
+            self._compact()          # written by an older, looser retention
+        else:
+            self._save_index()
+        return self._index
+
+    def _save_index(self) -> None:
+        _write_atomic(self.index_path, json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+
+    # --- public ---
+    def append(self, entry: dict) -> None:
+        idx = self._load_index()
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            off = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        idx["offsets"] = (idx["offsets"] + [off])[-self.keep_last:]
+        idx["lines"] += 1
+        idx["size"] = off + len(line)
+        if idx["lines"] > self.keep_last:
+            self._compact()
+        else:
+            self._save_index()
+
+    def _compact(self) -> None:
+        idx = self._index
+        first = idx["offsets"][0] if idx["offsets"] else idx["size"]
+        with self.path.open("rb") as f:
+            f.seek(first)
+            tail = f.read()
+        _write_atomic(self.path, tail)
+        self._index = {"size": len(tail), "lines": len(idx["offsets"]),
+                       "offsets": [o - first for o in idx["offsets"]]}
+        self._save_index()
+
+    def entries(self, n: int | None = None) -> list[dict]:
+        """Last `n` (default keep_last) entries, oldest first."""
+        idx = self._load_index()
+        offs = idx["offsets"][-n:] if n else idx["offsets"]
+        if not offs:
+            return []
+        out = []
+        with self.path.open("rb") as f:
+            f.seek(offs[0])
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+        return out[-len(offs):]
+
+    def render_markdown(self) -> str:
+        return "".join(format_entry(e) + "\n" for e in self.entries())
+
+    def write_markdown(self, path: Path = MARKDOWN) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, self.render_markdown().encode("utf-8"))
+        return path
+
+def format_entry(e: dict) -> str:
+    def fmt(x): return "None" if x is None else f"{x:.3f}"
+    windows = e.get("windows") or {}
+    per_window = ",".join(f"{w}:{v.get('verdict') if isinstance(v, dict) else v}" for w, v in windows.items())
+    head = f"- {e.get('ts')} verdict={e.get('verdict')}"
+    if per_window:
+        head += f" [{per_window}]"
+    return (f"{head} samples={int(e.get('samples') or 0)} coh={fmt(e.get('coherence_avg'))} "
+            f"mir={fmt(e.get('mirror_residual_avg'))} proposals={e.get('proposals', 0)} "
+            f"patch={e.get('patch')} applied={e.get('applied')}")
+
+def journal_from_policy(sl: dict | None, root: Path = ROOT) -> LearningJournal:
+    keep = ((sl or {}).get("logging") or {}).get("keep_last", DEFAULT_KEEP)
+    return LearningJournal(root / "thread" / "learning_log.jsonl", keep)
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="learning_journal.py", description="Learning journal views")
+    ap.add_argument("--keep-last", type=int, default=None, help="Override logging.keep_last")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    rp = sp.add_parser("render", help="Render the markdown view")
+    rp.add_argument("--out", default=str(MARKDOWN))
+    tp = sp.add_parser("tail", help="Print the last entries as JSONL")
+    tp.add_argument("-n", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    keep = args.keep_last
+    if keep is None:
+        try:
+            import yaml
+            sl = yaml.safe_load((ROOT / "runtime" / "self_learning.yaml").read_text(encoding="utf-8"))
+            keep = ((sl or {}).get("logging") or {}).get("keep_last", DEFAULT_KEEP)
+        except Exception:
+            keep = DEFAULT_KEEP
+    j = LearningJournal(JOURNAL, keep)
+    if args.cmd == "render":
+        print(f"[✓] Rendered {j.write_markdown(Path(args.out))}")
+    else:
+        for e in j.entries(args.n):
+            print(json.dumps(e, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,11 +1,13 @@
 # engine/mask_runtime.py — unified
 # - Telemetry logging (finish_turn)
-# - Lunar Nudge Hook (compute/apply)
+# - Lunar Nudge Hook (compute/apply; per-phase threshold variants cached per version/profile/caps)
 # - Threshold adjust helper + simple CLI
+# - Self-learning status (last verdict from the evaluator / --serve scheduler)
 
 from __future__ import annotations
 from pathlib import Path
 import os, sys, json, datetime as dt
+from types import MappingProxyType
 
 ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
 if str(ROOT) not in sys.path:
@@ -16,7 +18,9 @@ try:
     from self_learning_evaluator import log_telemetry
 except Exception:
     # Fallback: write minimal telemetry if evaluator isn't importable
-    def log_telemetry(coherence: float, mirror_residual: float, samples: int = 1):
+    def log_telemetry(coherence: float, mirror_residual: float, samples: int = 1,
+                      thread: str | None = None, profile: str | None = None,
+                      coherence_hash: str | None = None):
         rec = {
             "timestamp": dt.datetime.utcnow().isoformat()+"Z",
             "coherence": coherence,
@@ -24,14 +28,53 @@ except Exception:
             "samples": samples,
             "source": "mask_runtime_fallback"
         }
+        if thread:
+            rec["thread"] = thread
+        if profile:
+            rec["profile"] = profile
+        if coherence_hash:
+            rec["coherence_hash"] = coherence_hash
         tp = ROOT/"thread"/"telemetry.jsonl"
         tp.parent.mkdir(parents=True, exist_ok=True)
         with open(tp, "a", encoding="utf-8") as f:
             f.write(json.dumps(rec)+"\n")
 
-def finish_turn(coherence: float, mirror_residual: float, samples: int = 1):
-    \"\"\"Call this at the end of a turn to log telemetry.\"\"\"
-    log_telemetry(coherence, mirror_residual, samples)
+# --- Online self-learning (optional; online.enabled in self_learning.yaml) ---
+try:
+    from self_learning_online import observe as online_observe
+except Exception:
+    online_observe = None
+
+# --- Coherence drift detection -> overlay rules (coherence_drop) ---
+try:
+    from change_points import observe as drift_observe
+    from overlays import resolve as resolve_overlays
+except Exception:
+    drift_observe = resolve_overlays = None
+
+def finish_turn(coherence: float, mirror_residual: float, samples: int = 1,
+                thread: str | None = None, profile: str | None = None,
+                coherence_hash: str | None = None):
+    """Call this at the end of a turn to log telemetry (tagged by thread / threshold profile,
+    and the turn's coherence_hash when known), feed the online learner and the drift
+    detectors. Returns {"adjustments": [...], "events": [...], "overlays": plan | None}."""
+    log_telemetry(coherence, mirror_residual, samples, thread=thread, profile=profile,
+                  coherence_hash=coherence_hash)
+    out = {"adjustments": [], "events": [], "overlays": None}
+    if online_observe is not None:
+        try:
+            out["adjustments"] = online_observe(coherence, mirror_residual, samples, profile=profile)
+        except Exception:
+            pass  # learning must never break a turn
+    if drift_observe is not None:
+        try:
+            ev = drift_observe(coherence, thread)
+            if ev:
+                out["events"].append(ev)
+                out["overlays"] = resolve_overlays([ev["event"]])
+        except Exception:
+            pass
+    return out
 
 # --- Lunar Nudge Hook (optional) ---
 def _load_yaml(path):
@@ -46,32 +89,83 @@ def _load_yaml(path):
         except Exception:
             return {}
 
-def compute_lunar_nudges(project_root):
-    from pathlib import Path
+# Lunar policy cache: lunar_nudge.yaml is re-parsed only when its stat changes; the
+# lunar_nudge event is logged only when the phase bin or caps change, plus a heartbeat.
+_LUNAR = {}   # project_root -> {"stamp", "cfg", "cal", "caps", "logged", "logged_at"}
+_LUNAR_MOD = None
+
+def _lunar_module():
+    global _LUNAR_MOD
+    if _LUNAR_MOD is None:
+        try:
+            from . import lunar_nudge as mod
+        except Exception:
+            import lunar_nudge as mod
+        _LUNAR_MOD = mod
+    return _LUNAR_MOD
+
+def _seconds(v, default: float) -> float:
+    """'6h' | '30m' | '1d' | bare seconds."""
+    if v is None:
+        return default
+    s = str(v).strip().lower()
+    mult = {"s": 1, "m": 60, "h": 3600, "d": 86400}.get(s[-1:], None)
+    try:
+        return float(s[:-1]) * mult if mult else float(s)
+    except ValueError:
+        return default
+
+def _lunar_policy(project_root):
     cfg_path = Path(project_root)/"runtime"/"lunar_nudge.yaml"
-    if not cfg_path.exists():
+    try:
+        st = cfg_path.stat()
+    except OSError:
+        _LUNAR.pop(str(project_root), None)
         return None
-    cfg = _load_yaml(cfg_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    pol = _LUNAR.get(str(project_root))
+    if pol is None or pol["stamp"] != stamp:
+        calendar = _lunar_module().calendar
+        cfg = _load_yaml(cfg_path)
+        caps = cfg.get("caps", {"min":0.85,"max":1.15}) if cfg else {}
+        span = (cfg or {}).get("calendar") or {}
+        prev = pol or {}
+        pol = {"stamp": stamp, "cfg": cfg,
+               "caps": (float(caps.get("min",0.85)), float(caps.get("max",1.15))),
+               "cal": calendar(int(span.get("start", 1990)), int(span.get("end", 2100))),
+               "heartbeat_s": _seconds((cfg or {}).get("heartbeat"), 6 * 3600),
+               "logged": prev.get("logged"), "logged_at": prev.get("logged_at", 0.0)}
+        _LUNAR[str(project_root)] = pol
+    return pol
+
+def compute_lunar_nudges(project_root):
+    pol = _lunar_policy(project_root)
+    if pol is None:
+        return None
+    cfg = pol["cfg"]
     if not cfg or not cfg.get("enabled", False):
         return None
-    try:
-        from .lunar_nudge import phase_fraction, phase_name, compute_nudges
-    except Exception:
-        from lunar_nudge import phase_fraction, phase_name, compute_nudges
-    frac = phase_fraction()
-    n = compute_nudges(frac)
-    caps = cfg.get("caps", {"min":0.85,"max":1.15})
-    mn, mx = float(caps.get("min",0.85)), float(caps.get("max",1.15))
-    n = {k: max(mn, min(mx, float(v))) for k,v in n.items()}
-    # Optional logging toggle
+    ln = _lunar_module()
+    now = dt.datetime.now(dt.timezone.utc)
+    frac = ln.phase_fraction(now)
+    idx = ln.phase_bin(now, pol["cal"])
+    mn, mx = pol["caps"]
     payload = {"enabled": True, "mode": cfg.get("mode","on_input"),
-               "phase_fraction": frac, "phase_name": phase_name(frac), "nudges": n}
+               "phase_fraction": frac, "phase_name": ln.PHASE_NAMES[idx],
+               "nudges": dict(ln.nudge_tables(pol["caps"])[idx]),
+               "phase_index": idx, "caps": [mn, mx]}
+    # Optional logging toggle: only on phase-bin / caps change, plus a heartbeat
     if cfg.get("log", True):
-        tp = Path(project_root)/"thread"/"telemetry.jsonl"
-        tp.parent.mkdir(parents=True, exist_ok=True)
-        with open(tp, "a", encoding="utf-8") as f:
-            f.write(json.dumps({"timestamp": dt.datetime.utcnow().isoformat()+"Z",
-                                "event": "lunar_nudge", **payload}) + "\n")
+        state = (idx, mn, mx)
+        t = now.timestamp()
+        reason = "change" if state != pol["logged"] else ("heartbeat" if t - pol["logged_at"] >= pol["heartbeat_s"] else None)
+        if reason:
+            tp = Path(project_root)/"thread"/"telemetry.jsonl"
+            tp.parent.mkdir(parents=True, exist_ok=True)
+            with open(tp, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"timestamp": dt.datetime.utcnow().isoformat()+"Z",
+                                    "event": "lunar_nudge", "reason": reason, **payload}) + "\n")
+            pol["logged"], pol["logged_at"] = state, t
     return payload
 
 def apply_lunar_nudges(thresholds: dict, nudges: dict) -> dict:
@@ -86,6 +180,10 @@ def apply_lunar_nudges(thresholds: dict, nudges: dict) -> dict:
         except Exception:
             pass
         return val
+    # thresholds_1.1.yaml nests everything under `thresholds:`
+    if isinstance(t.get("thresholds"), dict):
+        t["thresholds"] = apply_lunar_nudges(t["thresholds"], nudges)
+        return t
     # Meta-gate coherence
     if "meta_gate" in t and "coherence" in t["meta_gate"]:
         c = t["meta_gate"]["coherence"]
@@ -105,31 +203,171 @@ def apply_lunar_nudges(thresholds: dict, nudges: dict) -> dict:
             g["call_harmonizers_below"] = g["call_harmonizers_below"] / max(0.5, bias)
     return t
 
-def adjust_thresholds_with_lunar(thresholds: dict, project_root: str | Path = ROOT) -> dict:
+# --- Per-phase threshold variants ---
+# Only 8 phase bins exist, so per (thresholds version, profile, caps) there are at most
+# 8 adjusted threshold sets: build them once, then every turn is a lookup. Variants are
+# shared, so they are frozen (MappingProxyType / tuples); thaw() gives a mutable copy.
+_THRESHOLDS = {}   # path -> (data, version)
+_VARIANTS = {}     # (version, profile, caps) -> tuple of 8 frozen variants
+_VARIANTS_MAX = 32
+_PASSED = {}       # id(dict) -> dict, for passed thresholds without a version
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+def thaw(obj):
+    """Mutable (dict/list) deep copy of a frozen variant."""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+def load_thresholds(project_root: str | Path = ROOT):
+    """(thresholds, version) for thresholds_1.1.yaml; re-read (and variants dropped) only
+    when the file changes on disk."""
+    p = Path(project_root)/"thresholds_1.1.yaml"
+    st = p.stat()
+    version = (str(p), st.st_mtime_ns, st.st_size)
+    cached = _THRESHOLDS.get(str(p))
+    if cached and cached[1] == version:
+        return cached
+    if cached:
+        invalidate_threshold_variants(cached[1])
+    _THRESHOLDS[str(p)] = (_load_yaml(p), version)
+    return _THRESHOLDS[str(p)]
+
+def invalidate_threshold_variants(version=None) -> None:
+    """Drop cached variants of one thresholds version (or all)."""
+    if version is None:
+        _VARIANTS.clear()
+        _THRESHOLDS.clear()
+        _PASSED.clear()
+        return
+    for k in [k for k in _VARIANTS if k[0] == version]:
+        del _VARIANTS[k]
+
+def _with_profile(thresholds: dict, profile: str | None) -> dict:
+    import copy
+    t = copy.deepcopy(thresholds)
+    root = t.get("thresholds", t) if isinstance(t.get("thresholds"), dict) else t
+    prof = (((root.get("gates") or {}).get("profiles") or {}).get(profile)) if profile else None
+    if isinstance(prof, dict):
+        root.setdefault("gates", {}).setdefault("triggers", {}).update(prof)
+    return t
+
+def threshold_variants(thresholds: dict, version, profile: str | None = None,
+                       caps: tuple[float, float] | None = None) -> tuple:
+    """The 8 lunar-adjusted, frozen variants (PHASE_NAMES order) of `thresholds` with
+    `profile` folded into gates.triggers; built once per (version, profile, caps)."""
+    key = (version, profile, tuple(caps) if caps else None)
+    hit = _VARIANTS.get(key)
+    if hit is not None:
+        return hit
+    base = _with_profile(thresholds, profile)
+    hit = tuple(_freeze(apply_lunar_nudges(base, {"nudges": n})) for n in _lunar_module().nudge_tables(key[2]))
+    if len(_VARIANTS) >= _VARIANTS_MAX:
+        del _VARIANTS[next(iter(_VARIANTS))]
+    _VARIANTS[key] = hit
+    return hit
+
+def _version_of(thresholds: dict) -> tuple:
+    """Identity version for a passed dict: nothing is serialized or hashed per turn. The
+    dict is kept alive so its id cannot be reused; after mutating it, pass a new
+    `version` or call invalidate_threshold_variants()."""
+    key = id(thresholds)
+    if key not in _PASSED:
+        if len(_PASSED) >= _VARIANTS_MAX:
+            old = next(iter(_PASSED))
+            del _PASSED[old]
+            invalidate_threshold_variants(("id", old))
+        _PASSED[key] = thresholds
+    return ("id", key)
+
+def _unadjusted(thresholds: dict, version):
+    key = (version, "unadjusted")
+    hit = _VARIANTS.get(key)
+    if hit is None:
+        if len(_VARIANTS) >= _VARIANTS_MAX:
+            del _VARIANTS[next(iter(_VARIANTS))]
+        hit = _VARIANTS[key] = _freeze(thresholds)
+    return hit
+
+def adjust_thresholds_with_lunar(thresholds: dict | None = None, project_root: str | Path = ROOT,
+                                 profile: str | None = None, version=None):
+    """Lunar-adjusted thresholds for the current phase bin — a cached, read-only variant
+    (use thaw() for a mutable copy). thresholds=None uses thresholds_1.1.yaml (reloaded on
+    change, versioned by its stat); a passed dict is versioned by identity unless
+    `version` is given."""
     ln = compute_lunar_nudges(project_root)
-    if not ln: return thresholds
-    mode = ln.get("mode","on_input")
+    if thresholds is None:
+        thresholds, version = load_thresholds(project_root)
+    elif version is None:
+        version = _version_of(thresholds)
+    if not ln:
+        return _unadjusted(thresholds, version)
     # Currently same behavior for on_input/per_gate; caller decides frequency
-    return apply_lunar_nudges(thresholds, ln)
+    return threshold_variants(thresholds, version, profile, tuple(ln["caps"]))[ln["phase_index"]]
+
+def threshold_view(project_root: str | Path = ROOT, profile: str | None = None, thread: str | None = None,
+                   personas=(), overrides: dict | None = None):
+    """Layered, copy-on-write thresholds for one turn (profile, thread overrides, lunar,
+    persona lenses, per-request overrides) as a read-only dotted-key view; see
+    threshold_layers.py. view.with_overrides({...}) costs O(overridden keys)."""
+    from threshold_layers import effective_view
+    return effective_view(project_root, profile, thread, personas, overrides)
+
+def learning_status(project_root: str | Path = ROOT) -> dict:
+    """Last self-learning evaluation as published to thread/self_learning.status.json."""
+    sp = Path(project_root)/"thread"/"self_learning.status.json"
+    try:
+        st = json.loads(sp.read_text(encoding="utf-8"))
+    except Exception:
+        return {"available": False}
+    if st.get("mode") == "serve":
+        try:
+            os.kill(int(st.get("pid")), 0)
+            st["running"] = True
+        except Exception:
+            st["running"] = False
+    return {"available": True, **st}
 
 if __name__ == "__main__":
-    import argparse, json, sys
+    import argparse
     ap = argparse.ArgumentParser(description="Mask runtime utils")
     ap.add_argument("--log-turn", nargs=2, metavar=("COH","MIR"), help="log a telemetry turn")
     ap.add_argument("--samples", type=int, default=1)
+    ap.add_argument("--thread", help="thread id to tag the logged turn with")
+    ap.add_argument("--profile", help="threshold profile to tag the logged turn with")
     ap.add_argument("--show-lunar", action="store_true", help="print current lunar nudges")
+    ap.add_argument("--status", action="store_true", help="print the last self-learning verdict")
     ap.add_argument("--adjust-thresholds", metavar="PATH", help="load thresholds (json/yaml) and print adjusted json")
     args = ap.parse_args()
 
     if args.log_turn:
         coh, mir = map(float, args.log_turn)
-        finish_turn(coh, mir, args.samples)
+        res = finish_turn(coh, mir, args.samples, thread=args.thread, profile=args.profile)
         print(f"[+] Logged turn: coh={coh} mir={mir} samples={args.samples} -> {ROOT/'thread'/'telemetry.jsonl'}")
+        for ev in res["events"]:
+            print(f"[!] {ev['event']} ({ev['detector']}): {ev['baseline']} -> {ev['value']}; overlays: {res['overlays']}")
 
     if args.show_lunar:
         ln = compute_lunar_nudges(ROOT)
         print(json.dumps(ln or {"enabled": False}, indent=2))
 
+    if args.status:
+        st = learning_status(ROOT)
+        last = st.get("last") or {}
+        if st.get("available"):
+            print(f"[i] self-learning: {last.get('verdict')} at {last.get('ts')} "
+                  f"(samples={last.get('samples')}, proposals={last.get('proposals')}, applied={last.get('applied')}); "
+                  f"mode={st.get('mode')}" + (f" running={st.get('running')} next_due={st.get('next_due')}" if st.get("mode") == "serve" else ""))
+        print(json.dumps(st, indent=2))
+
     if args.adjust_thresholds:
         p = Path(args.adjust_thresholds)
         if not p.exists():
@@ -142,4 +380,4 @@ if __name__ == "__main__":
         except Exception:
             data = json.loads(p.read_text())
         adj = adjust_thresholds_with_lunar(data, ROOT)
-        print(json.dumps(adj, indent=2))
+        print(json.dumps(thaw(adj), indent=2))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Metatron router — the Meta-Gate routing algorithm of metatron_function.yaml.
+
+- tag-affinity (routing_rules[].description, "setup/objective → G1,G2" lines) is
+  compiled once into a tag × gate weight matrix; the engine's nodes
+  (Thoth_engine_1.0.yaml nodes.list[].metagate_routing_hint) into a node × gate
+  matrix of affinity weights plus a priority vector
+- score(node, gate) = priority / 100 + affinity weight, for every gate the node's tags
+  map to; gate totals are one matrix-vector product over all nodes
+- coherence-bump: bff coherence below thresholds nodes.bff.coherence_min adds +0.15
+  to G3 and G5
+- gate_order: total score desc, ties by gate id (G2 before G10); routing_log carries
+  node_hints (priority-sorted), gate_scores, coherence_bump_applied, final_order
+- affinity_weight (metagate.affinity_weight, scalar or {tag: w}) defaults to 1.0;
+  it is not specified by the YAML
+
+Usage:
+  python scripts/metatron_router.py route
+  python scripts/metatron_router.py route --coherence 0.61 --hints hints.json   # [{id, priority, tags}]
+  python scripts/metatron_router.py bench -n 10000
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING
+import os, re, sys, json
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+SPEC = ROOT / "engine" / "metatron_function.yaml"
+ENGINE = ROOT / "engine" / "Thoth_engine_1.0.yaml"
+BUMP = 0.15
+BUMP_GATES = ("G3", "G5")
+DEFAULT_COHERENCE_MIN = 0.72
+_ARROW = re.compile(r"^\s*([^→:]+?)\s*(?:→|->)\s*(.+?)\s*$")
+
+class RouterError(Exception):
+    pass
+
+def _gate_key(g: str) -> tuple:
+    """G2 before G10: numeric suffixes compare as numbers."""
+    m = re.fullmatch(r"(\D*)(\d+)", g)
+    return (m.group(1), int(m.group(2))) if m else (g, -1)
+
+def parse_affinity(text: str) -> dict[str, list[str]]:
+    """'setup/objective → G1,G2' lines -> {tag: [gate, ...]}."""
+    out: dict[str, list[str]] = {}
+    for line in (text or "").splitlines():
+        m = _ARROW.match(line)
+        if not m:
+            continue
+        gates = [g.strip() for g in m.group(2).split(",") if g.strip()]
+        for tag in m.group(1).split("/"):
+            out.setdefault(tag.strip(), [])
+            out[tag.strip()] += [g for g in gates if g not in out[tag.strip()]]
+    return out
+
+def node_hints(engine: dict) -> list[dict]:
+    """Enabled nodes' metagate_routing_hint as [{id, priority, tags}]."""
+    nodes = engine.get("nodes") or {}
+    key = ((nodes.get("contracts") or {}).get("metagate_hint_key")) or "metagate_routing_hint"
+    enabled = (nodes.get("defaults") or {}).get("enabled", True)
+    out = []
+    for n in nodes.get("list") or []:
+        hint = n.get(key) if isinstance(n, dict) else None
+        if not hint or not n.get("enabled", enabled):
+            continue
+        out.append({"id": n.get("id"), "priority": hint.get("priority", 0), "tags": list(hint.get("tags") or [])})
+    return out
+
+class MetaGateRouter:
+    def __init__(self, spec: dict, nodes: list[dict] | None = None):
+        import numpy as np
+        mg = spec.get("metagate", spec)
+        self.gates = [g["id"] for g in mg.get("gates") or []]
+        if not self.gates:
+            raise RouterError("metagate.gates is empty")
+        self.gate_ix = {g: i for i, g in enumerate(self.gates)}
+        # rank of each gate by id: the secondary key when scores tie
+        by_id = sorted(self.gates, key=_gate_key)
+        self.id_rank = np.array([by_id.index(g) for g in self.gates])
+        rules = {r.get("name"): r for r in mg.get("routing_rules") or []}
+        affinity = parse_affinity((rules.get("tag-affinity") or {}).get("description", ""))
+        unknown = sorted({g for gs in affinity.values() for g in gs} - set(self.gate_ix))
+        if unknown:
+            raise RouterError(f"tag-affinity names unknown gates: {unknown}")
+        w = mg.get("affinity_weight", 1.0)
+        self.tags = sorted(affinity)
+        self.tag_ix = {t: i for i, t in enumerate(self.tags)}
+        # tag × gate affinity weights (0 = no affinity)
+        self.A = np.zeros((len(self.tags), len(self.gates)))
+        for t, gs in affinity.items():
+            tw = float(w.get(t, 1.0)) if isinstance(w, dict) else float(w)
+            for g in gs:
+                self.A[self.tag_ix[t], self.gate_ix[g]] = tw
+        self.bump = np.zeros(len(self.gates))
+        for g in BUMP_GATES:
+            if g in self.gate_ix:
+                self.bump[self.gate_ix[g]] = BUMP
+        self._rows: dict[frozenset, object] = {}
+        self.static = self.compile_nodes(nodes) if nodes is not None else None
+
+    def _row(self, tags) -> np.ndarray:
+        """Affinity weight per gate for one node's tag set (max over its tags)."""
+        key = frozenset(tags)
+        row = self._rows.get(key)
+        if row is None:
+            import numpy as np
+            ix = [self.tag_ix[t] for t in key if t in self.tag_ix]
+            row = self.A[ix].max(axis=0) if ix else np.zeros(len(self.gates))
+            row.flags.writeable = False
+            self._rows[key] = row
+        return row
+
+    def compile_nodes(self, hints: list[dict]) -> dict:
+        """node × gate weights W, candidate mask M, priorities p and the priority-sorted log rows."""
+        import numpy as np
+        hints = sorted(hints, key=lambda h: (-float(h.get("priority", 0)), str(h.get("id"))))
+        W = np.array([self._row(h.get("tags") or ()) for h in hints]).reshape(len(hints), len(self.gates))
+        M = (W > 0).astype(float)
+        p = np.array([float(h.get("priority", 0)) / 100.0 for h in hints])
+        log = [{"id": h.get("id"), "priority": h.get("priority"), "tags": list(h.get("tags") or ()),
+                "gates": [self.gates[j] for j in np.flatnonzero(M[i])]} for i, h in enumerate(hints)]
+        # Σ_nodes M·(p/100 + W) = p @ M + Σ_nodes W
+        return {"M": M, "p": p, "w_sum": W.sum(axis=0), "log": log}
+
+    def route(self, hints: list[dict] | None = None, coherence: float | None = None,
+              coherence_min: float = DEFAULT_COHERENCE_MIN) -> dict:
+        """{"gate_order": [...], "routing_log": {...}} for this turn."""
+        import numpy as np
+        c = self.static if hints is None else self.compile_nodes(hints)
+        if c is None:
+            raise RouterError("no node hints (router built without nodes)")
+        scores = c["p"] @ c["M"] + c["w_sum"] if len(c["p"]) else np.zeros(len(self.gates))
+        bump = coherence is not None and coherence < coherence_min
+        if bump:
+            scores = scores + self.bump
+        scores = np.round(scores, 9)  # float noise must not break ties
+        order = [self.gates[i] for i in np.lexsort((self.id_rank, -scores))]
+        return {"gate_order": order,
+                "routing_log": {"node_hints": c["log"],
+                                "gate_scores": {g: float(s) for g, s in zip(self.gates, scores)},
+                                "coherence_bump_applied": bump,
+                                "final_order": order}}
+
+# --- runtime hook: one compiled router, rebuilt when its YAML changes ---
+_ROUTER = None
+_ROUTER_STAMP = None
+
+def _stamp(*paths: Path):
+    out = []
+    for p in paths:
+        try:
+            st = p.stat()
+            out.append((str(p), st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+def _load_yaml(path: Path) -> dict:
+    import yaml
+    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+
+def get_router(spec: Path = SPEC, engine: Path = ENGINE) -> MetaGateRouter:
+    global _ROUTER, _ROUTER_STAMP
+    stamp = _stamp(spec, engine)
+    if _ROUTER is None or stamp != _ROUTER_STAMP:
+        nodes = node_hints(_load_yaml(engine)) if engine.exists() else []
+        _ROUTER = MetaGateRouter(_load_yaml(spec), nodes)
+        _ROUTER_STAMP = stamp
+    return _ROUTER
+
+def coherence_min(thresholds=None) -> float:
+    """thresholds nodes.bff.coherence_min from a threshold view / dict (default 0.72)."""
+    if thresholds is None:
+        return DEFAULT_COHERENCE_MIN
+    if hasattr(thresholds, "explain"):  # threshold_layers.ThresholdView
+        return float(thresholds.get("nodes.bff.coherence_min", DEFAULT_COHERENCE_MIN))
+    root = thresholds.get("thresholds", thresholds)
+    return float((((root.get("nodes") or {}).get("bff") or {}).get("coherence_min", DEFAULT_COHERENCE_MIN)))
+
+def route(bff_packet: dict | None = None, hints: list[dict] | None = None, thresholds=None) -> dict:
+    """Route one turn: hints=None uses the engine's nodes; the coherence bump reads
+    bff_packet["coherence"] against `thresholds` (view or dict)."""
+    coh = (bff_packet or {}).get("coherence")
+    return get_router().route(hints, coh, coherence_min(thresholds))
+
+def main(argv) -> int:
+    import argparse, time
+    ap = argparse.ArgumentParser(prog="metatron_router.py", description="Meta-Gate router")
+    ap.add_argument("--spec", default=str(SPEC))
+    ap.add_argument("--engine", default=str(ENGINE))
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    rp = sp.add_parser("route", help="Print gate_order and routing_log")
+    rp.add_argument("--coherence", type=float, help="bff_packet.coherence")
+    rp.add_argument("--coherence-min", type=float, default=DEFAULT_COHERENCE_MIN)
+    rp.add_argument("--hints", help="JSON file of [{id, priority, tags}] (default: engine nodes)")
+    bp = sp.add_parser("bench", help="Time route() on the engine nodes")
+    bp.add_argument("-n", type=int, default=10000)
+    args = ap.parse_args(argv)
+
+    try:
+        router = get_router(Path(args.spec), Path(args.engine))
+    except (OSError, RouterError) as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return 2
+    if args.cmd == "route":
+        hints = json.loads(Path(args.hints).read_text(encoding="utf-8")) if args.hints else None
+        print(json.dumps(router.route(hints, args.coherence, args.coherence_min), indent=2))
+        return 0
+    t = time.perf_counter()
+    for i in range(args.n):
+        router.route(None, 0.6 if i % 2 else 0.9)
+    dt_us = (time.perf_counter() - t) / max(1, args.n) * 1e6
+    print(f"[i] route(): {dt_us:.1f} µs/turn over {args.n} turns ({len(router.static['p'])} nodes × {len(router.gates)} gates)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
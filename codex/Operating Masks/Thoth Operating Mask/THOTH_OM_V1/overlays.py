@@ -3,17 +3,20 @@
 # Usage:
 #   python /mnt/data/scripts/overlays.py list
 #   python /mnt/data/scripts/overlays.py run crown_verifier "ship check"
+#   python /mnt/data/scripts/overlays.py resolve coherence_drop
 #
 # Behavior:
 # - Reads /mnt/data/engine/pantheon12.yaml (agents catalog)
 # - Validates the agent id
 # - Appends a telemetry event 'pantheon12.invoke' with agent + message
 # - Prints a small JSON receipt
+# - resolve: maps runtime events (coherence_drop, loop_detected, ...) to the
+#   overlay_policy rules that fire for them
 #
 # Note: This is a controller shim for visibility + logging. The actual
 # overlay effects are handled by your runtime/policy during turns.
 
-import sys, json, argparse, datetime as dt
+import os, sys, json, argparse, datetime as dt
 from pathlib import Path
 
 try:
@@ -21,7 +24,7 @@ try:
 except Exception:
     yaml = None
 
-ROOT = Path("/mnt/data")
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
 TEL  = ROOT / "thread" / "telemetry.jsonl"
 CAT  = ROOT / "engine" / "pantheon12.yaml"
 RUNTIME = ROOT / "runtime" / "runtime.yaml"
@@ -51,6 +54,29 @@ def load_overlay_policy():
     data = yaml.safe_load(RUNTIME.read_text(encoding="utf-8", errors="replace")) or {}
     return data.get("overlay_policy", {})
 
+def resolve(events, policy=None) -> dict:
+    """Overlay plan for a set of runtime events: agents of every matching rule
+    (rule order, de-duplicated, capped at max_agents_per_turn), the first matching
+    rule's resume_at, and the always_post agents."""
+    policy = load_overlay_policy() if policy is None else policy
+    events = set(events)
+    run, resume_at, matched = [], None, []
+    for i, rule in enumerate(policy.get("rules") or []):
+        when = rule.get("when") or []
+        if not events.intersection([when] if isinstance(when, str) else when):
+            continue
+        matched.append(i)
+        if resume_at is None:
+            resume_at = rule.get("resume_at")
+        for agent in rule.get("run") or []:
+            if agent not in run:
+                run.append(agent)
+    cap = policy.get("max_agents_per_turn")
+    if cap is not None:
+        run = run[:int(cap)]
+    return {"events": sorted(events), "rules": matched, "run": run, "resume_at": resume_at,
+            "post": list(policy.get("always_post") or []) if matched else []}
+
 def cmd_list():
     cat = load_catalog()
     agents = [a.get("id") for a in (cat.get("agents") or [])]
@@ -77,12 +103,17 @@ def main(argv):
     runp = sp.add_parser("run", help="Invoke an agent with a message")
     runp.add_argument("agent", help="Agent id (e.g., crown_verifier)")
     runp.add_argument("message", nargs="*", help="Context text")
+    resp = sp.add_parser("resolve", help="Show which overlay rules fire for events")
+    resp.add_argument("events", nargs="+", help="Event names (e.g., coherence_drop)")
     args = ap.parse_args(argv)
 
     if args.cmd == "list":
         return cmd_list()
     if args.cmd == "run":
         return cmd_run(args.agent, " ".join(args.message))
+    if args.cmd == "resolve":
+        print(json.dumps(resolve(args.events), indent=2))
+        return
     ap.print_help()
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Patch log — append-only JSONL of threshold patches with a lookup index.
+
+- One line per evaluator patch in thread/patches.jsonl (flush + fsync); replaces the
+  one-file-per-run thread/patches/<stamp>_thresholds.patch.json
+- Empty patches are not logged; an unapplied patch identical to the previous
+  unapplied one (same proposals digest) is not logged again
+- Index (<log>.idx) maps entry seq -> (ts, offset) plus profile -> seqs and
+  key path -> seqs; it is rebuilt from the log when its size does not match
+- Point-in-time: thresholds at T are reconstructed by rewinding applied changes
+  after T from the current file (or replaying changes up to T onto a base file)
+
+Usage:
+  python scripts/patch_log.py list --since 2025-10-01 --profile strict
+  python scripts/patch_log.py at 2025-10-12T00:00:00Z [--base old_thresholds.yaml] [--out FILE]
+  python scripts/patch_log.py import          # fold legacy thread/patches/*.json into the log
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json, copy, bisect, hashlib
+
+from telemetry_query import parse_time
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+PATCH_LOG = ROOT / "thread" / "patches.jsonl"
+LEGACY_DIR = ROOT / "thread" / "patches"
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def digest(proposals: list[dict]) -> str:
+    raw = json.dumps(proposals, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def key_of(change: dict) -> str:
+    """Index key for a change: its dotted path (without the `thresholds.` root)."""
+    path = change.get("path") or change.get("target") or ""
+    return path[len("thresholds."):] if path.startswith("thresholds.") else path
+
+class PatchLog:
+    def __init__(self, path: Path = PATCH_LOG):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self._index = None
+
+    # --- index ---
+    def _load_index(self) -> dict:
+        if self._index is not None:
+            return self._index
+        size = self.path.stat().st_size if self.path.exists() else 0
+        try:
+            idx = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if idx.get("size") == size:
+                self._index = idx
+                return idx
+        except Exception:
+            pass
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> dict:
+        self._index = {"size": 0, "ts": [], "offsets": [], "by_profile": {}, "by_key": {}, "last_dry": None}
+        if self.path.exists():
+            off = good_end = 0
+            with self.path.open("rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        self._add(json.loads(line), off)
+                    except ValueError:
+                        pass
+                    off += len(line)
+                    good_end = off
+            if good_end != self.path.stat().st_size:
+                # torn trailing line from a crash mid-write: drop it
+                with self.path.open("rb+") as f:
+                    f.truncate(good_end)
+        self._index["size"] = self.path.stat().st_size if self.path.exists() else 0
+        self._save_index()
+        return self._index
+
+    def _add(self, entry: dict, off: int) -> None:
+        idx = self._index
+        seq = len(idx["offsets"])
+        idx["ts"].append(parse_time(entry.get("ts")) or 0.0)
+        idx["offsets"].append(off)
+        for c in entry.get("changes") or []:
+            prof = c.get("profile") or "*"
+            for bucket, k in ((idx["by_profile"], prof), (idx["by_key"], key_of(c))):
+                seqs = bucket.setdefault(k, [])
+                if not seqs or seqs[-1] != seq:
+                    seqs.append(seq)
+        idx["last_dry"] = None if entry.get("applied") else entry.get("digest")
+
+    def _save_index(self) -> None:
+        _write_atomic(self.index_path, json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+
+    # --- public ---
+    def append(self, patch: dict) -> dict | None:
+        """Log an evaluator patch ({meta, proposals, ...}); returns the stored entry,
+        or None when it was empty or repeats the last unapplied patch."""
+        meta = patch.get("meta") or {}
+        changes = [c for c in patch.get("proposals") or []
+                   if "before" not in c or c.get("before") != c.get("after")]
+        if not changes:
+            return None
+        idx = self._load_index()
+        applied = bool(patch.get("applied"))
+        d = digest(changes)
+        if not applied and idx.get("last_dry") == d:
+            return None
+        entry = {
+            "seq": len(idx["offsets"]),
+            "ts": meta.get("ts"),
+            "applied": applied,
+            "verdict": meta.get("verdict"),
+            "samples": meta.get("samples"),
+            "digest": d,
+            "changes": changes,
+        }
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            off = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._add(entry, off)
+        idx["size"] = off + len(line)
+        self._save_index()
+        return entry
+
+    def _read(self, seqs) -> list[dict]:
+        idx = self._load_index()
+        out = []
+        with self.path.open("rb") as f:
+            for s in seqs:
+                f.seek(idx["offsets"][s])
+                out.append(json.loads(f.readline()))
+        return out
+
+    def query(self, since: float | None = None, until: float | None = None, profile: str | None = None,
+              key: str | None = None, applied_only: bool = False) -> list[dict]:
+        """Entries in [since, until] touching `profile` / `key`, oldest first."""
+        idx = self._load_index()
+        if not idx["offsets"]:
+            return []
+        lo = bisect.bisect_left(idx["ts"], since) if since is not None else 0
+        hi = bisect.bisect_right(idx["ts"], until) if until is not None else len(idx["ts"])
+        seqs = range(lo, hi)
+        for bucket, k in ((idx["by_profile"], profile), (idx["by_key"], key)):
+            if k is not None:
+                allowed = set(bucket.get(k, ()))
+                seqs = [s for s in seqs if s in allowed]
+        entries = self._read(seqs)
+        if applied_only:
+            entries = [e for e in entries if e.get("applied")]
+        return entries
+
+    def state_at(self, t: float, current: dict | None = None, base: dict | None = None) -> dict:
+        """Thresholds document as of `t`: rewind applied changes after `t` from
+        `current`, or (with `base`) replay applied changes up to `t` onto it.
+        Thread-override changes are not part of the thresholds file and are skipped."""
+        if base is not None:
+            doc = copy.deepcopy(base)
+            for e in self.query(until=t, applied_only=True):
+                for c in e["changes"]:
+                    _set_path(doc, c.get("path"), c.get("after"))
+            return doc
+        doc = copy.deepcopy(current or {})
+        later = self.query(since=t, applied_only=True)
+        later = [e for e in later if (parse_time(e.get("ts")) or 0.0) > t]
+        for e in reversed(later):
+            for c in reversed(e["changes"]):
+                _set_path(doc, c.get("path"), c.get("before"))
+        return doc
+
+def _set_path(doc: dict, path: str | None, value) -> None:
+    if not path or not path.startswith("thresholds."):
+        return
+    node = doc.get("thresholds", doc)
+    parts = path[len("thresholds."):].split(".")
+    for k in parts[:-1]:
+        node = node.setdefault(k, {})
+    node[parts[-1]] = value
+
+def import_legacy(log: PatchLog, folder: Path = LEGACY_DIR) -> tuple[int, int]:
+    """Fold thread/patches/*_thresholds.patch.json into the log in stamp order;
+    returns (files read, entries logged)."""
+    files = sorted(folder.glob("*_thresholds.patch.json")) if folder.exists() else []
+    logged = 0
+    for p in files:
+        try:
+            patch = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        meta = patch.get("meta") or {}
+        # legacy files record intent (meta.apply); only entries with before/after were applied
+        applied = bool(meta.get("apply")) and any("before" in c for c in patch.get("proposals") or [])
+        if log.append({**patch, "applied": applied}) is not None:
+            logged += 1
+    return len(files), logged
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="patch_log.py", description="Threshold patch log")
+    ap.add_argument("--log", default=str(PATCH_LOG))
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    lp = sp.add_parser("list", help="Print matching entries as JSONL")
+    lp.add_argument("--since"); lp.add_argument("--until")
+    lp.add_argument("--profile"); lp.add_argument("--key", help="e.g. gates.profiles.strict.call_harmonizers_below")
+    lp.add_argument("--applied", action="store_true", help="only applied patches")
+    ap_at = sp.add_parser("at", help="Reconstruct thresholds as of a timestamp")
+    ap_at.add_argument("ts")
+    ap_at.add_argument("--current", default=str(ROOT / "thresholds_1.1.yaml"))
+    ap_at.add_argument("--base", help="replay forward onto this thresholds file instead of rewinding")
+    ap_at.add_argument("--out", help="write YAML here (default: stdout)")
+    ip = sp.add_parser("import", help="Fold legacy thread/patches/*.json into the log")
+    ip.add_argument("--dir", default=str(LEGACY_DIR))
+    args = ap.parse_args(argv)
+
+    log = PatchLog(Path(args.log))
+    if args.cmd == "list":
+        for e in log.query(parse_time(args.since), parse_time(args.until), args.profile, args.key, args.applied):
+            print(json.dumps(e, ensure_ascii=False))
+    elif args.cmd == "at":
+        import yaml
+        t = parse_time(args.ts)
+        if t is None:
+            print(f"[!] bad timestamp {args.ts!r}", file=sys.stderr)
+            return 2
+        if args.base:
+            doc = log.state_at(t, base=yaml.safe_load(Path(args.base).read_text(encoding="utf-8")) or {})
+        else:
+            doc = log.state_at(t, current=yaml.safe_load(Path(args.current).read_text(encoding="utf-8")) or {})
+        text = yaml.safe_dump(doc, sort_keys=False, allow_unicode=True)
+        if args.out:
+            Path(args.out).write_text(text, encoding="utf-8")
+            print(f"[✓] Thresholds as of {args.ts} → {args.out}")
+        else:
+            sys.stdout.write(text)
+    else:
+        read, logged = import_legacy(log, Path(args.dir))
+        print(f"[✓] Imported {logged} entries from {read} patch files (empty/duplicate patches skipped)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
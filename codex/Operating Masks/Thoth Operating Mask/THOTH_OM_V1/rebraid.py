@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Rebraid — incremental re-execution of distorted orbitals (distortions.policy.rebraid).
+
+- After a completed braid, each orbital's distortion (out.distortion, else
+  metrics.distortion, else its residual) is checked against distortions.max_segment;
+  the braid is clean when no orbital exceeds it and the orbital total stays within
+  distortions.max_total
+- Each attempt re-executes only the failing orbital gates and the gates downstream of
+  them whose input packet changed (compared by coherence_hash); every other gate keeps
+  its cached output, so an attempt costs at most len(flow) gate executions
+- A failing gate is called with packet["rebraid"] = {attempt, distortion} (so a gate
+  memo cannot hand back the distorted output) and ctx["rebraid"]; one
+  meta_gate.safety.cooldown_s wait precedes each attempt
+- Re-executions go through the executor's gate step: they re-run on out["repeat"] up
+  to max_gate_iterations, and a gate below early_severance_below severs the session
+- Rebraid budget: total_cap (hard_stop_after_total_gates) bounds the braid itself, so
+  a full braid leaves nothing for re-runs; the rebraid gets its own budget of
+  distortions.policy.rebraid.max_gate_executions gate executions on top (default
+  max_attempts × len(flow), the worst case of max_attempts attempts). The budget
+  running out before an attempt goes straight to the escape / halt decision; running
+  out mid-attempt halts (downstream gates are stale)
+- After max_attempts: backoff_escape drops the single remaining orbital when the total
+  is ≤ allow_if_total_leq and the center coherence ≥ and_center_coherence_ge
+  (allow_single_orbital_skip); otherwise else_action (halt_with_report)
+- Every attempt is logged with its cost (executed / reused gates, ms) in the record
+  and, with a log path, as one line in thread/rebraid.jsonl
+
+Usage:
+  python scripts/rebraid.py demo -n 200 --cooldown 0
+  python scripts/rebraid.py demo -n 200 --cooldown 0 --budget 7
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import NamedTuple
+import os, sys, json, time, asyncio
+
+from braid_hash import BraidHasher, coherence_hash
+from braid_executor import BraidExecutor, _call, _now_iso
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+ORBITALS = ("G2", "G3", "G4", "G5", "G6", "G7")
+
+class Policy(NamedTuple):
+    max_attempts: int = 3
+    max_segment: float = 0.015
+    max_total: float = 0.03
+    escape_total: float = 0.035
+    escape_center: float = 0.93
+    escape_action: str = "allow_single_orbital_skip"
+    else_action: str = "halt_with_report"
+    budget: int | None = None          # gate executions rebraid may add; None = max_attempts × len(flow)
+
+    @classmethod
+    def from_thresholds(cls, thresholds) -> "Policy":
+        """From a threshold_layers view (dotted keys) or a thresholds dict."""
+        if not hasattr(thresholds, "explain"):
+            from threshold_layers import flatten
+            root = thresholds.get("thresholds", thresholds) if isinstance(thresholds.get("thresholds"), dict) else thresholds
+            thresholds = flatten(root)
+        d, p = cls(), "distortions.policy.rebraid."
+        return cls(max_attempts=int(thresholds.get(p + "max_attempts", d.max_attempts)),
+                   max_segment=float(thresholds.get("distortions.max_segment", d.max_segment)),
+                   max_total=float(thresholds.get("distortions.max_total", d.max_total)),
+                   escape_total=float(thresholds.get(p + "backoff_escape.allow_if_total_leq", d.escape_total)),
+                   escape_center=float(thresholds.get(p + "backoff_escape.and_center_coherence_ge", d.escape_center)),
+                   escape_action=str(thresholds.get(p + "backoff_escape.action", d.escape_action)),
+                   else_action=str(thresholds.get(p + "else_action", d.else_action)),
+                   budget=None if thresholds.get(p + "max_gate_executions") is None
+                   else int(thresholds.get(p + "max_gate_executions")))
+
+def distortion_of(out: dict) -> float:
+    if out.get("distortion") is not None:
+        return float(out["distortion"])
+    m = out.get("metrics") or {}
+    if m.get("distortion") is not None:
+        return float(m["distortion"])
+    from bff_engine import residual_of
+    return residual_of(out)
+
+def _clean(out: dict) -> dict:
+    return {k: v for k, v in out.items() if k != "ts"}
+
+class Rebraider:
+    def __init__(self, executor: BraidExecutor, policy: Policy = Policy(), center: str = "G1",
+                 orbitals=ORBITALS, log_path: Path | None = None):
+        self.executor = executor
+        self.policy = policy
+        self.center = center
+        self.orbitals = tuple(orbitals)
+        self.log_path = Path(log_path) if log_path else None
+
+    def assess(self, outputs: dict) -> tuple[dict, list[str], float]:
+        """(distortion per orbital, failing orbitals, orbital total)."""
+        dist = {g: distortion_of(outputs[g]) for g in self.orbitals if g in outputs}
+        failing = [g for g, d in dist.items() if d > self.policy.max_segment]
+        return dist, failing, sum(dist.values())
+
+    def _log(self, session_id: str, entry: dict) -> None:
+        if self.log_path is None:
+            return
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": _now_iso(), "session_id": session_id, **entry}) + "\n")
+
+    async def run(self, packet: dict, order=None, session_id: str | None = None) -> dict:
+        """executor.run() followed by rebraid() when the braid completed."""
+        record = await self.executor.run(packet, order, session_id)
+        if record["status"] == "completed":
+            await self.rebraid(record, packet, order)
+        return record
+
+    async def rebraid(self, record: dict, packet: dict, order=None) -> dict:
+        """Bring a completed record within the distortion policy; updates `record` in
+        place (outputs, executed, coherence_hash, bff, "rebraid") and returns
+        record["rebraid"]."""
+        ex, pol = self.executor, self.policy
+        loop = asyncio.get_running_loop()
+        order = tuple(order or ex.sequence)
+        outputs = record["outputs"]
+        budget = pol.max_attempts * len(order) if pol.budget is None else pol.budget
+        limits = ex.limits._replace(total_cap=record["executed"] + budget)
+        ctx = {"session_id": record["session_id"], "limits": limits, "outputs": outputs,
+               "trace": record["trace"], "executed": record["executed"]}
+        hasher = BraidHasher({g: _clean(o) for g, o in outputs.items()})
+        # input packet of each gate, replayed from the payload chain
+        inputs, inp = {}, packet
+        for g in order:
+            inputs[g] = coherence_hash(inp)
+            out = outputs[g]
+            inp = out["payload"] if isinstance(out.get("payload"), dict) else inp
+        dist, failing, total = self.assess(outputs)
+        attempts, stop = [], None
+        for attempt in range(1, pol.max_attempts + 1):
+            if not failing and total <= pol.max_total:
+                break
+            if ctx["executed"] >= limits.total_cap:
+                stop = "capped"
+                break
+            if ex.limits.cooldown_s > 0:
+                await asyncio.sleep(ex.limits.cooldown_s)
+            # nothing failing but the total is over: every orbital gets another pass
+            dirty = set(failing or dist)
+            t0 = loop.time()
+            ran, reused, inp = [], [], packet
+            for i, g in enumerate(order):
+                h = coherence_hash(inp)
+                if g in dirty or h != inputs[g]:
+                    call_inp = {**inp, "rebraid": {"attempt": attempt, "distortion": dist[g]}} if g in dirty else inp
+                    ctx["rebraid"] = {"attempt": attempt, "gate": g, "distortion": dist.get(g)}
+                    out, status, did_run = await ex._gate(g, call_inp, ctx, hasher, attempt=attempt)
+                    if did_run:
+                        inputs[g] = h
+                        ran.append(g)
+                    if status != "completed":
+                        stop = status
+                        if status == "severed":
+                            record["skipped"] = list(order[i + 1:])
+                        break
+                else:
+                    reused.append(g)
+                out = outputs[g]
+                inp = out["payload"] if isinstance(out.get("payload"), dict) else inp
+            ctx.pop("rebraid", None)
+            dist, failing, total = self.assess(outputs)
+            entry = {"attempt": attempt, "executed": ran, "reused": reused, "cost": len(ran),
+                     "ms": round((loop.time() - t0) * 1000, 3), "failing": failing, "total": round(total, 6)}
+            if stop:
+                entry["stopped"] = stop
+            attempts.append(entry)
+            self._log(record["session_id"], entry)
+            if stop:
+                break
+
+        report = {"status": "clean", "attempts": attempts, "failing": failing,
+                  "distortion": {g: round(d, 6) for g, d in dist.items()}, "total": round(total, 6),
+                  "cost": sum(a["cost"] for a in attempts)}
+        center = (outputs.get(self.center, {}).get("metrics") or {}).get("coherence")
+        if stop == "severed":
+            report.update(status="severed")
+        elif stop == "capped" and attempts and attempts[-1].get("stopped") and attempts[-1]["cost"]:
+            # the budget ran out mid-attempt: gates downstream of the last re-run are stale
+            report.update(status="halted", action=pol.else_action, reason="budget", center_coherence=center)
+        elif failing or total > pol.max_total:
+            if (len(failing) == 1 and total <= pol.escape_total
+                    and center is not None and center >= pol.escape_center):
+                report.update(status="escaped", action=pol.escape_action, skipped_orbital=failing[0])
+            else:
+                report.update(status="halted", action=pol.else_action, center_coherence=center)
+            if stop == "capped":
+                report["reason"] = "budget"
+        record["rebraid"] = report
+        record["executed"] = ctx["executed"]
+        record["coherence_hash"] = hasher.hexdigest()
+        if report["status"] in ("halted", "severed"):
+            record["status"] = report["status"]
+            record["bff"] = None
+        elif attempts:
+            used = {g: o for g, o in outputs.items() if g != report.get("skipped_orbital")}
+            await ex._hooks("before_bff", ctx)
+            record["bff"] = await _call(ex.bff, used, ctx) if ex.bff is not None else None
+        return report
+
+def load_rebraider(root: Path = ROOT, thresholds=None, profile: str | None = None,
+                   log: bool = True, memo=None) -> Rebraider:
+    """Executor + policy from the thresholds view; attempts logged to thread/rebraid.jsonl."""
+    from braid_executor import load_executor
+    if thresholds is None:
+        from mask_runtime import threshold_view
+        thresholds = threshold_view(root, profile)
+    ex = load_executor(root, thresholds, memo=memo)
+    return Rebraider(ex, Policy.from_thresholds(thresholds),
+                     log_path=root / "thread" / "rebraid.jsonl" if log else None)
+
+def main(argv) -> int:
+    import argparse, random
+    ap = argparse.ArgumentParser(prog="rebraid.py", description="Incremental rebraid")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    dp = sp.add_parser("demo", help="Synthetic sessions: rebraid cost vs a full re-run")
+    dp.add_argument("-n", type=int, default=100)
+    dp.add_argument("--profile")
+    dp.add_argument("--cooldown", type=float, help="override meta_gate.safety.cooldown_s")
+    dp.add_argument("--total-cap", type=int, help="override the braid's total gate cap")
+    dp.add_argument("--budget", type=int, help="override the rebraid budget (gate executions on top of the braid)")
+    dp.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    rb = load_rebraider(ROOT, profile=args.profile, log=False, memo=False)   # random gates
+    if args.budget is not None:
+        rb.policy = rb.policy._replace(budget=args.budget)
+    ex = rb.executor
+    if args.cooldown is not None:
+        ex.limits = ex.limits._replace(cooldown_s=args.cooldown)
+    if args.total_cap is not None:
+        ex.limits = ex.limits._replace(total_cap=args.total_cap)
+    rng = random.Random(args.seed)
+
+    def gate(gid):
+        def fn(packet, ctx):
+            # ~15% of orbitals come out distorted; a re-run usually straightens them out
+            d = rng.uniform(0.016, 0.03) if rng.random() < (0.15 if "rebraid" not in packet else 0.3) \
+                else rng.uniform(0.0, 0.003)
+            payload = {k: v for k, v in packet.items() if k != "rebraid"}
+            return {"payload": payload, "residuals": [d], "distortion": d,
+                    "metrics": {"coherence": rng.uniform(0.9, 1.0), "intensity": 0.5, "stability": 0.5}}
+        return fn
+    for g in ex.sequence:
+        ex.register(g, gate(g))
+
+    async def go():
+        return [await rb.run({"i": i}) for i in range(args.n)]
+    t = time.perf_counter()
+    res = asyncio.run(go())
+    wall = time.perf_counter() - t
+    counts, cost, attempts = {}, 0, 0
+    for r in res:
+        s = (r.get("rebraid") or {}).get("status", r["status"])
+        counts[s] = counts.get(s, 0) + 1
+        cost += (r.get("rebraid") or {}).get("cost", 0)
+        attempts += len((r.get("rebraid") or {}).get("attempts", ()))
+    print(json.dumps({"sessions": args.n, "wall_s": round(wall, 3), "status": counts,
+                      "rebraid_attempts": attempts, "rebraid_gate_executions": cost,
+                      "full_rerun_gate_executions": attempts * len(ex.sequence),
+                      "policy": rb.policy._asdict()}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
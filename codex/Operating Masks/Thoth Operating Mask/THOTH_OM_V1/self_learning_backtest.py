@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Self-learning backtest — replay historical telemetry through the evaluator logic.
+
+- Folds telemetry once into the evaluator's 5-minute buckets (per thread/profile)
+- Steps through time (default: one evaluation per schedule.update_interval) and
+  computes every window from the in-memory rollups; nothing is written to disk
+- Simulates the thresholds trajectory per profile with the policy's clamps and
+  max_delta_per_day (thread overrides are not simulated)
+- Reports verdict counts, share of steps sitting on a clamp boundary, and
+  oscillation (direction reversals) per profile/target
+- Candidate policies (--candidate name=overlay.yaml, deep-merged onto
+  self_learning.yaml) are replayed side by side on a process pool
+
+Usage:
+  python scripts/self_learning_backtest.py
+  python scripts/self_learning_backtest.py --since 2025-09-01 --step 6h
+  python scripts/self_learning_backtest.py --candidate tight=cand_tight.yaml --candidate loose=cand_loose.yaml --format json
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json, copy, math, datetime as dt
+
+from self_learning_policy import compile_policy, parse_window, PolicyError, TARGETS
+from self_learning_evaluator import (ingest, bucket_arrays, window_env, merge_buckets, split_key,
+                                     partition_key, update_interval, default_profile, load_yaml,
+                                     BUCKET_S, ALL)
+from telemetry_query import parse_time
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+EPS = 1e-9
+
+def deep_merge(base: dict, over: dict) -> dict:
+    out = dict(base)
+    for k, v in (over or {}).items():
+        out[k] = deep_merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+def fold(tfile: Path, profile: str) -> dict:
+    """All telemetry in `tfile` as {partition_key: buckets} (nothing expires)."""
+    cp = {"offset": 0, "inode": None, "last_ts": None, "retain_s": math.inf,
+          "pending_samples": 0, "partitions": {}}
+    ingest(cp, tfile, 0.0, profile)
+    return cp["partitions"]
+
+def groups_for(sl: dict, parts: dict) -> dict[str, dict]:
+    """Evaluator partitions that move thresholds_1.1.yaml: one per profile when
+    partition.by has 'profile', else the pooled view applied to every profile."""
+    by = set(((sl.get("partition") or {}).get("by")) or [])
+    if "profile" not in by:
+        return {partition_key(ALL, ALL): merge_buckets(parts.values())}
+    grouped: dict[str, list] = {}
+    for pk, b in parts.items():
+        grouped.setdefault(partition_key(ALL, split_key(pk)[1]), []).append(b)
+    return {k: merge_buckets(bs) for k, bs in grouped.items()}
+
+def tracked_targets(policy) -> list[str]:
+    seen = []
+    for adj in policy.adjustments:
+        for op in adj.ops:
+            if op.target not in seen:
+                seen.append(op.target)
+    return seen
+
+def boundaries(policy, target: str) -> set[float]:
+    out = set(policy.clamps.get(target, ()))
+    for adj in policy.adjustments:
+        for op in adj.ops:
+            if op.target == target and op.lo is not None:
+                out.update((op.lo, op.hi))
+    return out
+
+def read_value(root: dict, target: str, profile: str | None):
+    scope, path = TARGETS[target]
+    node = ((root.get("gates") or {}).get("profiles") or {}).get(profile) if scope == "profile" else root
+    for k in path if scope == "global" else path[-1:]:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(k)
+    return node
+
+def series_stats(values: list, bounds: set[float]) -> dict:
+    nums = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if not nums:
+        changes = sum(1 for a, b in zip(values, values[1:]) if a != b)
+        return {"start": values[0] if values else None, "end": values[-1] if values else None,
+                "moves": changes, "reversals": 0, "at_clamp": None}
+    deltas = [b - a for a, b in zip(nums, nums[1:]) if abs(b - a) > EPS]
+    reversals = sum(1 for a, b in zip(deltas, deltas[1:]) if (a > 0) != (b > 0))
+    at = sum(1 for v in nums if any(abs(v - x) <= EPS for x in bounds))
+    return {"start": nums[0], "end": nums[-1], "min": min(nums), "max": max(nums),
+            "moves": len(deltas), "reversals": reversals,
+            "reversal_rate": round(reversals / max(1, len(deltas) - 1), 4),
+            "at_clamp": round(at / len(nums), 4)}
+
+def simulate(name: str, sl: dict, parts: dict, thr: dict, steps: list[float], trajectory: bool = False) -> dict:
+    """Replay `steps` (epoch seconds) for one policy; pure in-memory."""
+    policy = compile_policy(sl)
+    windows = policy.windows
+    reach = max(windows.values())
+    arrays = {k: bucket_arrays(b) for k, b in groups_for(sl, parts).items()}
+    doc = copy.deepcopy(thr)
+    root = doc.get("thresholds", doc)
+    profiles = sorted(((root.get("gates") or {}).get("profiles") or {}))
+    targets = tracked_targets(policy)
+    series = {(p if TARGETS[t][0] == "profile" else ALL, t): [] for t in targets for p in profiles}
+    verdicts = {k: {} for k in arrays}
+    day, spent, applied = None, {}, 0
+    for now_s in steps:
+        d = dt.datetime.utcfromtimestamp(now_s).strftime("%Y-%m-%d")
+        if d != day:
+            day, spent = d, {}
+        for key, (start, S) in arrays.items():
+            i0 = int(start.searchsorted(now_s - reach - BUCKET_S, side="right"))
+            # only buckets that ended by now_s: a bucket starting at now_s is the future
+            i1 = int(start.searchsorted(now_s - BUCKET_S, side="right"))
+            envs = window_env(start[i0:i1], S[i0:i1], now_s, windows)
+            per_window = policy.verdicts(envs)
+            verdict = policy.combine(per_window)
+            verdicts[key][verdict] = verdicts[key].get(verdict, 0) + 1
+            ops = policy.ops(envs, per_window)
+            if ops:
+                _, profile = split_key(key)
+                applied += len(policy.apply(doc, ops, spent, profiles=None if profile == ALL else [profile]))
+        for (p, t), vals in series.items():
+            vals.append(read_value(root, t, None if p == ALL else p))
+    rows = []
+    for (p, t), vals in series.items():
+        row = {"profile": p, "target": t, **series_stats(vals, boundaries(policy, t))}
+        if trajectory:
+            row["trajectory"] = vals
+        rows.append(row)
+    return {"candidate": name, "steps": len(steps), "changes": applied,
+            "verdicts": verdicts, "targets": rows}
+
+# --- process pool: telemetry/thresholds are shipped to each worker once ---
+_SHARED = None
+
+def _init_worker(parts, thr, steps, trajectory):
+    global _SHARED
+    _SHARED = (parts, thr, steps, trajectory)
+
+def _run_candidate(item):
+    name, sl = item
+    parts, thr, steps, trajectory = _SHARED
+    return simulate(name, sl, parts, thr, steps, trajectory)
+
+def run_candidates(candidates: list[tuple[str, dict]], parts: dict, thr: dict, steps: list[float],
+                   trajectory: bool = False, workers: int = 0) -> list[dict]:
+    if len(candidates) == 1 or workers == 1:
+        _init_worker(parts, thr, steps, trajectory)
+        return [_run_candidate(c) for c in candidates]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers or min(len(candidates), os.cpu_count() or 1),
+                             initializer=_init_worker, initargs=(parts, thr, steps, trajectory)) as pool:
+        return list(pool.map(_run_candidate, candidates))
+
+def make_steps(parts: dict, step_s: int, since: float | None, until: float | None) -> list[float]:
+    starts = [int(k) for b in parts.values() for k in b]
+    if not starts:
+        return []
+    lo = since if since is not None else min(starts)
+    hi = until if until is not None else max(starts) + BUCKET_S
+    first = math.ceil(lo / step_s) * step_s  # evaluations land on interval boundaries (UTC)
+    return [float(t) for t in range(int(first), int(hi) + 1, step_s)]
+
+def render_table(results: list[dict]) -> str:
+    def fmt(v):
+        if v is None:
+            return "-"
+        if isinstance(v, float):
+            return f"{v:.4f}"
+        return str(v)
+    lines = []
+    for r in results:
+        lines.append(f"== {r['candidate']}: {r['steps']} steps, {r['changes']} changes")
+        for key, counts in sorted(r["verdicts"].items()):
+            lines.append(f"   {key:<16} " + " ".join(f"{v}={n}" for v, n in sorted(counts.items())))
+        head = ("profile", "target", "start", "end", "min", "max", "moves", "reversals", "at_clamp")
+        rows = [head] + [tuple(fmt(t.get(h)) for h in head) for t in r["targets"]]
+        widths = [max(len(row[i]) for row in rows) for i in range(len(head))]
+        for row in rows:
+            lines.append("   " + "  ".join(c.ljust(w) for c, w in zip(row, widths)))
+    return "\n".join(lines)
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="self_learning_backtest.py", description="Replay telemetry through self-learning policies")
+    ap.add_argument("--file", default=str(ROOT / "thread" / "telemetry.jsonl"))
+    ap.add_argument("--policy", default=str(ROOT / "runtime" / "self_learning.yaml"))
+    ap.add_argument("--thresholds", default=str(ROOT / "thresholds_1.1.yaml"))
+    ap.add_argument("--candidate", action="append", default=[], metavar="NAME=YAML",
+                    help="policy overlay deep-merged onto --policy (repeatable)")
+    ap.add_argument("--no-baseline", action="store_true", help="only replay the candidates")
+    ap.add_argument("--since", help="first evaluation (ISO or epoch); default: start of telemetry")
+    ap.add_argument("--until", help="last evaluation (ISO or epoch); default: end of telemetry")
+    ap.add_argument("--step", help="evaluation interval (default: schedule.update_interval)")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--format", choices=("table", "json"), default="table")
+    ap.add_argument("--trajectory", action="store_true", help="include per-step values (json)")
+    args = ap.parse_args(argv)
+
+    base = load_yaml(Path(args.policy)) or {}
+    candidates = [] if args.no_baseline else [("baseline", base)]
+    for spec in args.candidate:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            name, path = Path(spec).stem, spec
+        candidates.append((name, deep_merge(base, load_yaml(Path(path)) or {})))
+    if not candidates:
+        print("[!] nothing to replay (--no-baseline without --candidate)", file=sys.stderr)
+        return 2
+    try:
+        for name, sl in candidates:
+            compile_policy(sl)
+        step_s = parse_window(args.step) if args.step else update_interval(base)
+    except PolicyError as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return 2
+
+    parts = fold(Path(args.file), default_profile())
+    steps = make_steps(parts, step_s, parse_time(args.since), parse_time(args.until))
+    if not steps:
+        print("[!] no telemetry to replay", file=sys.stderr)
+        return 1
+    thr = load_yaml(Path(args.thresholds)) or {}
+    results = run_candidates(candidates, parts, thr, steps, args.trajectory, args.workers)
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        print(render_table(results))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
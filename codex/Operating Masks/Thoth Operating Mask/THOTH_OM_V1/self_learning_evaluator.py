@@ -2,30 +2,79 @@
 """
 Self-Learning Evaluator (minimal, safe).
 - Reads runtime/self_learning.yaml
-- Loads thread/telemetry.jsonl within window
-- Decides reward/penalty
-- Proposes clamped deltas for thresholds profiles
-- Writes patch file to thread/patches/*.json and appends to thread/learning_log.md
-- Does NOT mutate thresholds unless APPLY=1
+- Folds only new thread/telemetry.jsonl records into a checkpoint of time-bucketed
+  aggregates (thread/self_learning.checkpoint.json); buckets past the window expire
+- Computes every schedule window (1h/6h/24h/7d) in one NumPy pass: sample-weighted
+  means, variance and trend slope per metric
+- Decides reward/penalty per window, then combines them by which window gates which
+  adjustment
+- Compiles the fired `adjustments[].do` statements into patch ops and plans them in
+  one pass (statement clamps ∩ contracts.clamps, max_delta_per_day per UTC day)
+- Appends the patch to the indexed patch log (thread/patches.jsonl; `patch_log.py`)
+  and one entry to the bounded learning journal (thread/learning_log.jsonl;
+  `learning_journal.py render` → .md)
+- Partitions telemetry by thread id and threshold profile (`partition.by`), evaluates
+  partitions on a process pool, and gates each on its own min_samples: profile
+  partitions patch gates.profiles.<name>; thread partitions accumulate per-thread
+  deltas in thread/thread_overrides.json
+- Does NOT mutate thresholds unless APPLY=1; RESCAN=1 ignores the checkpoint
+- `--serve` keeps policy, checkpoint and rollups resident: polls telemetry, evaluates
+  every schedule.update_interval or after schedule.trigger_samples new samples, and
+  publishes the last verdict to thread/self_learning.status.json
+  (`mask_runtime.py --status`)
+
+Usage:
+  python scripts/self_learning_evaluator.py            # one evaluation
+  python scripts/self_learning_evaluator.py --serve    # resident scheduler
 """
-import os, sys, json, time, math, hashlib, datetime as dt
+import os, sys, json, datetime as dt
 from pathlib import Path
+from self_learning_policy import compile_policy, PolicyError, METRICS
+from telemetry_query import record_ts
+from learning_journal import journal_from_policy
+from patch_log import PatchLog
 
 ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
 APPLY = os.environ.get("APPLY", "0") in ("1","true","TRUE","yes","YES")
-NOW = dt.datetime.utcnow()
+RESCAN = os.environ.get("RESCAN", "0") in ("1","true","TRUE","yes","YES")
+CHECKPOINT = ROOT / "thread" / "self_learning.checkpoint.json"
+STATUS = ROOT / "thread" / "self_learning.status.json"
+OVERRIDES = ROOT / "thread" / "thread_overrides.json"
+ONLINE_STATE = ROOT / "thread" / "self_learning.online.json"
+CHECKPOINT_VERSION = 3
+UNASSIGNED = "-"          # records without a thread id
+ALL = "*"
+PARALLEL_MIN = 8          # fewer partitions than this are evaluated inline
+BUCKET_S = 300  # aggregate granularity; window edges are resolved to this
+INTERVALS = {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}
 ISO = lambda t: t.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-def log_telemetry(coherence: float, mirror_residual: float, samples: int = 1) -> None:
-    """Append one JSONL record to thread/telemetry.jsonl (no evaluation, just log)."""
+def utcnow() -> dt.datetime:
+    return dt.datetime.utcnow()
+
+def epoch(t: dt.datetime) -> float:
+    return t.replace(tzinfo=dt.timezone.utc).timestamp()
+
+def log_telemetry(coherence: float, mirror_residual: float, samples: int = 1,
+                  thread: str | None = None, profile: str | None = None,
+                  coherence_hash: str | None = None) -> None:
+    """Append one JSONL record to thread/telemetry.jsonl (no evaluation, just log).
+    `thread` / `profile` tag the record for partitioned evaluation; `coherence_hash`
+    (braid_hash.py) ties it to the braid state that produced it."""
     tfile = ROOT / "thread" / "telemetry.jsonl"
     tfile.parent.mkdir(parents=True, exist_ok=True)
     rec = {
-        "ts": ISO(NOW),
+        "ts": ISO(utcnow()),
         "coherence": float(coherence),
         "mirror_residual": float(mirror_residual),
         "samples": int(samples),
     }
+    if thread:
+        rec["thread"] = str(thread)
+    if profile:
+        rec["profile"] = str(profile)
+    if coherence_hash:
+        rec["coherence_hash"] = str(coherence_hash)
     with tfile.open("a", encoding="utf-8") as f:
         f.write(json.dumps(rec) + "\n")
 
@@ -51,9 +100,9 @@ def append_telemetry_from_env() -> bool:
 
     tfile = ROOT / "thread" / "telemetry.jsonl"
     tfile.parent.mkdir(parents=True, exist_ok=True)
-    rec = {"ts": ISO(NOW), "coherence": coh, "mirror_residual": mir, "samples": samples}
+    rec = {"ts": ISO(utcnow()), "coherence": coh, "mirror_residual": mir, "samples": samples}
     with tfile.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(rec) + "\\n")
+        f.write(json.dumps(rec) + "\n")
     print(f"[+] Appended telemetry: {rec}")
     return True
 
@@ -62,129 +111,512 @@ def load_yaml(path: Path):
     import yaml
     return yaml.safe_load(path.read_text(encoding="utf-8"))
 
-def read_jsonl(path: Path):
-    if not path.exists(): return []
-    rows = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line: continue
-        try: rows.append(json.loads(line))
-        except: pass
-    return rows
-
 def clamp(val, lo, hi): return max(lo, min(hi, val))
 
-def avg(xs): return sum(xs)/len(xs) if xs else None
+# --- Checkpoint (incremental aggregation) ---
+# bucket stats, weights w = samples: [records, samples, coh_w, coh_wx, coh_wxx, mir_w, mir_wx, mir_wxx]
+BUCKET_FIELDS = 8
+def load_checkpoint(path: Path = CHECKPOINT) -> dict:
+    # partitions: {"<thread>|<profile>": {"<bucket_start>": stats}}
+    fresh = {"version": CHECKPOINT_VERSION, "bucket_s": BUCKET_S, "offset": 0, "inode": None,
+             "last_ts": None, "retain_s": 0, "pending_samples": 0, "partitions": {}}
+    if RESCAN or not path.exists():
+        return fresh
+    try:
+        cp = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return fresh
+    if cp.get("version") != CHECKPOINT_VERSION or cp.get("bucket_s") != BUCKET_S:
+        return fresh
+    return cp
 
-def main():
-    # Config
-    sl = load_yaml(ROOT / "runtime" / "self_learning.yaml")
-    window = sl.get("schedule", {}).get("window", "24h")
-    hours = int(str(window).rstrip("h")) if str(window).endswith("h") else 24
-    min_samples = sl.get("metrics", {}).get("min_samples", 20)
+def write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
 
-    # Optionally append one telemetry record from env before evaluating
-    appended = append_telemetry_from_env()
-
-    # Telemetry
-    telem = read_jsonl(ROOT / "thread" / "telemetry.jsonl")
-    tcut = NOW - dt.timedelta(hours=hours)
-    def parse_ts(s):
-        s = s.replace("Z","")
-        return dt.datetime.fromisoformat(s)
-    recent = [r for r in telem if "ts" in r and parse_ts(r["ts"]) >= tcut]
-
-    coh = avg([r.get("coherence") for r in recent if r.get("coherence") is not None])
-    mir = avg([r.get("mirror_residual") for r in recent if r.get("mirror_residual") is not None])
-    n   = sum([r.get("samples",1) for r in recent])
-
-    # Decide
-    reward_expr  = sl.get("signals", {}).get("reward", "coh>=0.88 and mir<=0.35")
-    penalty_expr = sl.get("signals", {}).get("penalty","coh<0.55 or mir>0.50")
-
-    def decision(coh, mir, n):
-        if coh is None or mir is None or n < min_samples:
-            return "insufficient"
-        env = {"coh":coh, "mir":mir}
-        try:
-            if eval(reward_expr, {}, env): return "reward"
-            if eval(penalty_expr,{}, env): return "penalty"
-        except Exception:
-            return "neutral"
-        return "neutral"
+def save_checkpoint(cp: dict, path: Path = CHECKPOINT) -> None:
+    write_atomic(path, json.dumps(cp, separators=(",", ":")))
 
-    verdict = decision(coh, mir, n)
+def partition_key(thread, profile) -> str:
+    return f"{thread}|{profile}"
 
-    # Deltas (proposals) with clamps from policy
-    clamps = sl.get("safety", {}).get("max_delta_per_day", {})
-    c_call  = clamps.get("routing.call_harmonizers_below", 0.04)
-    c_sever = clamps.get("routing.early_severance_below", 0.02)
+def split_key(key: str) -> tuple[str, str]:
+    thread, _, profile = key.partition("|")
+    return thread, profile
 
-    proposals = []
-    if verdict == "reward":
-        proposals.append({"path":"thresholds.gates.profiles.*.call_harmonizers_below", "delta": -min(0.02, c_call)})
-        proposals.append({"path":"thresholds.gates.profiles.*.early_severance_below",  "delta":  min(0.01, c_sever)})
-    elif verdict == "penalty":
-        proposals.append({"path":"thresholds.gates.profiles.*.call_harmonizers_below", "delta":  min(0.02, c_call)})
-        proposals.append({"path":"thresholds.gates.profiles.*.early_severance_below",  "delta": -min(0.01, c_sever)})
+def default_profile(root: Path = ROOT) -> str:
+    """context.threshold_profile from runtime.yaml (records without a profile use it)."""
+    try:
+        rt = load_yaml(root / "runtime" / "runtime.yaml") or {}
+        return str((rt.get("context") or {}).get("threshold_profile") or "default")
+    except Exception:
+        return "default"
+
+def ingest(cp: dict, tfile: Path, now_s: float, profile: str = "default") -> int:
+    """Fold complete lines appended since cp['offset'] into per-(thread, profile)
+    buckets; returns records folded. A rotated/truncated file (inode change or
+    shrink) restarts from zero."""
+    if not tfile.exists():
+        return 0
+    st = tfile.stat()
+    if cp.get("inode") not in (None, st.st_ino) or st.st_size < cp.get("offset", 0):
+        cp.update(offset=0, partitions={}, last_ts=None)
+    cp["inode"] = st.st_ino
+    horizon = now_s - cp["retain_s"]
+    parts = cp["partitions"]
+    folded = 0
+    with tfile.open("rb") as f:
+        f.seek(cp["offset"])
+        off = cp["offset"]
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partial write; pick it up next run
+            off += len(line)
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(r, dict):
+                continue
+            coh, mir = r.get("coherence"), r.get("mirror_residual")
+            if coh is None and mir is None:
+                continue  # events (lunar_nudge, stage, ...) carry no turn metrics
+            t = record_ts(r)
+            if t is None or t < horizon:
+                continue
+            pk = partition_key(r.get("thread") or UNASSIGNED, r.get("profile") or profile)
+            buckets = parts.get(pk)
+            if buckets is None:
+                buckets = parts[pk] = {}
+            key = str(int(t // BUCKET_S) * BUCKET_S)
+            b = buckets.get(key)
+            if b is None:
+                b = buckets[key] = [0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+            w = r.get("samples", 1)
+            b[0] += 1
+            b[1] += w
+            if coh is not None:
+                x = float(coh)
+                b[2] += w; b[3] += w * x; b[4] += w * x * x
+            if mir is not None:
+                x = float(mir)
+                b[5] += w; b[6] += w * x; b[7] += w * x * x
+            folded += 1
+            cp["pending_samples"] = cp.get("pending_samples", 0) + w
+            if cp["last_ts"] is None or t > cp["last_ts"]:
+                cp["last_ts"] = t
+    cp["offset"] = off
+    return folded
+
+def expire(cp: dict, now_s: float) -> int:
+    """Drop buckets (and emptied partitions) that fell out of the retained window;
+    returns buckets dropped."""
+    cut = now_s - cp["retain_s"]
+    dropped = 0
+    for pk in list(cp["partitions"]):
+        buckets = cp["partitions"][pk]
+        old = [k for k in buckets if int(k) + BUCKET_S <= cut]
+        for k in old:
+            del buckets[k]
+        dropped += len(old)
+        if not buckets:
+            del cp["partitions"][pk]
+    return dropped
+
+def merge_buckets(many) -> dict:
+    out = {}
+    for buckets in many:
+        for k, b in buckets.items():
+            cur = out.get(k)
+            if cur is None:
+                out[k] = list(b)
+            else:
+                for i, v in enumerate(b):
+                    cur[i] += v
+    return out
+
+def bucket_arrays(buckets: dict):
+    """(start, S): bucket start times (sorted) and their stats as NumPy arrays."""
+    import numpy as np
+    keys = sorted(buckets, key=int)
+    start = np.fromiter((int(k) for k in keys), dtype=np.float64, count=len(keys))
+    S = np.array([buckets[k] for k in keys], dtype=np.float64).reshape(len(keys), BUCKET_FIELDS)
+    return start, S
+
+def window_table(buckets: dict, now_s: float, windows: dict[str, int]) -> dict[str, dict]:
+    """One vectorized pass over a partition's buckets for every window (see window_env)."""
+    return window_env(*bucket_arrays(buckets), now_s, windows)
+
+def window_env(start, S, now_s: float, windows: dict[str, int]) -> dict[str, dict]:
+    """Every window over bucket arrays in one pass.
+
+    Returns {label: env} with env keys from self_learning_policy.METRICS. Means and
+    variances are sample-weighted; slopes are weighted least squares of bucket means
+    against bucket centre time, in units per hour (None with fewer than 2 buckets)."""
+    import numpy as np
+    labels = list(windows)
+    empty = {k: None for k in METRICS}
+    if not len(start):
+        return {w: {**empty, "samples": 0} for w in labels}
+    span = np.array([windows[w] for w in labels], dtype=np.float64)
+    # M[w, b]: bucket b overlaps window w
+    M = (start + BUCKET_S)[None, :] > (now_s - span)[:, None]
+    Mf = M.astype(np.float64)
+    t = (start + BUCKET_S / 2.0 - now_s) / 3600.0  # hours relative to now (<= 0)
+    out = {w: {"samples": 0} for w in labels}
+    samples = Mf @ S[:, 1]
+    for i, w in enumerate(labels):
+        out[w]["samples"] = float(samples[i])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, c in (("coherence", 2), ("mirror_residual", 5)):
+            W, WX, WXX = S[:, c], S[:, c + 1], S[:, c + 2]
+            mean_b = np.where(W > 0, WX / np.where(W > 0, W, 1.0), 0.0)
+            cols = np.stack([W, WX, WXX, W * t, W * t * t, W * t * mean_b, (W > 0).astype(np.float64)], axis=1)
+            sw, swx, swxx, swt, swtt, swty, nb = (Mf @ cols).T
+            mean = swx / sw
+            var = np.maximum(swxx / sw - mean * mean, 0.0)
+            den = sw * swtt - swt * swt
+            slope = (sw * swty - swt * swx) / den
+            for i, w in enumerate(labels):
+                ok = sw[i] > 0
+                out[w][name] = float(mean[i]) if ok else None
+                out[w][f"{name}_var"] = float(var[i]) if ok else None
+                out[w][f"{name}_slope"] = float(slope[i]) if ok and nb[i] >= 2 and den[i] > 1e-12 else None
+    return out
+
+# --- Partition evaluation (process pool) ---
+_WORKER_POLICY = None
+
+def _init_worker(sl: dict) -> None:
+    global _WORKER_POLICY
+    _WORKER_POLICY = compile_policy(sl)
+
+def _evaluate_partition(item):
+    key, buckets, now_s, windows = item
+    envs = window_table(buckets, now_s, windows)
+    verdicts = _WORKER_POLICY.verdicts(envs)
+    return key, envs, verdicts, _WORKER_POLICY.combine(verdicts)
+
+def evaluate_partitions(sl: dict, policy, items: list, workers: int = 0) -> dict:
+    """{key: (envs, verdicts, verdict)}; items are (key, buckets, now_s, windows).
+    Small batches run inline; larger ones fan out over a process pool whose
+    workers compile the policy once."""
+    global _WORKER_POLICY
+    if len(items) < PARALLEL_MIN or workers == 1:
+        _WORKER_POLICY = policy
+        results = map(_evaluate_partition, items)
     else:
-        proposals = []
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers or None, initializer=_init_worker, initargs=(sl,))
+        with pool:
+            results = list(pool.map(_evaluate_partition, items, chunksize=max(1, len(items) // (4 * (workers or os.cpu_count() or 1)))))
+    return {key: (envs, verdicts, verdict) for key, envs, verdicts, verdict in results}
+
+def online_spent(day: str, path: Path = ONLINE_STATE) -> dict:
+    """Today's max_delta_per_day spend by online micro-adjustments (self_learning_online)."""
+    try:
+        st = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return dict(st.get("spent") or {}) if st.get("day") == day else {}
+
+def load_overrides(path: Path = OVERRIDES) -> dict:
+    """{thread: {profile: {key: delta}}} — per-thread deltas over gates.profiles.<profile>."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def apply_thread_ops(policy, thr_root: dict, overrides: dict, thread: str, profile: str,
+                     ops: list, spent: dict) -> list[dict]:
+    """Plan profile-scoped ops for one thread against base profile + its deltas;
+    global ops are left to the profile partitions. `spent` must be the shared ledger
+    (profile spend + this thread's spend; see plan_proposals)."""
+    base = (((thr_root.get("gates") or {}).get("profiles") or {}).get(profile))
+    if not isinstance(base, dict):
+        return []
+    deltas = overrides.setdefault(thread, {}).setdefault(profile, {})
+    eff = {k: (round(v + deltas.get(k, 0.0), 4) if isinstance(v, (int, float)) and not isinstance(v, bool) else v)
+           for k, v in base.items()}
+    doc = {"gates": {"profiles": {profile: eff}}}
+    changes = policy.apply(doc, [o for o in ops if o.scope == "profile"], spent, profiles=[profile])
+    for c in changes:
+        key = c["path"].rsplit(".", 1)[-1]
+        deltas[key] = round(c["after"] - base[key], 4)
+        c.update(thread=thread, path=f"overrides.{thread}.{profile}.{key}")
+    if not deltas:
+        overrides[thread].pop(profile, None)
+    return changes
+
+def _shared(spent: dict, extra: dict) -> dict:
+    return {k: round(spent.get(k, 0.0) + extra.get(k, 0.0), 6) for k in set(spent) | set(extra)}
 
-    # Build patch (never over-write; create new file)
-    patches_dir = ROOT / "thread" / "patches"
-    patches_dir.mkdir(parents=True, exist_ok=True)
-    stamp = NOW.strftime("%Y%m%d-%H%M%S")
+def plan_proposals(policy, thr, planned: dict, spent: dict, thread_spent: dict, overrides: dict) -> list[dict]:
+    """Plan every partition's ops against `thr` (in place). One max_delta_per_day
+    ledger spans the profile and thread layers, so a thread's effective movement
+    (profile move + its own delta) stays within the daily cap: thread ops draw on
+    profile spend + that thread's spend, profile ops on profile spend + the largest
+    thread spend. Profile partitions are planned before thread partitions.
+    `spent` (profile / global) and `thread_spent` ({thread: ledger}) update in place."""
+    proposals = []
+    for key in sorted(planned, key=lambda k: (split_key(k)[0] != ALL, k)):
+        ops = planned[key]
+        if not ops:
+            continue
+        thread, profile = split_key(key)
+        if thr is None:
+            proposals += [{"partition": key, "op": o.source, "target": o.target} for o in ops]
+        elif thread == ALL:
+            extra = {}
+            for ledger in thread_spent.values():
+                for k, v in ledger.items():
+                    extra[k] = max(extra.get(k, 0.0), v)
+            ledger = _shared(spent, extra)
+            changes = policy.apply(thr, ops, ledger, profiles=None if profile == ALL else [profile])
+            spent.update({k: round(v - extra.get(k, 0.0), 6) for k, v in ledger.items()})
+            proposals += [{"partition": key, **c} for c in changes]
+        else:
+            own = thread_spent.setdefault(thread, {})
+            ledger = _shared(spent, own)
+            changes = apply_thread_ops(policy, thr.get("thresholds", thr), overrides, thread, profile, ops, ledger)
+            own.update({k: round(v - spent.get(k, 0.0), 6) for k, v in ledger.items() if v - spent.get(k, 0.0) > 0})
+            proposals += [{"partition": key, **c} for c in changes]
+    return proposals
+
+def evaluate(sl: dict, policy, cp: dict, now: dt.datetime, folded: int = 0) -> dict:
+    """One evaluation over the checkpoint's rollups (already ingested up to `now`):
+    verdicts per partition, planned/applied patch, checkpoint save, journal entry.
+    Returns the journal entry."""
+    windows = policy.windows
+    primary = policy.window
+    hours = windows[primary] / 3600
+    pcfg = sl.get("partition") or {}
+    by = set(pcfg.get("by") or [])
+    workers = int(pcfg.get("workers", 0) or 0)
+    now_s = epoch(now)
+    expire(cp, now_s)
+
+    # Partitions: pooled summary (*|*), per profile (*|p) and per thread (t|p)
+    parts = cp["partitions"]
+    groups: dict[str, list] = {partition_key(ALL, ALL): list(parts.values())}
+    if "profile" in by:
+        for pk, b in parts.items():
+            groups.setdefault(partition_key(ALL, split_key(pk)[1]), []).append(b)
+    if "thread" in by:
+        for pk, b in parts.items():
+            if split_key(pk)[0] != UNASSIGNED:
+                groups[pk] = [b]
+    items = [(k, merge_buckets(bs) if len(bs) > 1 else (bs[0] if bs else {}), now_s, windows)
+             for k, bs in groups.items()]
+    results = evaluate_partitions(sl, policy, items, workers)
+    envs, verdicts, verdict = results[partition_key(ALL, ALL)]
+    coh, mir, n = envs[primary]["coherence"], envs[primary]["mirror_residual"], envs[primary]["samples"]
+
+    # Compile fired adjustments into patch ops per partition and plan them against an
+    # in-memory copy of the thresholds; clamps + max_delta_per_day (per UTC day and
+    # per profile / thread) apply here.
+    planned = {k: policy.ops(e, vs) for k, (e, vs, _v) in results.items()}
+    if "profile" in by:
+        planned[partition_key(ALL, ALL)] = []  # summary only; profiles adapt on their own
+    thr_path = ROOT / "thresholds_1.1.yaml"
+    thr = load_yaml(thr_path) if any(planned.values()) and thr_path.exists() else None
+    day = now.strftime("%Y-%m-%d")
+    spend = cp.get("spend") if (cp.get("spend") or {}).get("day") == day else {"day": day, "by_key": {}}
+    online = online_spent(day)  # the daily budget is shared with online micro-adjustments
+    spent = {k: round(spend["by_key"].get(k, 0.0) + online.get(k, 0.0), 6)
+             for k in set(spend["by_key"]) | set(online)}
+    thread_spent = {t: dict(v) for t, v in (spend.get("threads") or {}).items()}
+    overrides = load_overrides()
+    proposals = plan_proposals(policy, thr, planned, spent, thread_spent, overrides)
+
+    # Optionally apply: thresholds and thread overrides are each written once, atomically
+    applied = False
+    if APPLY and thr is not None and proposals:
+        import yaml
+        if any(p.get("thread") is None for p in proposals):
+            write_atomic(thr_path, yaml.safe_dump(thr, sort_keys=False, allow_unicode=True))
+        if any(p.get("thread") for p in proposals):
+            write_atomic(OVERRIDES, json.dumps({t: v for t, v in overrides.items() if v}, indent=2, sort_keys=True))
+        spend["by_key"] = {k: round(v - online.get(k, 0.0), 6) for k, v in spent.items()}
+        spend["threads"] = thread_spent
+        applied = True
+    cp["spend"] = spend
+    cp["pending_samples"] = 0
+    save_checkpoint(cp)
+
+    # Patch log (append-only, indexed; empty and repeated dry-run patches are not logged)
     patch = {
         "meta": {
-            "ts": ISO(NOW),
+            "ts": ISO(now),
             "window_h": hours,
             "samples": int(n),
             "coherence_avg": coh,
             "mirror_residual_avg": mir,
             "verdict": verdict,
-            "apply": bool(APPLY),
         },
-        "proposals": proposals
+        "applied": applied,
+        "proposals": proposals,
     }
-    patch_path = patches_dir / f"{stamp}_thresholds.patch.json"
-    patch_path.write_text(json.dumps(patch, indent=2), encoding="utf-8")
+    logged = PatchLog(ROOT / "thread" / "patches.jsonl").append(patch)
+    patch_ref = None if logged is None else logged["seq"]
 
-    # Optionally apply (safe, profile-wide in thresholds_1.1.yaml)
-    applied = False
-    if APPLY and proposals:
-        import yaml, copy
-        thr_path = ROOT / "thresholds_1.1.yaml"
-        thr = yaml.safe_load(thr_path.read_text(encoding="utf-8"))
-        profiles = (thr.get("thresholds",thr).get("gates",{}).get("profiles",{}) or {})
-        new_thr = copy.deepcopy(thr)
-        for name, prof in profiles.items():
-            if not isinstance(prof, dict): continue
-            for pr in proposals:
-                key = pr["path"].split(".")[-1]
-                delta = float(pr["delta"])
-                if key in prof and isinstance(prof[key], (int,float)):
-                    if "call_harmonizers_below" in key:
-                        new = max(0.40, min(0.80, prof[key] + delta))
-                    elif "early_severance_below" in key:
-                        new = max(0.20, min(0.35, prof[key] + delta))
-                    else:
-                        new = prof[key] + delta
-                    new_thr["thresholds"]["gates"]["profiles"][name][key] = round(new, 4)
-        thr_path.write_text(yaml.safe_dump(new_thr, sort_keys=False, allow_unicode=True), encoding="utf-8")
-        applied = True
+    # Journal entry (append-only, bounded by logging.keep_last; markdown rendered on demand)
+    logcfg = sl.get("logging") or {}
+    entry = {
+        "ts": ISO(now),
+        "verdict": verdict,
+        "windows": {w: ({**envs[w], "verdict": verdicts[w]} if logcfg.get("include_metrics_summary", True)
+                        else {"verdict": verdicts[w]}) for w in windows},
+        "partitions": {k: v for k, (_e, _vs, v) in sorted(results.items())},
+        "samples": int(n),
+        "coherence_avg": coh,
+        "mirror_residual_avg": mir,
+        "proposals": len(proposals),
+        "patch": patch_ref,
+        "applied": applied,
+    }
+    if applied:
+        entry["changes"] = proposals
+    journal_from_policy(sl, ROOT).append(entry)
+
+    print(f"[✓] Evaluated {int(n)} samples over {primary} ({folded} new, {len(results)} partitions) → {verdict}. "
+          f"Patch: {'#' + str(patch_ref) if patch_ref is not None else 'none'}. Applied={applied}")
+    return entry
+
+# --- Resident scheduler ---
+def update_interval(sl: dict) -> int:
+    """schedule.update_interval in seconds: hourly/daily/weekly or a duration (30m, 6h, 2d)."""
+    from self_learning_policy import parse_window
+    val = (sl.get("schedule") or {}).get("update_interval", "daily")
+    return INTERVALS.get(str(val).strip().lower()) or parse_window(val)
+
+def write_status(status: dict, path: Path = STATUS) -> None:
+    write_atomic(path, json.dumps(status, indent=2))
+
+def read_status(path: Path = STATUS) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+class Scheduler:
+    """Keeps the compiled policy and checkpoint resident. poll() folds new telemetry
+    and evaluates when the interval elapsed or enough new samples arrived; the policy
+    is recompiled when self_learning.yaml changes on disk."""
+
+    def __init__(self, sl_path: Path = ROOT / "runtime" / "self_learning.yaml"):
+        self.sl_path = sl_path
+        self.mtime = None
+        self.sl = self.policy = None
+        self.cp = None
+        prev = read_status()
+        self.last_eval = prev.get("last_eval_s")
+        self.last = prev.get("last")
+        self.last_trigger = prev.get("last_trigger")
+
+    def reload(self) -> bool:
+        mtime = self.sl_path.stat().st_mtime
+        if mtime == self.mtime:
+            return False
+        sl = load_yaml(self.sl_path)
+        policy = compile_policy(sl)  # PolicyError keeps the previous policy running
+        self.sl, self.policy, self.mtime = sl, policy, mtime
+        sched = sl.get("schedule") or {}
+        self.interval = update_interval(sl)
+        self.trigger_samples = int(sched.get("trigger_samples") or 0)
+        from self_learning_policy import parse_window
+        self.poll_s = parse_window(sched.get("poll", "1m"))
+        if self.cp is None:
+            self.cp = load_checkpoint()
+        self.cp["retain_s"] = max(int(self.cp.get("retain_s", 0)), max(self.policy.windows.values()))
+        return True
+
+    def due(self, now_s: float) -> str | None:
+        if self.last_eval is None or now_s - self.last_eval >= self.interval:
+            return "interval"
+        if self.trigger_samples and self.cp.get("pending_samples", 0) >= self.trigger_samples:
+            return "samples"
+        return None
+
+    def poll(self, now: dt.datetime | None = None) -> dict | None:
+        now = now or utcnow()
+        now_s = epoch(now)
+        try:
+            self.reload()
+        except (PolicyError, OSError, ValueError) as e:
+            if self.policy is None:
+                raise
+            print(f"[!] self_learning.yaml: {e} (keeping previous policy)")
+        folded = ingest(self.cp, ROOT / "thread" / "telemetry.jsonl", now_s, default_profile())
+        trigger = self.due(now_s)
+        if trigger:
+            self.last = evaluate(self.sl, self.policy, self.cp, now, folded)
+            self.last_eval, self.last_trigger = now_s, trigger
+        self.publish(now_s)
+        return self.last if trigger else None
+
+    def publish(self, now_s: float) -> None:
+        status = {
+            "mode": "serve",
+            "pid": os.getpid(),
+            "updated": ISO(dt.datetime.utcfromtimestamp(now_s)),
+            "interval_s": self.interval,
+            "trigger_samples": self.trigger_samples,
+            "pending_samples": self.cp.get("pending_samples", 0),
+            "last_eval_s": self.last_eval,
+            "next_due": ISO(dt.datetime.utcfromtimestamp((self.last_eval or now_s) + self.interval)),
+            "last_trigger": self.last_trigger,
+            "last": self.last,
+        }
+        write_status(status)
+
+    def serve(self, stop=None) -> None:
+        import signal, threading
+        stop = stop or threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                signal.signal(sig, lambda *_: stop.set())
+            except ValueError:
+                pass  # not the main thread
+        self.reload()
+        print(f"[~] Self-learning scheduler: every {self.interval}s"
+              + (f" or {self.trigger_samples} samples" if self.trigger_samples else "")
+              + f", polling {self.poll_s}s")
+        while not stop.is_set():
+            self.poll()
+            stop.wait(self.poll_s)
+        save_checkpoint(self.cp)
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="self_learning_evaluator.py", description="Self-learning evaluator")
+    ap.add_argument("--serve", action="store_true", help="run as a resident scheduler")
+    args = ap.parse_args(argv)
+
+    # Config
+    sl = load_yaml(ROOT / "runtime" / "self_learning.yaml")
+    try:
+        policy = compile_policy(sl)
+    except PolicyError as e:
+        print(f"[!] self_learning.yaml: {e}")
+        return 2
+    if args.serve:
+        Scheduler().serve()
+        return 0
+
+    # Optionally append one telemetry record from env before evaluating
+    append_telemetry_from_env()
 
-    # Log entry
-    logf = ROOT / "thread" / "learning_log.md"
-    logf.parent.mkdir(parents=True, exist_ok=True)
-    prev = logf.read_text(encoding="utf-8") if logf.exists() else ""
-    def fmt(x): return "None" if x is None else f"{x:.3f}"
-    logf.write_text(
-        prev + f"- {ISO(NOW)} verdict={verdict} samples={int(n)} coh={fmt(coh)} mir={fmt(mir)} "
-        f"proposals={len(proposals)} patch={patch_path.name} applied={applied}\n",
-        encoding="utf-8"
-    )
-
-    print(f"[✓] Evaluated {int(n)} samples over {hours}h → {verdict}. Patch: {patch_path.name}. Applied={applied}")
+    # Telemetry (incremental: only records appended since the last checkpoint)
+    now = utcnow()
+    cp = load_checkpoint()
+    cp["retain_s"] = max(int(cp.get("retain_s", 0)), max(policy.windows.values()))
+    folded = ingest(cp, ROOT / "thread" / "telemetry.jsonl", epoch(now), default_profile())
+    entry = evaluate(sl, policy, cp, now, folded)
+    write_status({"mode": "once", "updated": entry["ts"], "last_eval_s": epoch(now),
+                  "last_trigger": "manual", "last": entry})
     return 0
 
 if __name__ == "__main__":
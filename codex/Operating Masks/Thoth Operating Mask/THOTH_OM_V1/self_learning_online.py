@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Self-learning online mode — per-turn threshold micro-adjustments.
+
+- finish_turn() feeds every turn to observe(): time-decayed (half-life) sums of
+  coherence / mirror_residual per threshold profile, O(1) per call, no history scan
+- The smoothed env goes through the same compiled policy (signals, adjustments);
+  fired numeric `add` statements are applied as a fraction (online.step) of their
+  delta, at most once per online.cooldown per profile
+- Clamps are the batch ones; max_delta_per_day is shared with the batch evaluator
+  (its checkpoint spend + this module's running daily spend)
+- Thresholds are only written with online.apply: true (or APPLY=1); applied and
+  proposed changes go to the patch log (thread/patches.jsonl)
+- State (smoothed sums, daily spend, cooldowns) persists to
+  thread/self_learning.online.json on every adjustment, every online.persist_every
+  turns and at interpreter exit
+
+Usage:
+  python scripts/self_learning_online.py status
+"""
+from __future__ import annotations
+from pathlib import Path
+import os, sys, json, time, atexit, datetime as dt
+
+from self_learning_policy import compile_policy, parse_window, PatchOp, METRICS
+from self_learning_evaluator import (ONLINE_STATE, CHECKPOINT, APPLY, ISO, load_yaml, write_atomic,
+                                     default_profile)
+from patch_log import PatchLog
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+SL_PATH = ROOT / "runtime" / "self_learning.yaml"
+# decayed sums per profile: [w, w*coh, w*coh^2, w*mir, w*mir^2]
+STAT_FIELDS = 5
+
+def _day(now_s: float) -> str:
+    return dt.datetime.utcfromtimestamp(now_s).strftime("%Y-%m-%d")
+
+def load_state(path: Path = ONLINE_STATE) -> dict:
+    try:
+        st = json.loads(path.read_text(encoding="utf-8"))
+        if st.get("version") == 1:
+            return st
+    except Exception:
+        pass
+    return {"version": 1, "day": None, "spent": {}, "stats": {}, "last_adjust": {}, "events": 0}
+
+def batch_spent(day: str, path: Path = CHECKPOINT) -> dict:
+    """Today's spend recorded by the batch evaluator's checkpoint (read-only)."""
+    try:
+        spend = json.loads(path.read_text(encoding="utf-8")).get("spend") or {}
+    except Exception:
+        return {}
+    return dict(spend.get("by_key") or {}) if spend.get("day") == day else {}
+
+def smoothed_env(s: list[float]) -> dict:
+    env = {k: None for k in METRICS}
+    w = s[0]
+    env["samples"] = w
+    if w > 0:
+        for name, i in (("coherence", 1), ("mirror_residual", 3)):
+            mean = s[i] / w
+            env[name] = mean
+            env[f"{name}_var"] = max(s[i + 1] / w - mean * mean, 0.0)
+    return env
+
+class OnlineLearner:
+    def __init__(self, sl: dict, root: Path = ROOT):
+        cfg = sl.get("online") or {}
+        self.root = root
+        self.policy = compile_policy(sl)
+        self.half_life = parse_window(cfg.get("half_life", "30m"))
+        self.min_samples = float(cfg.get("min_samples", 10))
+        self.step = float(cfg.get("step", 0.25))
+        self.cooldown = parse_window(cfg.get("cooldown", "10m"))
+        self.persist_every = max(1, int(cfg.get("persist_every", 20)))
+        self.apply = bool(cfg.get("apply", False)) or APPLY
+        self.profile = default_profile(root)
+        self.state_path = root / "thread" / "self_learning.online.json"
+        self.state = load_state(self.state_path)
+
+    def observe(self, coherence: float, mirror_residual: float, samples: int = 1,
+                profile: str | None = None, now_s: float | None = None) -> list[dict]:
+        """Fold one turn; returns the micro-adjustments made (or proposed) for it."""
+        now_s = time.time() if now_s is None else now_s
+        p = profile or self.profile
+        slot = self.state["stats"].get(p)
+        if slot is None:
+            slot = self.state["stats"][p] = {"t": now_s, "s": [0.0] * STAT_FIELDS}
+        s = slot["s"]
+        if now_s > slot["t"]:
+            decay = 0.5 ** ((now_s - slot["t"]) / self.half_life)
+            for i in range(STAT_FIELDS):
+                s[i] *= decay
+            slot["t"] = now_s
+        w, coh, mir = float(samples), float(coherence), float(mirror_residual)
+        s[0] += w
+        s[1] += w * coh; s[2] += w * coh * coh
+        s[3] += w * mir; s[4] += w * mir * mir
+        self.state["events"] = self.state.get("events", 0) + 1
+
+        changes = []
+        env = smoothed_env(s)
+        verdict = self.policy.verdict(env, self.min_samples)
+        if verdict not in ("insufficient", "neutral") and now_s - self.state["last_adjust"].get(p, 0.0) >= self.cooldown:
+            changes = self._adjust(p, env, verdict, now_s)
+        if changes or self.state["events"] % self.persist_every == 0:
+            self.save()
+        return changes
+
+    def _micro_ops(self, env: dict, verdict: str) -> list[PatchOp]:
+        ops = self.policy.ops({w: env for w in self.policy.windows}, {w: verdict for w in self.policy.windows})
+        return [PatchOp(f"{op.source} ×{self.step:g}", op.target, "add", op.value * self.step, op.lo, op.hi)
+                for op in ops if op.kind == "add" and op.scope == "profile"]
+
+    def _adjust(self, profile: str, env: dict, verdict: str, now_s: float) -> list[dict]:
+        ops = self._micro_ops(env, verdict)
+        if not ops:
+            return []
+        day = _day(now_s)
+        if self.state.get("day") != day:
+            self.state["day"], self.state["spent"] = day, {}
+        own = self.state["spent"]
+        batch = batch_spent(day, self.root / "thread" / "self_learning.checkpoint.json")
+        merged = {k: round(batch.get(k, 0.0) + own.get(k, 0.0), 6) for k in set(batch) | set(own)}
+        thr_path = self.root / "thresholds_1.1.yaml"
+        if not thr_path.exists():
+            return []
+        thr = load_yaml(thr_path) or {}
+        changes = self.policy.apply(thr, ops, merged, profiles=[profile])
+        self.state["last_adjust"][profile] = now_s
+        if not changes:
+            return []
+        if self.apply:
+            import yaml
+            write_atomic(thr_path, yaml.safe_dump(thr, sort_keys=False, allow_unicode=True))
+            for k, v in merged.items():
+                own[k] = round(v - batch.get(k, 0.0), 6)
+        PatchLog(self.root / "thread" / "patches.jsonl").append({
+            "meta": {"ts": ISO(dt.datetime.utcfromtimestamp(now_s)), "verdict": f"online:{verdict}",
+                     "samples": round(env["samples"], 3)},
+            "applied": self.apply,
+            "proposals": [{"partition": f"online|{profile}", **c} for c in changes],
+        })
+        return changes
+
+    def save(self) -> None:
+        write_atomic(self.state_path, json.dumps(self.state, separators=(",", ":")))
+
+# --- runtime hook: one resident learner, rebuilt when self_learning.yaml changes ---
+_LEARNER = None
+_LEARNER_MTIME = None
+
+def get_learner(root: Path = ROOT) -> OnlineLearner | None:
+    """The process-wide learner, or None when online.enabled is off."""
+    global _LEARNER, _LEARNER_MTIME
+    sl_path = root / "runtime" / "self_learning.yaml"
+    try:
+        mtime = sl_path.stat().st_mtime
+    except OSError:
+        return None
+    if mtime != _LEARNER_MTIME:
+        sl = load_yaml(sl_path) or {}
+        if _LEARNER is not None:
+            _LEARNER.save()
+        _LEARNER = OnlineLearner(sl, root) if (sl.get("online") or {}).get("enabled") and sl.get("enabled", True) else None
+        _LEARNER_MTIME = mtime
+    return _LEARNER
+
+@atexit.register
+def _save_on_exit() -> None:
+    if _LEARNER is not None:
+        _LEARNER.save()
+
+def observe(coherence: float, mirror_residual: float, samples: int = 1, profile: str | None = None) -> list[dict]:
+    learner = get_learner()
+    return learner.observe(coherence, mirror_residual, samples, profile) if learner else []
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="self_learning_online.py", description="Online self-learning state")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    sp.add_parser("status", help="Print smoothed stats and today's spend")
+    ap.parse_args(argv)
+    st = load_state()
+    sl = load_yaml(SL_PATH) or {}
+    half_life = parse_window((sl.get("online") or {}).get("half_life", "30m"))
+    now_s = time.time()
+    out = {"enabled": bool((sl.get("online") or {}).get("enabled")), "day": st.get("day"),
+           "spent": st.get("spent"), "events": st.get("events"), "profiles": {}}
+    for p, slot in (st.get("stats") or {}).items():
+        decay = 0.5 ** (max(0.0, now_s - slot["t"]) / half_life)
+        env = smoothed_env([v * decay for v in slot["s"]])
+        out["profiles"][p] = {"coherence": env["coherence"], "mirror_residual": env["mirror_residual"],
+                              "samples": round(env["samples"], 3),
+                              "last_adjust": ISO(dt.datetime.utcfromtimestamp(st["last_adjust"][p])) if p in st.get("last_adjust", {}) else None}
+    print(json.dumps(out, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Self-Learning Policy compiler (no eval).
+- Parses `signals.*` and `adjustments[].when` from runtime/self_learning.yaml once
+- Validates identifiers against known metrics + aliases (coh → coherence, ...)
+- Produces plain closures over a metrics dict; safe to share across windows,
+  threads and backtests (compiled objects hold no mutable state)
+- Compiles `adjustments[].do` statements into typed PatchOps and applies a batch of
+  them to an in-memory thresholds mapping in one pass (clamps + daily budget)
+
+Grammar (Python expression subset): and/or/not, comparisons (chainable),
++ - * /, unary -, parentheses, numbers, true/false, metric names.
+
+Adjustment DSL:  <target> (= | += | -=) <number|true|false> [clamp[lo,hi]]
+  routing.call_harmonizers_below -= 0.02 clamp[0.40,0.70]
+  routing.force_serial_on_incoherent = true
+"""
+from __future__ import annotations
+import ast, re, operator
+
+# canonical metric -> accepted aliases
+METRICS: dict[str, tuple[str, ...]] = {
+    "coherence": ("coh",),
+    "mirror_residual": ("mir", "residual"),
+    "samples": ("n",),
+    "coherence_var": ("coh_var",),
+    "coherence_slope": ("coh_slope",),        # per hour
+    "mirror_residual_var": ("mir_var",),
+    "mirror_residual_slope": ("mir_slope",),  # per hour
+}
+
+DEFAULT_WINDOW = "24h"
+DEFAULT_PRECEDENCE = ("penalty", "reward")
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+DEFAULT_SIGNALS = {
+    "reward": "coherence >= 0.88 and mirror_residual <= 0.35",
+    "penalty": "coherence < 0.55 or mirror_residual > 0.50",
+}
+
+class PolicyError(ValueError):
+    """Raised when self_learning.yaml holds an expression we refuse to run."""
+
+_CMP = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+        ast.GtE: operator.ge, ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_BIN = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_CONST = {"true": True, "false": False, "True": True, "False": False}
+
+def parse_window(w) -> int:
+    """'90m' | '6h' | '7d' | '1w' | bare hours -> seconds."""
+    s = str(w).strip().lower()
+    try:
+        if s and s[-1] in _WINDOW_UNITS:
+            secs = float(s[:-1]) * _WINDOW_UNITS[s[-1]]
+        else:
+            secs = float(s) * 3600
+    except ValueError:
+        raise PolicyError(f"bad window {w!r} (expected e.g. 1h, 6h, 24h, 7d)") from None
+    if secs <= 0:
+        raise PolicyError(f"window must be positive: {w!r}")
+    return int(secs)
+
+def alias_table(metrics: dict[str, tuple[str, ...]] = METRICS) -> dict[str, str]:
+    out = {}
+    for name, aliases in metrics.items():
+        out[name] = name
+        for a in aliases:
+            out[a] = name
+    return out
+
+class Expr:
+    """A compiled expression: `expr(env)` with env keyed by canonical metric names."""
+    __slots__ = ("source", "names", "_fn")
+
+    def __init__(self, source: str, fn, names: frozenset[str]):
+        self.source = source
+        self.names = names
+        self._fn = fn
+
+    def __call__(self, env: dict) -> bool:
+        """False when the value is undefined (x / 0 and the like): a signal or
+        condition that cannot be evaluated does not fire."""
+        try:
+            return bool(self._fn(env))
+        except ArithmeticError:
+            return False
+
+    def ready(self, env: dict) -> bool:
+        """True when every metric the expression reads is present (not None)."""
+        return all(env.get(n) is not None for n in self.names)
+
+    def __repr__(self) -> str:
+        return f"Expr({self.source!r})"
+
+def compile_expr(source: str, metrics: dict[str, tuple[str, ...]] = METRICS,
+                 signals: dict[str, Expr] | None = None) -> Expr:
+    """Compile `source` to a closure; `signals` lets `when:` reference reward/penalty by name."""
+    src = str(source).strip()
+    if not src:
+        raise PolicyError("empty expression")
+    try:
+        tree = ast.parse(src, mode="eval")
+    except SyntaxError as e:
+        raise PolicyError(f"cannot parse {src!r}: {e.msg}") from None
+    names: set[str] = set()
+    aliases = alias_table(metrics)
+    signals = signals or {}
+
+    def build(node):
+        if isinstance(node, ast.BoolOp):
+            parts = [build(v) for v in node.values]
+            if isinstance(node.op, ast.And):
+                return lambda env: all(p(env) for p in parts)
+            return lambda env: any(p(env) for p in parts)
+        if isinstance(node, ast.UnaryOp):
+            inner = build(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda env: not inner(env)
+            if isinstance(node.op, ast.USub):
+                return lambda env: -inner(env)
+            if isinstance(node.op, ast.UAdd):
+                return inner
+        if isinstance(node, ast.Compare):
+            terms = [build(node.left)] + [build(c) for c in node.comparators]
+            ops = []
+            for op in node.ops:
+                fn = _CMP.get(type(op))
+                if fn is None:
+                    raise PolicyError(f"operator {type(op).__name__} not allowed in {src!r}")
+                ops.append(fn)
+            if len(ops) == 1:
+                a, b, f = terms[0], terms[1], ops[0]
+                return lambda env: f(a(env), b(env))
+            def chain(env):
+                left = terms[0](env)
+                for f, t in zip(ops, terms[1:]):
+                    right = t(env)
+                    if not f(left, right):
+                        return False
+                    left = right
+                return True
+            return chain
+        if isinstance(node, ast.BinOp):
+            fn = _BIN.get(type(node.op))
+            if fn is None:
+                raise PolicyError(f"operator {type(node.op).__name__} not allowed in {src!r}")
+            a, b = build(node.left), build(node.right)
+            return lambda env: fn(a(env), b(env))
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            v = float(node.value)
+            return lambda env: v
+        if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+            v = node.value
+            return lambda env: v
+        if isinstance(node, ast.Name):
+            if node.id in _CONST:
+                v = _CONST[node.id]
+                return lambda env: v
+            if node.id in signals:
+                sig = signals[node.id]
+                names.update(sig.names)
+                return sig._fn
+            canon = aliases.get(node.id)
+            if canon is None:
+                known = sorted(set(aliases) | set(signals))
+                raise PolicyError(f"unknown identifier {node.id!r} in {src!r}; known: {', '.join(known)}")
+            names.add(canon)
+            return lambda env: env[canon]
+        raise PolicyError(f"{type(node).__name__} not allowed in {src!r}")
+
+    fn = build(tree.body)
+    return Expr(src, fn, frozenset(names))
+
+# --- Adjustment DSL -> patch ops ---
+# policy target -> (scope, key path under the thresholds root). "profile" targets are
+# applied to gates.profiles.<name>.<key> for each selected profile.
+TARGETS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "routing.call_harmonizers_below": ("profile", ("call_harmonizers_below",)),
+    "routing.early_severance_below": ("profile", ("early_severance_below",)),
+    "routing.force_serial_on_incoherent": ("global", ("meta_gate", "routing", "force_serial_on_incoherent")),
+    "routing.total_gate_cap": ("global", ("gates", "total_cap")),
+    "safety.max_gate_iterations": ("global", ("meta_gate", "safety", "max_gate_iterations")),
+    "safety.cooldown_s": ("global", ("meta_gate", "safety", "cooldown_s")),
+    "safety.hard_stop_after_total_gates": ("global", ("meta_gate", "safety", "hard_stop_after_total_gates")),
+}
+
+_STMT = re.compile(
+    r"^\s*([A-Za-z_][\w.]*)\s*(\+=|-=|=)\s*([^\s]+)"
+    r"(?:\s+clamp\s*\[\s*([-+0-9.eE]+)\s*,\s*([-+0-9.eE]+)\s*\])?\s*$"
+)
+
+class PatchOp:
+    """A compiled `do:` statement. kind: 'add' (numeric delta) or 'set'."""
+    __slots__ = ("source", "target", "kind", "value", "lo", "hi", "scope", "path")
+
+    def __init__(self, source, target, kind, value, lo, hi):
+        self.source = source
+        self.target = target
+        self.kind = kind
+        self.value = value
+        self.lo = lo
+        self.hi = hi
+        self.scope, self.path = TARGETS[target]
+
+    def __repr__(self) -> str:
+        return f"PatchOp({self.source!r})"
+
+def compile_statement(stmt: str) -> PatchOp:
+    m = _STMT.match(str(stmt))
+    if not m:
+        raise PolicyError(f"cannot parse adjustment {stmt!r} (expected '<target> += 0.01 clamp[lo,hi]')")
+    target, op, raw, lo, hi = m.groups()
+    if target not in TARGETS:
+        raise PolicyError(f"unknown adjustment target {target!r}; known: {', '.join(sorted(TARGETS))}")
+    low = raw.lower()
+    if low in ("true", "false"):
+        if op != "=":
+            raise PolicyError(f"{op} needs a number in {stmt!r}")
+        value = low == "true"
+    else:
+        try:
+            value = float(raw)
+        except ValueError:
+            raise PolicyError(f"bad value {raw!r} in {stmt!r}") from None
+    if lo is not None and float(lo) > float(hi):
+        raise PolicyError(f"empty clamp in {stmt!r}")
+    kind = "set" if op == "=" else "add"
+    if op == "-=":
+        value = -value
+    return PatchOp(str(stmt).strip(), target, kind, value,
+                   None if lo is None else float(lo), None if hi is None else float(hi))
+
+def _contract_clamps(sl: dict) -> dict[str, tuple[float, float]]:
+    raw = ((sl.get("contracts") or {}).get("clamps") or {})
+    return {k: (float(v[0]), float(v[1])) for k, v in raw.items()}
+
+def _is_num(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def spend_key(profile: str | None, target: str) -> str:
+    return f"{profile or '*'}|{target}"
+
+def apply_ops(thr: dict, ops: list[PatchOp], *, clamps: dict[str, tuple[float, float]] | None = None,
+              max_delta: dict[str, float] | None = None, spent: dict[str, float] | None = None,
+              profiles: list[str] | None = None, ndigits: int = 4) -> list[dict]:
+    """Apply `ops` in place to a thresholds mapping (the file's top level or its
+    `thresholds:` root) in a single pass and return the effective changes.
+
+    Numeric results are clamped to the statement clamp intersected with
+    `contracts.clamps`; movement per (profile, target) is capped by `max_delta`
+    minus what `spent` records for today, and `spent` is updated in place.
+    No-op changes are not reported."""
+    clamps = clamps or {}
+    max_delta = max_delta or {}
+    spent = {} if spent is None else spent
+    root = thr.get("thresholds", thr)
+    all_profiles = ((root.get("gates") or {}).get("profiles") or {})
+    names = [p for p in (profiles if profiles is not None else list(all_profiles)) if isinstance(all_profiles.get(p), dict)]
+    changes = []
+    for op in ops:
+        if op.scope == "profile":
+            slots = [(p, all_profiles[p], op.path[-1]) for p in names]
+        else:
+            node = root
+            for k in op.path[:-1]:
+                node = node.setdefault(k, {})
+            slots = [(None, node, op.path[-1])]
+        lo, hi = op.lo, op.hi
+        if op.target in clamps:
+            clo, chi = clamps[op.target]
+            lo = clo if lo is None else max(lo, clo)
+            hi = chi if hi is None else min(hi, chi)
+        for profile, node, key in slots:
+            before = node.get(key)
+            if op.kind == "set":
+                after = op.value
+            elif _is_num(before):
+                after = before + op.value
+            else:
+                continue  # nothing numeric to nudge
+            if not isinstance(after, bool):
+                if lo is not None:
+                    after = max(lo, after)
+                if hi is not None:
+                    after = min(hi, after)
+                after = round(after, ndigits)
+                budget = max_delta.get(op.target)
+                if budget is not None and _is_num(before):
+                    sk = spend_key(profile, op.target)
+                    room = max(0.0, float(budget) - spent.get(sk, 0.0))
+                    after = round(before + max(-room, min(room, after - before)), ndigits)
+                    spent[sk] = round(spent.get(sk, 0.0) + abs(after - before), 6)
+                if isinstance(before, int) and not isinstance(before, bool) and float(after).is_integer():
+                    after = int(after)
+            if after == before and type(after) is type(before):
+                continue
+            node[key] = after
+            where = ("gates.profiles." + profile + "." if profile else "") + ".".join(op.path if profile is None else op.path[-1:])
+            changes.append({"path": "thresholds." + where, "target": op.target, "profile": profile,
+                            "op": op.source, "before": before, "after": after})
+    return changes
+
+class Adjustment:
+    """One `adjustments[]` entry: a condition, the window that gates it, and its `do:`."""
+    __slots__ = ("when", "signal", "expr", "do", "window", "ops")
+
+    def __init__(self, when: str, signal: str | None, expr: Expr | None, do: list[str], window: str):
+        self.when = when
+        self.signal = signal
+        self.expr = expr
+        self.do = do
+        self.window = window
+        self.ops = [compile_statement(d) for d in do]
+
+    def fires(self, env: dict, verdicts: dict[str, str]) -> bool:
+        # `when: reward` follows the verdict of this adjustment's own window (never a
+        # fallback from another window); any other expression is evaluated directly
+        if self.signal is not None:
+            return verdicts.get(self.window) == self.signal
+        return self.expr.ready(env) and self.expr(env)
+
+class Policy:
+    """Compiled signals + adjustment conditions from a self_learning.yaml mapping."""
+
+    def __init__(self, sl: dict | None, metrics: dict[str, tuple[str, ...]] = METRICS):
+        sl = sl or {}
+        raw = {**DEFAULT_SIGNALS, **(sl.get("signals") or {})}
+        self.signals: dict[str, Expr] = {}
+        for name, src in raw.items():
+            if src is None:
+                continue
+            self.signals[name] = compile_expr(src, metrics)
+        self.min_samples = int((sl.get("metrics") or {}).get("min_samples", 20))
+        self.clamps = _contract_clamps(sl)
+        self.max_delta = {k: float(v) for k, v in ((sl.get("safety") or {}).get("max_delta_per_day") or {}).items()}
+        sched = sl.get("schedule") or {}
+        self.window = str(sched.get("window", DEFAULT_WINDOW))
+        # label -> seconds, primary window always included; evaluated shortest first
+        labels = [str(w) for w in (sched.get("windows") or [])] + [self.window]
+        self.windows: dict[str, int] = dict(sorted({w: parse_window(w) for w in labels}.items(), key=lambda kv: kv[1]))
+        self.precedence = [p for p in (sched.get("precedence") or DEFAULT_PRECEDENCE) if p in self.signals]
+        self.adjustments: list[Adjustment] = []
+        for i, block in enumerate(sl.get("adjustments") or []):
+            when = str((block or {}).get("when") or "").strip()
+            if not when:
+                raise PolicyError(f"adjustments[{i}] has no 'when'")
+            do = [str(d) for d in (block.get("do") or [])]
+            window = str(block.get("window", self.window))
+            if window not in self.windows:
+                self.windows[window] = parse_window(window)
+            if when in self.signals:
+                self.adjustments.append(Adjustment(when, when, None, do, window))
+            else:
+                self.adjustments.append(Adjustment(when, None, compile_expr(when, metrics, self.signals), do, window))
+
+    def verdict(self, env: dict, min_samples: float | None = None) -> str:
+        """'insufficient' below min_samples or with missing metrics; otherwise the first
+        firing signal in declaration order (reward, penalty, ...) or 'neutral'."""
+        n = env.get("samples")
+        if n is None or n < (self.min_samples if min_samples is None else min_samples):
+            return "insufficient"
+        for name, expr in self.signals.items():
+            if not expr.ready(env):
+                return "insufficient"
+            if expr(env):
+                return name
+        return "neutral"
+
+    def verdicts(self, envs: dict[str, dict]) -> dict[str, str]:
+        """Per-window verdicts for {window_label: env}."""
+        return {w: self.verdict(env) for w, env in envs.items()}
+
+    def combine(self, verdicts: dict[str, str]) -> str:
+        """Combined verdict: the first signal in `schedule.precedence` (default
+        penalty, reward) that fires in the window gating its adjustment; otherwise
+        the primary window's verdict."""
+        gated: dict[str, set[str]] = {}
+        for a in self.adjustments:
+            if a.signal is not None:
+                gated.setdefault(a.signal, set()).add(a.window)
+        for sig in self.precedence:
+            if any(verdicts.get(w) == sig for w in gated.get(sig, (self.window,))):
+                return sig
+        return verdicts.get(self.window, "insufficient")
+
+    def ops(self, envs: dict[str, dict], verdicts: dict[str, str] | None = None) -> list[PatchOp]:
+        """Compiled ops of every adjustment that fires; each adjustment reads the env
+        and verdict of its own gating window. Signal adjustments other than the
+        combined verdict's (schedule.precedence) never fire, so a good 24h window and
+        a bad 6h window do not loosen and tighten in the same run."""
+        verdicts = self.verdicts(envs) if verdicts is None else verdicts
+        winner = self.combine(verdicts)
+        out = []
+        for adj in self.adjustments:
+            if adj.signal is not None and adj.signal != winner:
+                continue
+            env = envs.get(adj.window) or {}
+            if adj.fires(env, verdicts):
+                out.extend(adj.ops)
+        return out
+
+    def apply(self, thr: dict, ops: list[PatchOp], spent: dict[str, float] | None = None,
+              profiles: list[str] | None = None) -> list[dict]:
+        """apply_ops() with this policy's contract clamps and max_delta_per_day."""
+        return apply_ops(thr, ops, clamps=self.clamps, max_delta=self.max_delta, spent=spent, profiles=profiles)
+
+def compile_policy(sl: dict | None) -> Policy:
+    return Policy(sl)
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Thoth OM — telemetry query (streaming, constant memory).
+
+Usage:
+  python scripts/telemetry_query.py query --since 2025-10-18T00:00:00Z --event turn
+  python scripts/telemetry_query.py query --where "coherence<0.6" --format table
+  python scripts/telemetry_query.py query --group-by thread --agg count,mean:coherence,p95:coherence
+  python scripts/telemetry_query.py query --source casebook --event activation --format csv
+  python scripts/telemetry_query.py index            # build/refresh time index + hourly rollups
+
+Behavior:
+- Streams thread/telemetry.jsonl (or thoth_om_v1/casebook.db.jsonl) line by line; the
+  file is never loaded whole.
+- If <file>.idx.json exists (built by `index`), blocks wholly outside --since/--until are
+  skipped by seeking, and plain count/mean/sum/min/max aggregations grouped by
+  event/thread/hour are answered from the hourly rollups, streaming only the tail
+  appended after the index was built.
+- Records without an "event" field are per-turn telemetry and report as event "turn".
+- Quantiles use a fixed-size reservoir per group (exact up to RESERVOIR_SIZE values).
+"""
+from __future__ import annotations
+from pathlib import Path
+from array import array
+import os, sys, re, csv, json, random, hashlib, datetime as dt
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+SOURCES = {
+    "telemetry": ROOT / "thread" / "telemetry.jsonl",
+    "casebook": ROOT / "thoth_om_v1" / "casebook.db.jsonl",
+}
+INDEX_SUFFIX = ".idx.json"
+INDEX_BLOCK = 4096          # records per index block
+INDEX_TAIL = 4096           # bytes before the indexed size fingerprinted against rewrites
+ROLLUP_S = 3600             # rollup bucket width (hourly)
+ROLLUP_FIELDS = ("coherence", "mirror_residual", "samples")
+ROLLUP_GROUPS = {"event", "thread", "hour"}
+RESERVOIR_SIZE = 10000
+TABLE_ROWS = 100            # raw rows buffered for --format table without --limit
+
+# --- Record helpers ---
+def parse_time(v) -> float | None:
+    """Epoch seconds from an ISO string (Z/offset/naive=UTC) or a number."""
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    try:
+        t = dt.datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return t.timestamp()
+
+def record_ts(rec: dict) -> float | None:
+    return parse_time(rec.get("ts", rec.get("timestamp")))
+
+def record_event(rec: dict) -> str:
+    return str(rec.get("event") or "turn")
+
+def record_thread(rec: dict) -> str | None:
+    """Thread id as a string (7 and "7" are one thread); None when absent."""
+    th = rec.get("thread")
+    return None if th is None or th == "" else str(th)
+
+def field(rec: dict, path: str):
+    """Dotted lookup (details.staged); 'event' and 'hour' are derived."""
+    if path == "event":
+        return record_event(rec)
+    if path == "hour":
+        t = record_ts(rec)
+        return None if t is None else _hour_iso(int(t // ROLLUP_S) * ROLLUP_S)
+    cur = rec
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return None
+        cur = cur[part]
+    return cur
+
+def _hour_iso(epoch: int) -> str:
+    return dt.datetime.fromtimestamp(epoch, dt.timezone.utc).strftime("%Y-%m-%dT%H:00:00Z")
+
+def _num(v) -> float | None:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return None
+    return float(v)
+
+def iter_lines(path: Path, start: int = 0, end: int | None = None):
+    """Yield (offset, record) from byte `start` up to `end` (exclusive); bad lines skipped."""
+    with path.open("rb") as f:
+        f.seek(start)
+        off = start
+        for line in f:
+            if end is not None and off >= end:
+                break
+            here = off
+            off += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict):
+                yield here, rec
+
+# --- Filters ---
+_PRED = re.compile(r"^\s*([\w.]+)\s*(==|!=|<=|>=|<|>|~)\s*(.+?)\s*$")
+
+def compile_predicate(expr: str):
+    """'field OP value' (OP: == != < <= > >= ~substring) or a bare field (exists)."""
+    m = _PRED.match(expr)
+    if not m:
+        name = expr.strip()
+        if not re.fullmatch(r"[\w.]+", name):
+            raise ValueError(f"bad predicate: {expr!r}")
+        return lambda rec: field(rec, name) is not None
+    name, op, raw = m.groups()
+    try:
+        want = json.loads(raw)
+    except ValueError:
+        want = raw.strip("'\"")
+    if op == "~":
+        return lambda rec: str(want) in str(field(rec, name))
+    if op in ("==", "!="):
+        eq = op == "=="
+        return lambda rec: (field(rec, name) == want) is eq
+    cmp = {"<": float.__lt__, "<=": float.__le__, ">": float.__gt__, ">=": float.__ge__}[op]
+    target = _num(want)
+    if target is None:
+        raise ValueError(f"non-numeric comparison in predicate: {expr!r}")
+    def pred(rec):
+        v = _num(field(rec, name))
+        return v is not None and cmp(v, target)
+    return pred
+
+def build_filter(since=None, until=None, events=None, threads=None, where=()):
+    preds = [compile_predicate(w) for w in where]
+    events = set(events or ())
+    threads = set(threads or ())
+    def keep(rec: dict) -> bool:
+        if since is not None or until is not None:
+            t = record_ts(rec)
+            if t is None or (since is not None and t < since) or (until is not None and t >= until):
+                return False
+        if events and record_event(rec) not in events:
+            return False
+        if threads and record_thread(rec) not in threads:
+            return False
+        return all(p(rec) for p in preds)
+    return keep
+
+# --- Index + rollups ---
+def index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+def _tail_digest(path: Path, size: int) -> str:
+    with path.open("rb") as f:
+        f.seek(max(0, size - INDEX_TAIL))
+        return hashlib.blake2b(f.read(min(size, INDEX_TAIL)), digest_size=16).hexdigest()
+
+def load_index(path: Path) -> dict | None:
+    """Index is usable while the data file has only grown since it was built: same
+    inode, same bytes up to the indexed size, and an unchanged mtime unless it grew."""
+    ip = index_path(path)
+    if not ip.exists():
+        return None
+    try:
+        idx = json.loads(ip.read_text(encoding="utf-8"))
+        st, size = path.stat(), int(idx.get("size", 0))
+        if st.st_ino != idx.get("inode") or st.st_size < size:
+            return None  # rotated/replaced/truncated since indexing
+        if st.st_size == size and st.st_mtime_ns != idx.get("mtime_ns"):
+            return None  # rewritten in place at the same size
+        if _tail_digest(path, size) != idx.get("tail"):
+            return None  # rewritten, then grown past the indexed size
+        return idx
+    except Exception:
+        return None
+
+def build_index(path: Path, block: int = INDEX_BLOCK) -> dict:
+    """One streaming pass: per-block [offset, min_ts, max_ts, n] plus hourly rollups."""
+    blocks, rollup = [], {}
+    cur = None
+    st = path.stat()
+    size = st.st_size  # records appended while indexing stay in the streamed tail
+    for off, rec in iter_lines(path, 0, size):
+        t = record_ts(rec)
+        if cur is None or cur[3] >= block:
+            if cur is not None:
+                blocks.append(cur)
+            cur = [off, None, None, 0]
+        cur[3] += 1
+        if t is not None:
+            cur[1] = t if cur[1] is None else min(cur[1], t)
+            cur[2] = t if cur[2] is None else max(cur[2], t)
+        # untimed records roll up under bucket -1 so unbounded queries still count them
+        b = -1 if t is None else int(t // ROLLUP_S) * ROLLUP_S
+        key = f"{b}|{record_event(rec)}|{record_thread(rec) or ''}"
+        _rollup_add(rollup.setdefault(key, _rollup_new()), rec)
+    if cur is not None:
+        blocks.append(cur)
+    idx = {"size": size, "inode": st.st_ino, "mtime_ns": st.st_mtime_ns, "tail": _tail_digest(path, size),
+           "block": block, "rollup_s": ROLLUP_S, "blocks": blocks, "rollup": rollup}
+    ip = index_path(path)
+    tmp = ip.with_name(ip.name + ".tmp")
+    tmp.write_text(json.dumps(idx), encoding="utf-8")
+    os.replace(tmp, ip)
+    return idx
+
+def _rollup_new() -> dict:
+    return {"count": 0, **{f: [0, 0.0, None, None] for f in ROLLUP_FIELDS}}
+
+def _rollup_add(r: dict, rec: dict) -> None:
+    r["count"] += 1
+    for f in ROLLUP_FIELDS:
+        v = _num(rec.get(f))
+        if v is None:
+            continue
+        s = r[f]
+        s[0] += 1; s[1] += v
+        s[2] = v if s[2] is None else min(s[2], v)
+        s[3] = v if s[3] is None else max(s[3], v)
+
+def scan_ranges(idx: dict | None, since=None, until=None):
+    """Byte ranges worth reading; blocks entirely outside [since, until) are skipped."""
+    if not idx:
+        yield 0, None
+        return
+    blocks = idx.get("blocks") or []
+    size = int(idx.get("size", 0))
+    for i, (off, lo, hi, _n) in enumerate(blocks):
+        end = blocks[i + 1][0] if i + 1 < len(blocks) else size
+        if lo is not None and ((since is not None and hi < since) or (until is not None and lo >= until)):
+            continue
+        yield off, end
+    yield size, None  # tail appended after indexing
+
+# --- Aggregation ---
+class Agg:
+    """Streaming aggregate for one group: count, sum/mean/min/max, reservoir quantiles."""
+    __slots__ = ("count", "n", "total", "lo", "hi", "res", "seen", "rng")
+
+    def __init__(self, rng: random.Random):
+        self.count = 0
+        self.n = {}; self.total = {}; self.lo = {}; self.hi = {}
+        self.res = {}; self.seen = {}
+        self.rng = rng
+
+    def add(self, f: str, v: float, keep_sample: bool) -> None:
+        self.n[f] = self.n.get(f, 0) + 1
+        self.total[f] = self.total.get(f, 0.0) + v
+        self.lo[f] = v if f not in self.lo else min(self.lo[f], v)
+        self.hi[f] = v if f not in self.hi else max(self.hi[f], v)
+        if not keep_sample:
+            return
+        res = self.res.setdefault(f, array("d"))
+        seen = self.seen[f] = self.seen.get(f, 0) + 1
+        if len(res) < RESERVOIR_SIZE:
+            res.append(v)
+        else:
+            j = self.rng.randrange(seen)
+            if j < RESERVOIR_SIZE:
+                res[j] = v
+
+    def merge_rollup(self, r: dict) -> None:
+        self.count += r["count"]
+        for f in ROLLUP_FIELDS:
+            n, s, lo, hi = r[f]
+            if not n:
+                continue
+            self.n[f] = self.n.get(f, 0) + n
+            self.total[f] = self.total.get(f, 0.0) + s
+            self.lo[f] = lo if f not in self.lo else min(self.lo[f], lo)
+            self.hi[f] = hi if f not in self.hi else max(self.hi[f], hi)
+
+    def value(self, fn: str, f: str | None):
+        if fn == "count":
+            return self.count if f is None else self.n.get(f, 0)
+        if f not in self.n:
+            return None
+        if fn == "sum":
+            return self.total[f]
+        if fn == "mean":
+            return self.total[f] / self.n[f]
+        if fn == "min":
+            return self.lo[f]
+        if fn == "max":
+            return self.hi[f]
+        q = _quantile_of(fn)
+        xs = sorted(self.res.get(f, ()))
+        if not xs:
+            return None
+        pos = q * (len(xs) - 1)
+        i = int(pos)
+        j = min(i + 1, len(xs) - 1)
+        return xs[i] + (xs[j] - xs[i]) * (pos - i)
+
+_QUANT = re.compile(r"^(?:p(\d{1,2}(?:\.\d+)?)|median)$")
+
+def _quantile_of(fn: str) -> float:
+    m = _QUANT.match(fn)
+    if not m:
+        raise ValueError(f"unknown aggregation: {fn}")
+    return 0.5 if m.group(1) is None else float(m.group(1)) / 100.0
+
+def parse_aggs(spec: str) -> list[tuple[str, str | None]]:
+    """'count,mean:coherence,p95:coherence' -> [(fn, field), ...]"""
+    out = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        fn, _, f = part.partition(":")
+        fn = fn.lower()
+        if fn not in ("count", "sum", "mean", "min", "max"):
+            _quantile_of(fn)
+        if fn != "count" and not f:
+            raise ValueError(f"aggregation {fn!r} needs a field (e.g. {fn}:coherence)")
+        out.append((fn, f or None))
+    return out
+
+def _agg_column(fn: str, f: str | None) -> str:
+    return fn if f is None else f"{fn}_{f.replace('.', '_')}"
+
+def _rollup_eligible(idx, group_by, aggs, since, until, threads, where) -> bool:
+    if not idx or not idx.get("rollup") or where:
+        return False
+    if any(g not in ROLLUP_GROUPS for g in group_by):
+        return False
+    if any(fn not in ("count", "sum", "mean", "min", "max") or (f is not None and f not in ROLLUP_FIELDS)
+           for fn, f in aggs):
+        return False
+    step = int(idx.get("rollup_s", ROLLUP_S))
+    return all(t is None or float(t) % step == 0 for t in (since, until))
+
+def aggregate(path: Path, keep, group_by, aggs, since=None, until=None, events=None,
+              threads=None, where=(), use_index=True):
+    """Return rows (dicts) of grouped aggregates."""
+    rng = random.Random(0)
+    groups: dict[tuple, Agg] = {}
+    fields = sorted({f for _, f in aggs if f})
+    sampled = {f for fn, f in aggs if f and fn not in ("count", "sum", "mean", "min", "max")}
+    idx = load_index(path) if use_index else None
+    if _rollup_eligible(idx, group_by, aggs, since, until, threads, where):
+        events_s, threads_s = set(events or ()), set(threads or ())
+        for key, r in idx["rollup"].items():
+            b, ev, th = key.split("|", 2)
+            b = int(b)
+            if b < 0 and (since is not None or until is not None):
+                continue
+            if (since is not None and b < since) or (until is not None and b >= until):
+                continue
+            if (events_s and ev not in events_s) or (threads_s and th not in threads_s):
+                continue
+            vals = {"event": ev, "thread": th or None, "hour": _hour_iso(b) if b >= 0 else None}
+            gk = tuple(vals[g] for g in group_by)
+            agg = groups.get(gk) or groups.setdefault(gk, Agg(rng))
+            agg.merge_rollup(r)
+        ranges = [(int(idx["size"]), None)]
+    else:
+        ranges = list(scan_ranges(idx, since, until))
+    for start, end in ranges:
+        for _off, rec in iter_lines(path, start, end):
+            if not keep(rec):
+                continue
+            gk = tuple(record_thread(rec) if g == "thread" else _cell(field(rec, g)) for g in group_by)
+            agg = groups.get(gk)
+            if agg is None:
+                agg = groups[gk] = Agg(rng)
+            agg.count += 1
+            for f in fields:
+                v = _num(field(rec, f))
+                if v is not None:
+                    agg.add(f, v, f in sampled)
+    rows = []
+    for gk in sorted(groups, key=lambda k: tuple("" if x is None else str(x) for x in k)):
+        agg = groups[gk]
+        row = dict(zip(group_by, gk))
+        for fn, f in aggs:
+            row[_agg_column(fn, f)] = agg.value(fn, f)
+        rows.append(row)
+    return rows
+
+def _cell(v):
+    return json.dumps(v, sort_keys=True) if isinstance(v, (dict, list)) else v
+
+def stream(path: Path, keep, since=None, until=None, limit=None, use_index=True):
+    idx = load_index(path) if use_index else None
+    n = 0
+    for start, end in scan_ranges(idx, since, until):
+        for _off, rec in iter_lines(path, start, end):
+            if keep(rec):
+                yield rec
+                n += 1
+                if limit is not None and n >= limit:
+                    return
+
+# --- Output ---
+def write_jsonl(rows, out) -> int:
+    n = 0
+    for r in rows:
+        out.write(json.dumps(r, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+def write_csv(rows, out, columns=None) -> int:
+    """Columns come from --fields or the first row; later extra keys are dropped."""
+    it = iter(rows)
+    first = next(it, None)
+    if first is None:
+        return 0
+    cols = columns or list(first.keys())
+    w = csv.writer(out)
+    w.writerow(cols)
+    n = 0
+    for r in _chain(first, it):
+        w.writerow(["" if (v := _cell(field(r, c) if "." in c else r.get(c))) is None else v for c in cols])
+        n += 1
+    return n
+
+def _chain(first, it):
+    yield first
+    yield from it
+
+def write_table(rows, out, columns=None) -> int:
+    rows = list(rows)
+    if not rows:
+        out.write("(no rows)\n")
+        return 0
+    cols = columns or list(dict.fromkeys(k for r in rows for k in r))
+    def fmt(v):
+        v = _cell(v)
+        if v is None:
+            return ""
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+    cells = [[fmt(field(r, c) if "." in c else r.get(c)) for c in cols] for r in rows]
+    width = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(cols)]
+    out.write("  ".join(c.ljust(width[i]) for i, c in enumerate(cols)).rstrip() + "\n")
+    out.write("  ".join("─" * w for w in width) + "\n")
+    for row in cells:
+        out.write("  ".join(v.ljust(width[i]) for i, v in enumerate(row)).rstrip() + "\n")
+    return len(rows)
+
+def _project(rows, columns):
+    for r in rows:
+        yield {c: _cell(field(r, c)) for c in columns}
+
+# --- CLI ---
+def cmd_query(args) -> int:
+    path = Path(args.file) if args.file else SOURCES[args.source]
+    if not path.exists():
+        print(f"ERR: telemetry file not found: {path}", file=sys.stderr)
+        return 2
+    since = parse_time(args.since) if args.since else None
+    until = parse_time(args.until) if args.until else None
+    if (args.since and since is None) or (args.until and until is None):
+        print("ERR: --since/--until must be ISO-8601 or epoch seconds", file=sys.stderr)
+        return 2
+    try:
+        keep = build_filter(since, until, args.event, args.thread, args.where)
+        group_by = [g.strip() for g in (args.group_by or "").split(",") if g.strip()]
+        aggs = parse_aggs(args.agg) if args.agg else ([("count", None)] if group_by else [])
+    except ValueError as e:
+        print(f"ERR: {e}", file=sys.stderr)
+        return 2
+    columns = [c.strip() for c in args.fields.split(",")] if args.fields else None
+    if aggs:
+        rows = aggregate(path, keep, group_by, aggs, since, until, args.event, args.thread,
+                         args.where, use_index=not args.no_index)
+        if args.limit is not None:
+            rows = rows[:args.limit]
+    else:
+        limit = args.limit if args.limit is not None else (TABLE_ROWS if args.format == "table" else None)
+        rows = stream(path, keep, since, until, limit, use_index=not args.no_index)
+        if columns and args.format == "jsonl":
+            rows = _project(rows, columns)
+    out = sys.stdout
+    if args.format == "csv":
+        write_csv(rows, out, columns)
+    elif args.format == "table":
+        write_table(rows, out, columns)
+    else:
+        write_jsonl(rows, out)
+    return 0
+
+def cmd_index(args) -> int:
+    path = Path(args.file) if args.file else SOURCES[args.source]
+    if not path.exists():
+        print(f"ERR: telemetry file not found: {path}", file=sys.stderr)
+        return 2
+    idx = build_index(path, args.block)
+    print(json.dumps({"index": str(index_path(path)), "size": idx["size"],
+                      "blocks": len(idx["blocks"]), "rollup_keys": len(idx["rollup"])}, indent=2))
+    return 0
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="telemetry_query.py", description="Thoth OM — telemetry query")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_source(p):
+        p.add_argument("--source", choices=sorted(SOURCES), default="telemetry", help="Known log (default: telemetry)")
+        p.add_argument("--file", help="Explicit JSONL path (overrides --source)")
+
+    q = sp.add_parser("query", help="Stream, filter and aggregate records")
+    add_source(q)
+    q.add_argument("--since", help="Inclusive start (ISO-8601 or epoch seconds)")
+    q.add_argument("--until", help="Exclusive end (ISO-8601 or epoch seconds)")
+    q.add_argument("--event", action="append", help="Event type (repeatable); 'turn' = records without event")
+    q.add_argument("--thread", action="append", help="Thread id (repeatable)")
+    q.add_argument("--where", action="append", default=[], help="Field predicate, e.g. 'coherence<0.6' (repeatable)")
+    q.add_argument("--group-by", help="Comma list of fields (event, thread, hour, or dotted paths)")
+    q.add_argument("--agg", help="Comma list: count, sum|mean|min|max|median|pNN:<field>")
+    q.add_argument("--fields", help="Comma list of output columns")
+    q.add_argument("--format", choices=("jsonl", "csv", "table"), default="jsonl")
+    q.add_argument("--limit", type=int)
+    q.add_argument("--no-index", action="store_true", help="Ignore the time index and rollups")
+
+    ix = sp.add_parser("index", help="Build the time index + hourly rollups sidecar")
+    add_source(ix)
+    ix.add_argument("--block", type=int, default=INDEX_BLOCK, help="Records per index block")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "query":
+        return cmd_query(args)
+    return cmd_index(args)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from bff_engine import BFFEngine
+
+CORE = {"residuals": [0.05], "mirror_flags": []}
+NODES = [{"residuals": [0.1, 0.3]}, {"metrics": {"residual": 1.4}}, {"metrics": {"coherence": 0.7}},
+         {"residuals": [0.0], "mirror_flags": ["m"]}]
+
+
+def expected(residuals, flags, center=True, orbitals=0.88, bias=0.06):
+    r = [min(1.0, max(0.0, x)) for x in residuals]
+    f = [min(1.0, max(0.0, x)) for x in flags]
+    q = [1 - (a + b) / 2 for a, b in zip(r, f)]
+    w = [orbitals] * len(r)
+    if center:
+        w[-1] = 1.0
+    n = len(r) - 1 if center else len(r)
+    mean_q = sum(q[:n]) / n
+    std = (sum((x - mean_q) ** 2 for x in q[:n]) / n) ** 0.5
+    return {"coherence": 1 - (sum(r) + sum(f)) / (2 * len(r)),
+            "axial": sum(a * b for a, b in zip(w, q)) / sum(w),
+            "radial": 1 - min(1.0, std / 0.5),
+            "clarity": min(1.0, max(0.0, 1 - sum(f) / len(f) + bias))}
+
+
+def test_single_pass_matches_the_weighting_formulas():
+    eng = BFFEngine()
+    out = eng.synthesize(CORE, NODES)
+    # residuals: 0.2, 1.4 -> clipped 1.0, 1 - 0.7, 0.0; then the core
+    want = expected([0.2, 1.4, 0.3, 0.0, 0.05], [0, 0, 0, 1, 0])
+    assert out["bff_packet"]["coherence"] == pytest.approx(want["coherence"], abs=1e-6)
+    assert out["bff_packet"]["residuals"] == pytest.approx((0.2 + 1.0 + 0.3 + 0.0 + 0.05) / 5, abs=1e-6)
+    sig = out["bff_signature"]
+    for k in ("axial", "radial", "clarity"):
+        assert sig[k] == pytest.approx(want[k], abs=1e-6)
+    assert out["bff_packet"]["risks"] == []
+    assert sig["braid_quality"] == "stable" and sig["learning_delta"] == 0.0
+
+
+def test_ewma_carries_across_turns_per_stream():
+    eng = BFFEngine({"smooth_window": 3})                   # alpha = 0.5
+    good = [{"residuals": [0.0]}] * 4
+    bad = [{"residuals": [0.8]}] * 4
+    c1 = eng.synthesize(CORE, good, stream="t1")["bff_signature"]["coherence_smoothed"]
+    raw = eng.synthesize(CORE, bad, stream="t2")["bff_packet"]["coherence"]
+    out = eng.synthesize(CORE, bad, stream="t1")
+    assert out["bff_packet"]["coherence"] == pytest.approx(raw)        # the packet stays raw
+    assert out["bff_signature"]["coherence_smoothed"] == pytest.approx(c1 + 0.5 * (raw - c1), abs=1e-6)
+    assert out["bff_signature"]["learning_delta"] == pytest.approx(0.5 * (raw - c1), abs=1e-6)
+    assert eng.state["t1"]["turns"] == 2 and eng.state["t2"]["turns"] == 1
+
+
+def test_equal_inputs_give_equal_outputs():
+    a, b = BFFEngine(), BFFEngine()
+    for _ in range(3):
+        x, y = a.synthesize(CORE, NODES), b.synthesize(CORE, NODES)
+        x["bff_packet"].pop("time_ms"), y["bff_packet"].pop("time_ms")
+        assert x == y
+    assert x["bff_signature"]["coherence_hash"] == y["bff_signature"]["coherence_hash"]
+
+
+def test_empty_and_full_inputs():
+    eng = BFFEngine()
+    empty = eng.synthesize(None, [])
+    assert empty["bff_packet"]["coherence"] == 0.0
+    assert empty["bff_packet"]["risks"] == ["low_coherence", "missing_severance_core"]
+    assert empty["bff_packet"]["route_back"] == "N05"
+    assert empty["bff_signature"]["braid_quality"] == "insufficient"
+
+    nodes = [{"residuals": [0.01 * i]} for i in range(12)]
+    full = eng.synthesize(CORE, nodes, stream="full")          # "-" already holds the empty turn
+    want = expected([0.01 * i for i in range(12)] + [0.05], [0] * 13)
+    assert full["bff_packet"]["coherence"] == pytest.approx(want["coherence"], abs=1e-6)
+    assert full["bff_signature"]["radial"] == pytest.approx(want["radial"], abs=1e-6)
+    with pytest.raises(ValueError):
+        eng.synthesize(CORE, nodes + [{"residuals": [0.0]}])
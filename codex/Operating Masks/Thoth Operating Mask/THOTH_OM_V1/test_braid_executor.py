@@ -0,0 +1,49 @@
+import asyncio
+
+from braid_executor import BraidExecutor, Limits
+
+
+def executor(coherence=None, **limits):
+    coherence = coherence or {}
+    ex = BraidExecutor(Limits(**{"cooldown_s": 0.0, **limits}),
+                       hooks={"after_each_gate": ["harmonizers.apply", "trace.note"]})
+    for g in ex.sequence:
+        out = {"payload": {"x": 1}, "metrics": {"coherence": coherence.get(g, 0.9)}}
+        ex.register(g, lambda packet, ctx, out=out: out)
+    return ex
+
+
+def run(ex, packet=None):
+    return asyncio.run(ex.run(packet or {"x": 1}))
+
+
+def test_gate_outputs_are_not_mutated():
+    ex = executor()
+    shared = {"payload": {"x": 1}, "metrics": {"coherence": 0.9}}
+    ex.register("G3", lambda packet, ctx: shared)
+    rec = run(ex)
+    assert "ts" not in shared
+    assert "ts" in rec["outputs"]["G3"]
+
+
+def test_unregistered_hooks_are_reported_once(capsys):
+    ex = executor()
+    seen = []
+    ex.register_hook("harmonizers.apply", lambda gate, out, ctx: seen.append(gate))
+    run(ex)
+    run(ex)
+    err = capsys.readouterr().err
+    assert err.count("'trace.note'") == 1 and "harmonizers.apply" not in err
+    assert len(seen) == 14
+
+
+def test_early_severance_skips_downstream_gates():
+    rec = run(executor({"G3": 0.1}))
+    assert rec["status"] == "severed"
+    assert rec["skipped"] == ["G4", "G5", "G6", "G7"] and rec["executed"] == 3
+
+
+def test_total_cap_stops_the_braid():
+    rec = run(executor(total_cap=4))
+    assert rec["status"] == "capped" and rec["executed"] == 4
+    assert rec["skipped"] == ["G5", "G6", "G7"] and rec["bff"] is None
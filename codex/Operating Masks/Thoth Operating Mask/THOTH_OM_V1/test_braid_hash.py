@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+from braid_hash import BraidHasher, coherence_hash, encode
+from gate_memo import GateMemo
+
+
+def test_key_order_and_float_forms_are_canonical():
+    assert coherence_hash({"a": 1.0, "b": [0.5, -0.0]}) == coherence_hash({"b": [0.5, 0.0], "a": 1.0})
+    assert coherence_hash(float("nan")) == coherence_hash(-math.nan)
+    assert coherence_hash(1) != coherence_hash(1.0) != coherence_hash("1")
+    assert coherence_hash([1, 2]) == coherence_hash((1, 2))
+
+
+def test_incremental_hasher_matches_full_hash():
+    state = {f"G{i}": {"residuals": [i / 10, 0.1], "metrics": {"coherence": 0.9}} for i in range(1, 8)}
+    h = BraidHasher(state)
+    state["G4"]["metrics"]["coherence"] = 0.42
+    h.set("G4", state["G4"])
+    assert h.hexdigest() == coherence_hash(state)
+    h.drop("G7")
+    del state["G7"]
+    assert h.hexdigest() == coherence_hash(state)
+
+
+def test_numpy_values_are_tagged_not_stringified():
+    np = pytest.importorskip("numpy")
+    assert coherence_hash(np.int64(1)) != coherence_hash("1")
+    assert coherence_hash(np.int64(1)) != coherence_hash(np.int32(1))
+    a = np.zeros(2000)
+    b = a.copy()
+    b[1000] = 1.0
+    assert coherence_hash(a) != coherence_hash(b)          # repr() of both is "[0. 0. ... 0.]"
+    assert coherence_hash(a.reshape(40, 50)) != coherence_hash(a)
+    assert coherence_hash(np.arange(3)) == coherence_hash(np.array([0, 1, 2]))
+
+
+def test_unknown_types_raise():
+    with pytest.raises(TypeError):
+        encode({1, 2})
+    with pytest.raises(TypeError):
+        coherence_hash({"x": object()})
+
+
+def test_memo_keys_distinguish_large_arrays():
+    np = pytest.importorskip("numpy")
+    a = np.zeros(2000)
+    b = a.copy()
+    b[5] = 1.0
+    assert GateMemo.key("G1", {"x": a}, "v") != GateMemo.key("G1", {"x": b}, "v")
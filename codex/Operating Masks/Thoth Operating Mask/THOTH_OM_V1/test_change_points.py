@@ -0,0 +1,45 @@
+import random
+
+from change_points import DEFAULTS, DriftDetector
+
+
+def feed(det, xs, thread="T1"):
+    return [a for a in (det.update(thread, x) for x in xs) if a]
+
+
+def noisy(mean, n, seed=1):
+    rng = random.Random(seed)
+    return [mean + rng.uniform(-0.01, 0.01) for _ in range(n)]
+
+
+def test_stable_coherence_raises_no_alarm():
+    assert feed(DriftDetector(state_path=None), noisy(0.8, 500)) == []
+
+
+def test_cusum_flags_a_drop_and_resets():
+    det = DriftDetector(state_path=None)
+    feed(det, noisy(0.8, 20))
+    alarms = feed(det, [0.7, 0.7])
+    assert [a["detector"] for a in alarms] == ["cusum"]
+    assert alarms[0]["turns"] == 21                          # the first low turn joined the baseline
+    assert alarms[0]["baseline"] == round((sum(noisy(0.8, 20)) + 0.7) / 21, 4)
+    assert det.threads["T1"][:2] == [1, 0.7]                 # new regime starts at the drop
+    assert feed(det, [0.7] * 50) == []
+
+
+def test_page_hinkley_flags_a_drop_cusum_tolerates():
+    det = DriftDetector({**DEFAULTS, "cusum": {"k": 0.02, "h": 99.0}}, state_path=None)
+    feed(det, [0.8] * 20)
+    alarms = feed(det, [0.72] * 5)
+    assert alarms and alarms[0]["detector"] == "page_hinkley" and alarms[0]["turns"] == 23
+
+
+def test_threads_are_independent_and_state_persists(tmp_path):
+    path = tmp_path / "cp.json"
+    det = DriftDetector({**DEFAULTS, "persist_every": 1}, state_path=path)
+    feed(det, [0.8] * 20, "A")
+    feed(det, [0.5] * 20, "B")
+    assert feed(det, [0.5], "B") == []
+    again = DriftDetector(state_path=path)
+    assert again.threads == det.threads
+    assert [a["thread"] for a in feed(again, [0.5, 0.5], "A")] == ["A"]
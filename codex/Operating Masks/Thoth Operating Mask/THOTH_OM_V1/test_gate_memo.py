@@ -0,0 +1,93 @@
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from gate_memo import GateMemo
+
+
+def test_wrap_turns_repeat_calls_into_hits():
+    memo, calls = GateMemo(capacity=8), []
+
+    def gate(packet, ctx):
+        calls.append(packet["x"])
+        return {"payload": {"x": packet["x"] * 2}, "ts": "now"}
+
+    fn = memo.wrap("G1", gate, thresholds={"a": 1})
+    outs = [asyncio.run(fn({"x": x}, {})) for x in (1, 2, 1)]
+    assert calls == [1, 2]
+    assert outs[2] == {"payload": {"x": 2}}            # stored without its ts
+    assert memo.metrics()["hits_mem"] == 1 and memo.metrics()["misses"] == 2
+
+
+def test_key_changes_with_thresholds_and_harmonizer_state():
+    k = GateMemo.key("G1", {"x": 1}, "v1", {"h": 1})
+    assert k != GateMemo.key("G1", {"x": 1}, "v2", {"h": 1})
+    assert k != GateMemo.key("G1", {"x": 1}, "v1", {"h": 2})
+    assert k != GateMemo.key("G2", {"x": 1}, "v1", {"h": 1})
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    memo = GateMemo(capacity=2, disk_dir=tmp_path)
+    for i in range(3):
+        memo.put(f"k{i}", {"i": i})
+    assert list(memo.mem) == ["k1", "k2"] and memo.stats["evict_mem"] == 1
+    assert memo.get("k0") == {"i": 0} and memo.stats["hits_disk"] == 1
+    fresh = GateMemo(capacity=2, disk_dir=tmp_path)     # disk tier survives a restart
+    assert fresh.get("k2") == {"i": 2}
+
+
+def test_disk_tier_stays_under_its_budget(tmp_path):
+    memo = GateMemo(capacity=1, disk_dir=tmp_path, disk_max_bytes=200)
+    for i in range(20):
+        memo.put(f"k{i:02d}", {"v": "x" * 40})
+    assert memo.stats["disk_bytes"] <= 200 and memo.stats["evict_disk"] > 0
+    assert memo.get("k00") is None and memo.get("k19") is not None
+
+
+def engine_root(tmp_path, memo_enabled):
+    here = Path(__file__).parent
+    (tmp_path / "engine").mkdir(parents=True)
+    (tmp_path / "runtime").mkdir()
+    shutil.copy(here / "Thoth_engine_1.0.yaml", tmp_path / "engine" / "Thoth_engine_1.0.yaml")
+    shutil.copy(here / "thresholds_1.1.yaml", tmp_path / "thresholds_1.1.yaml")
+    (tmp_path / "runtime" / "runtime.yaml").write_text(f"memo: {{enabled: {str(memo_enabled).lower()}}}\n")
+    return tmp_path
+
+
+def test_load_executor_memoizes_registered_gates(tmp_path):
+    pytest.importorskip("yaml")
+    from braid_executor import load_executor
+    for enabled, expected in ((True, 7), (False, 14)):
+        ex = load_executor(engine_root(tmp_path / str(enabled), enabled), profile="default")
+        ex.limits = ex.limits._replace(cooldown_s=0.0)
+        calls = []
+        for g in ex.sequence:
+            ex.register(g, lambda packet, ctx, g=g: calls.append(g) or
+                        {"payload": {"x": 1}, "metrics": {"coherence": 0.9}})
+        a, b = (asyncio.run(ex.run({"x": 1})) for _ in range(2))
+        assert len(calls) == expected
+        assert a["coherence_hash"] == b["coherence_hash"] and b["status"] == "completed"
+        assert (ex.memo is not None) is enabled
+
+
+def test_bff_memo_keys_on_inputs_and_ewma_state():
+    from bff_engine import BFFEngine
+    outs = {g: {"residuals": [0.1 * i], "mirror_flags": [], "ts": str(i)} for i, g in enumerate(
+        ("G1", "G2", "G3", "G4", "G5", "G6", "G7"))}
+    memo, plain = GateMemo(capacity=8), BFFEngine()
+    eng = BFFEngine()
+    step, ref = eng.executor_step(memo=memo), plain.executor_step()
+    ctx = {"session_id": "s1"}
+    seq = [outs, outs, {**outs, "G3": {"residuals": [0.5]}}]
+    got = [step(o, ctx) for o in seq]
+    want = [ref(o, ctx) for o in seq]
+    for g, w in zip(got, want):
+        assert g["bff_signature"] == w["bff_signature"]
+    assert memo.metrics()["misses"] == 3                 # same inputs, different EWMA state
+    eng.state.clear()
+    again = [step(o, ctx) for o in seq]                   # replay from a fresh stream: all hits
+    assert memo.metrics()["hits_mem"] == 3
+    assert [a["bff_signature"] for a in again] == [g["bff_signature"] for g in got]
+    assert eng.state == plain.state
@@ -0,0 +1,50 @@
+from harmonizer_scheduler import HarmonizerScheduler, TimingWheel
+
+
+def scheduler(**cfg):
+    base = {"max_simultaneous": 3, "cooldown_s": 1.0, "ensure_family_coverage": True,
+            "families": {"tone": {"members": ["a", "b", "c"], "max_parallel": 2},
+                         "form": {"members": ["x", "y"], "max_parallel": 2}},
+            "hooks": {"on_stable": ["a", "b", "c", "x", "y"], "on_incoherent": ["a", "x", "y"]}}
+    clock = [0.0]
+    return HarmonizerScheduler({**base, **cfg}, clock=lambda: clock[0]), clock
+
+
+def test_timing_wheel_expires_keys_after_their_deadline():
+    w = TimingWheel(tick_s=0.5, slots=8)
+    w.advance(0.0)
+    w.arm("k", 1.2)
+    assert w.cooling("k", 1.0)
+    assert w.advance(1.1) == 0 and "k" in w.expiry
+    assert w.advance(1.6) == 1 and not w.cooling("k", 1.6)
+    w.arm("j", 2.0)
+    assert w.advance(100.0) == 1 and w.expiry == {}      # jump past a whole revolution
+
+
+def test_caps_and_family_coverage():
+    sch, _ = scheduler()
+    got = sch.select("on_stable", "s1")
+    assert len(got) == 3 and {"x", "y"} & set(got) and {"a", "b", "c"} & set(got)
+    assert sch.select("on_stable", "s2") == []             # max_simultaneous is process-wide
+    assert sch.stats["denied_cap"] == 1
+
+
+def test_rotation_and_cooldown():
+    sch, clock = scheduler(max_simultaneous=1, families={"tone": {"members": ["a", "b", "c"]}},
+                           hooks={"on_stable": ["a", "b", "c"]})
+    order = []
+    for _ in range(3):
+        order += sch.select("on_stable", "s1")
+        sch.release("s1")
+    assert order == ["a", "b", "c"]                        # equal priority: round-robin
+    assert sch.select("on_stable", "s1") == [] and sch.stats["denied_cooldown"] == 3
+    clock[0] = 1.5
+    assert sch.select("on_stable", "s1") == ["a"]
+
+
+def test_force_serial_is_not_counted_as_a_cap_denial():
+    sch, _ = scheduler(force_serial_on_incoherent=True)
+    assert len(sch.select("on_incoherent", "s1")) == 1
+    assert sch.select("on_incoherent", "s1") == []
+    assert sch.stats["denied_serial"] == 1 and sch.stats["denied_cap"] == 0
+    assert len(sch.select("on_incoherent", "s2")) == 1     # other sessions are not serialized
@@ -0,0 +1,44 @@
+import json
+
+from learning_journal import LearningJournal
+
+
+def lines(path):
+    return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_journal_never_exceeds_retention(tmp_path):
+    j = LearningJournal(tmp_path / "log.jsonl", keep_last=5)
+    for i in range(23):
+        j.append({"i": i})
+        assert len(lines(j.path)) == min(i + 1, 5)
+    assert [e["i"] for e in j.entries()] == [18, 19, 20, 21, 22]
+    assert [e["i"] for e in j.entries(2)] == [21, 22]
+
+
+def test_index_survives_a_new_instance_and_a_torn_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    j = LearningJournal(path, keep_last=3)
+    for i in range(4):
+        j.append({"i": i})
+    with path.open("ab") as f:
+        f.write(b'{"i": 9')                        # crash mid-write
+    again = LearningJournal(path, keep_last=3)
+    assert [e["i"] for e in again.entries()] == [1, 2, 3]
+    again.append({"i": 4})
+    assert [e["i"] for e in lines(path)] == [2, 3, 4]
+
+
+def test_shorter_retention_compacts_an_existing_journal(tmp_path):
+    path = tmp_path / "log.jsonl"
+    j = LearningJournal(path, keep_last=10)
+    for i in range(8):
+        j.append({"i": i})
+    assert [e["i"] for e in LearningJournal(path, keep_last=3).entries()] == [5, 6, 7]
+    assert len(lines(path)) == 3
+    j = LearningJournal(path, keep_last=10)
+    for i in range(8, 12):
+        j.append({"i": i})
+    j.index_path.unlink()                          # rebuilt from the file
+    assert [e["i"] for e in LearningJournal(path, keep_last=2).entries()] == [10, 11]
+    assert len(lines(path)) == 2
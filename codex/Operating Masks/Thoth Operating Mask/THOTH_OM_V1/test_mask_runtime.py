@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "Lunar"))
+
+import mask_runtime as mr
+
+THR = ("thresholds:\n"
+       "  meta_gate: {coherence: {warn_below: 0.70, sever_below: 0.30}}\n"
+       "  gates:\n"
+       "    triggers: {call_harmonizers_below: 0.55, early_severance_below: 0.28}\n"
+       "    profiles: {strict: {call_harmonizers_below: 0.60}}\n")
+
+
+@pytest.fixture
+def root(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "runtime").mkdir()
+    (tmp_path / "runtime" / "lunar_nudge.yaml").write_text("enabled: true\nlog: false\n")
+    (tmp_path / "thresholds_1.1.yaml").write_text(THR)
+    mr.invalidate_threshold_variants()
+    mr._LUNAR.clear()
+    yield tmp_path
+    mr.invalidate_threshold_variants()
+    mr._LUNAR.clear()
+
+
+def test_variants_are_built_once_and_frozen(root):
+    a = mr.adjust_thresholds_with_lunar(project_root=root, profile="strict")
+    assert mr.adjust_thresholds_with_lunar(project_root=root, profile="strict") is a
+    idx = mr.compute_lunar_nudges(root)["phase_index"]
+    thr, version = mr.load_thresholds(root)
+    assert mr.threshold_variants(thr, version, "strict", (0.85, 1.15))[idx] is a
+    with pytest.raises(TypeError):
+        a["thresholds"]["gates"]["triggers"]["early_severance_below"] = 0.0
+    plain = mr.thaw(a)
+    plain["thresholds"]["gates"]["triggers"]["early_severance_below"] = 0.0
+    assert a["thresholds"]["gates"]["triggers"]["early_severance_below"] != 0.0
+
+
+def test_variants_match_a_fresh_apply(root):
+    ln = mr.compute_lunar_nudges(root)
+    thr, _ = mr.load_thresholds(root)
+    expected = mr.apply_lunar_nudges(mr._with_profile(thr, "strict"), ln)
+    assert mr.thaw(mr.adjust_thresholds_with_lunar(project_root=root, profile="strict")) == expected
+
+
+def test_rewriting_thresholds_drops_the_old_variants(root):
+    a = mr.adjust_thresholds_with_lunar(project_root=root)
+    _, old = mr.load_thresholds(root)
+    p = root / "thresholds_1.1.yaml"
+    p.write_text(THR.replace("0.28", "0.25"))
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    b = mr.adjust_thresholds_with_lunar(project_root=root)
+    assert b is not a
+    assert not any(k[0] == old for k in mr._VARIANTS)
+    assert mr.thaw(b)["thresholds"]["gates"]["triggers"]["early_severance_below"] != \
+        mr.thaw(a)["thresholds"]["gates"]["triggers"]["early_severance_below"]
+
+
+def test_passed_dicts_are_versioned_by_identity(root, monkeypatch):
+    thr, _ = mr.load_thresholds(root)
+    mine = mr.thaw(thr)
+    monkeypatch.setattr(mr.json, "dumps", lambda *a, **k: pytest.fail("thresholds were serialized"))
+    a = mr.adjust_thresholds_with_lunar(mine, root)
+    assert mr.adjust_thresholds_with_lunar(mine, root) is a
+    assert mr.adjust_thresholds_with_lunar(mr.thaw(thr), root) is not a
+    mine["thresholds"]["gates"]["triggers"]["early_severance_below"] = 0.1
+    mr.invalidate_threshold_variants(("id", id(mine)))
+    assert mr.adjust_thresholds_with_lunar(mine, root) is not a
+    assert mr.adjust_thresholds_with_lunar(mine, root, version="v2") is not a
+
+
+def test_disabled_lunar_returns_the_frozen_thresholds(root):
+    (root / "runtime" / "lunar_nudge.yaml").write_text("enabled: false\n")
+    thr, _ = mr.load_thresholds(root)
+    out = mr.adjust_thresholds_with_lunar(project_root=root)
+    assert mr.thaw(out) == thr
+    with pytest.raises(TypeError):
+        out["thresholds"] = {}
+
+
+def lunar_events(root):
+    tp = root / "thread" / "telemetry.jsonl"
+    lines = tp.read_text().splitlines() if tp.exists() else []
+    return [json.loads(l)["reason"] for l in lines if '"lunar_nudge"' in l]
+
+
+def test_lunar_policy_is_reparsed_only_when_its_stat_changes(root, monkeypatch):
+    calls = []
+    load = mr._load_yaml
+    monkeypatch.setattr(mr, "_load_yaml", lambda p: calls.append(p) or load(p))
+    for _ in range(5):
+        mr.compute_lunar_nudges(root)
+    assert len(calls) == 1
+    p = root / "runtime" / "lunar_nudge.yaml"
+    p.write_text("enabled: true\nlog: false\ncaps: {min: 0.9, max: 1.1}\n")
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert mr.compute_lunar_nudges(root)["caps"] == [0.9, 1.1]
+    assert len(calls) == 2
+    p.unlink()
+    assert mr.compute_lunar_nudges(root) is None and str(root) not in mr._LUNAR
+
+
+def test_lunar_event_is_logged_on_change_and_heartbeat_only(root):
+    p = root / "runtime" / "lunar_nudge.yaml"
+    p.write_text("enabled: true\nlog: true\nheartbeat: 1h\n")
+    for _ in range(3):
+        mr.compute_lunar_nudges(root)
+    assert lunar_events(root) == ["change"]
+    mr._LUNAR[str(root)]["logged_at"] -= 3601
+    mr.compute_lunar_nudges(root)
+    mr.compute_lunar_nudges(root)
+    assert lunar_events(root) == ["change", "heartbeat"]
+    p.write_text("enabled: true\nlog: true\nheartbeat: 1h\ncaps: {min: 0.9, max: 1.1}\n")
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    mr.compute_lunar_nudges(root)
+    assert lunar_events(root) == ["change", "heartbeat", "change"]
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from metatron_router import MetaGateRouter, RouterError
+
+AFFINITY = "setup → G1,G2\nfix → G10,G3\nbridge → G5"
+
+
+def spec(gates=("G1", "G10", "G2", "G3", "G5")):
+    return {"metagate": {"gates": [{"id": g} for g in gates],
+                         "routing_rules": [{"name": "tag-affinity", "description": AFFINITY}]}}
+
+
+def test_score_ties_break_on_gate_id():
+    r = MetaGateRouter(spec(("G10", "G3", "G2", "G1", "G5")))
+    out = r.route([{"id": "n1", "priority": 50, "tags": ["setup"]},
+                   {"id": "n2", "priority": 50, "tags": ["fix"]}])
+    assert out["gate_order"] == ["G1", "G2", "G3", "G10", "G5"]
+    assert r.route([])["gate_order"] == ["G1", "G2", "G3", "G5", "G10"]
+
+
+def test_priority_and_coherence_bump():
+    r = MetaGateRouter(spec())
+    hints = [{"id": "n1", "priority": 90, "tags": ["bridge"]}, {"id": "n2", "priority": 10, "tags": ["setup"]}]
+    out = r.route(hints)
+    assert out["gate_order"][0] == "G5"
+    assert out["routing_log"]["gate_scores"]["G5"] == pytest.approx(1.9)
+    assert not out["routing_log"]["coherence_bump_applied"]
+    bumped = r.route(hints, coherence=0.5)
+    assert bumped["routing_log"]["coherence_bump_applied"]
+    assert bumped["routing_log"]["gate_scores"]["G3"] == pytest.approx(0.15)
+
+
+def test_unknown_affinity_gate_is_rejected():
+    with pytest.raises(RouterError):
+        MetaGateRouter(spec(("G1", "G2")))
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from patch_log import PatchLog
+from telemetry_query import parse_time
+
+PATH = "thresholds.gates.profiles.strict.call_harmonizers_below"
+
+
+def change(before, after, path=PATH, profile="strict"):
+    return {"path": path, "profile": profile, "before": before, "after": after}
+
+
+def patch(ts, *changes, applied=True):
+    return {"meta": {"ts": ts, "verdict": "penalty", "samples": 40}, "proposals": list(changes), "applied": applied}
+
+
+def doc(v):
+    return {"thresholds": {"gates": {"profiles": {"strict": {"call_harmonizers_below": v}}}}}
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = PatchLog(tmp_path / "patches.jsonl")
+    log.append(patch("2025-10-10T00:00:00Z", change(0.60, 0.62)))
+    log.append(patch("2025-10-11T00:00:00Z", change(0.62, 0.64),
+                     change(0.5, 0.4, path="thread.T42.call_harmonizers_below", profile="T42")))
+    log.append(patch("2025-10-11T12:00:00Z", change(0.64, 0.70), applied=False))
+    log.append(patch("2025-10-12T00:00:00Z", change(0.64, 0.66)))
+    return log
+
+
+def test_state_at_rewinds_and_replays_applied_changes(log):
+    for ts, want in (("2025-10-09", 0.60), ("2025-10-10T00:00:00Z", 0.62),
+                     ("2025-10-11T18:00:00Z", 0.64), ("2025-10-13", 0.66)):
+        t = parse_time(ts)
+        assert log.state_at(t, current=doc(0.66)) == doc(want)      # the dry run is never applied
+        assert log.state_at(t, base=doc(0.60)) == doc(want)
+    current = doc(0.66)
+    log.state_at(parse_time("2025-10-09"), current=current)
+    assert current == doc(0.66)                                      # inputs are not mutated
+
+
+def test_query_filters_by_time_profile_and_key(log):
+    assert [e["seq"] for e in log.query(profile="strict")] == [0, 1, 2, 3]
+    assert [e["seq"] for e in log.query(profile="T42")] == [1]
+    assert [e["seq"] for e in log.query(key="gates.profiles.strict.call_harmonizers_below", applied_only=True)] == [0, 1, 3]
+    assert [e["seq"] for e in log.query(since=parse_time("2025-10-11"), until=parse_time("2025-10-11T23:00:00Z"))] == [1, 2]
+
+
+def test_index_is_rebuilt_when_missing_stale_or_torn(log):
+    want = log.query()
+    log.index_path.unlink()
+    assert PatchLog(log.path).query() == want
+
+    log.index_path.write_text(json.dumps({"size": 1, "offsets": []}))  # stale: size does not match
+    assert PatchLog(log.path).query(profile="T42") == [want[1]]
+
+    size = log.path.stat().st_size
+    with log.path.open("ab") as f:
+        f.write(b'{"seq":4,"ts":"2025-10-13T00:00')                  # crash mid-write
+    fresh = PatchLog(log.path)
+    assert fresh.query() == want
+    assert log.path.stat().st_size == size                             # the torn line is dropped
+    assert fresh.append(patch("2025-10-13T00:00:00Z", change(0.66, 0.68)))["seq"] == 4
+    assert [e["seq"] for e in PatchLog(log.path).query()] == [0, 1, 2, 3, 4]
+
+
+def test_empty_and_repeated_dry_run_patches_are_not_logged(tmp_path):
+    log = PatchLog(tmp_path / "patches.jsonl")
+    assert log.append(patch("2025-10-10T00:00:00Z")) is None
+    assert log.append(patch("2025-10-10T00:00:00Z", change(0.6, 0.6))) is None    # before == after
+    assert not log.path.exists()
+
+    dry = change(0.60, 0.62)
+    assert log.append(patch("2025-10-10T00:00:00Z", dry, applied=False))["seq"] == 0
+    assert log.append(patch("2025-10-10T01:00:00Z", dry, applied=False)) is None
+    assert log.append(patch("2025-10-10T02:00:00Z", change(0.60, 0.61), applied=False))["seq"] == 1
+    assert log.append(patch("2025-10-10T03:00:00Z", dry, applied=False))["seq"] == 2   # only the last one counts
+    assert log.append(patch("2025-10-10T04:00:00Z", dry))["seq"] == 3                  # applying is always logged
+    assert log.append(patch("2025-10-10T05:00:00Z", dry, applied=False))["seq"] == 4
+    assert PatchLog(log.path).append(patch("2025-10-10T06:00:00Z", dry, applied=False)) is None  # survives reload
@@ -0,0 +1,110 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from braid_executor import BraidExecutor, Limits
+from rebraid import Policy, Rebraider
+
+
+def make(total_cap=7, distort=None, fixed_after=1, coherence=None, repeat=(), budget=None, limits=None,
+         policy=None):
+    """Executor whose gates report `distort[g]` for their first `fixed_after` calls."""
+    distort, coherence = distort or {}, coherence or {}
+    calls = []
+    ex = BraidExecutor(limits or Limits(total_cap=total_cap, max_gate_iterations=2, cooldown_s=0.0,
+                                        early_severance_below=0.28))
+
+    def gate(g):
+        def fn(packet, ctx):
+            calls.append(g)
+            n = calls.count(g)
+            d = distort.get(g, 0.001) if n <= fixed_after else 0.001
+            payload = {k: v for k, v in packet.items() if k != "rebraid"}
+            coh = coherence.get(g, 0.95) if n > 1 else 0.95
+            # `repeat` gates ask for one more iteration on their first rebraid call
+            return {"payload": payload, "distortion": d, "metrics": {"coherence": coh},
+                    "repeat": g in repeat and "rebraid" in packet and n == 2}
+        return fn
+    for g in ex.sequence:
+        ex.register(g, gate(g))
+    return Rebraider(ex, (policy or Policy())._replace(budget=budget)), calls
+
+
+def run(rb, packet=None):
+    return asyncio.run(rb.run(packet or {"x": 1}))
+
+
+def test_only_failing_orbital_and_changed_dependents_rerun():
+    rb, calls = make(distort={"G4": 0.02})
+    rec = run(rb)
+    assert rec["rebraid"]["status"] == "clean"
+    # G4's output payload is unchanged, so G5..G7 keep their cached outputs
+    assert calls == ["G1", "G2", "G3", "G4", "G5", "G6", "G7", "G4"]
+    assert rec["rebraid"]["attempts"][0]["reused"] == ["G1", "G2", "G3", "G5", "G6", "G7"]
+    assert rec["executed"] == 8
+
+
+def test_rebraid_budget_sits_on_top_of_a_full_braid():
+    rb, calls = make(distort={"G4": 0.02}, fixed_after=99)
+    rec = run(rb)
+    assert len(rec["rebraid"]["attempts"]) == 3        # total_cap 7 is spent by the braid itself
+    assert rec["executed"] == 10 and rec["rebraid"]["status"] == "escaped"
+
+
+def test_spent_budget_goes_straight_to_the_escape_decision():
+    rb, calls = make(distort={"G4": 0.02}, budget=0)
+    rec = run(rb)
+    assert len(calls) == 7 and rec["executed"] == 7
+    assert rec["rebraid"]["status"] in ("escaped", "halted")
+    assert rec["rebraid"]["reason"] == "budget"
+
+
+def test_budget_hit_mid_attempt_halts():
+    rb, calls = make(distort={"G3": 0.02, "G5": 0.02}, budget=1)
+    rec = run(rb)
+    assert rec["executed"] == 8 and len(calls) == 8
+    assert rec["rebraid"]["status"] == "halted" and rec["status"] == "halted"
+    assert rec["bff"] is None
+
+
+def test_rerun_below_severance_severs_the_session():
+    rb, _ = make(distort={"G3": 0.02}, coherence={"G3": 0.1})
+    rec = run(rb)
+    assert rec["rebraid"]["status"] == "severed"
+    assert rec["status"] == "severed"
+    assert rec["skipped"] == ["G4", "G5", "G6", "G7"]
+
+
+def test_rerun_honors_repeat():
+    rb, calls = make(distort={"G4": 0.02}, repeat=("G4",))
+    rec = run(rb)
+    assert calls.count("G4") == 3                # braid, rebraid, its repeat
+    assert [t["iteration"] for t in rec["trace"] if t["gate"] == "G4"] == [1, 1, 2]
+
+
+def test_escape_skips_single_orbital_after_max_attempts():
+    rb, calls = make(distort={"G6": 0.02}, fixed_after=99)
+    rec = run(rb)
+    rep = rec["rebraid"]
+    assert len(rep["attempts"]) == 3
+    assert rep["status"] == "escaped" and rep["skipped_orbital"] == "G6"
+
+
+def test_halt_when_escape_does_not_apply():
+    rb, _ = make(distort={"G5": 0.02, "G6": 0.02}, fixed_after=99)
+    rec = run(rb)
+    assert rec["rebraid"]["status"] == "halted"
+    assert rec["rebraid"]["action"] == "halt_with_report"
+
+
+def test_shipped_thresholds_leave_room_to_rebraid():
+    yaml = pytest.importorskip("yaml")
+    thr = yaml.safe_load((Path(__file__).parent / "thresholds_1.1.yaml").read_text(encoding="utf-8"))
+    limits = Limits.from_thresholds(thr)._replace(cooldown_s=0.0)
+    policy = Policy.from_thresholds(thr)
+    assert limits.total_cap == 7 and policy.max_attempts == 3 and policy.budget is None
+    rb, calls = make(distort={"G3": 0.02}, limits=limits, policy=policy)
+    rec = run(rb)
+    assert rec["rebraid"]["status"] == "clean" and "reason" not in rec["rebraid"]
+    assert calls[7:] == ["G3"] and rec["executed"] == 8
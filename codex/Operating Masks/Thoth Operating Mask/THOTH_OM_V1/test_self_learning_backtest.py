@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from self_learning_backtest import simulate
+from self_learning_evaluator import BUCKET_S
+
+NOW = 1760745600
+SL = {"schedule": {"window": "1h"}, "metrics": {"min_samples": 5},
+      "partition": {"by": ["profile"]},
+      "adjustments": [{"when": "penalty", "do": ["routing.call_harmonizers_below += 0.02"]}]}
+THR = {"thresholds": {"gates": {"profiles": {"strict": {"call_harmonizers_below": 0.60}}}}}
+
+
+def bucket(coherence, n=10):
+    return [n, n, n, n * coherence, n * coherence ** 2, n, n * 0.2, n * 0.04]
+
+
+def test_bucket_starting_at_the_decision_time_is_not_seen():
+    past = {str(NOW - BUCKET_S * i): bucket(0.9) for i in range(1, 7)}
+    parts = {"T1|strict": {**past, str(NOW): bucket(0.1, n=1000)}}
+    res = simulate("baseline", SL, parts, THR, [float(NOW)])
+    assert res["verdicts"]["*|strict"] == {"reward": 1}
+    assert res["changes"] == 0
+
+
+def test_bucket_that_ended_at_the_decision_time_is_seen():
+    parts = {"T1|strict": {str(NOW - BUCKET_S): bucket(0.1, n=1000)}}
+    res = simulate("baseline", SL, parts, THR, [float(NOW)])
+    assert res["verdicts"]["*|strict"] == {"penalty": 1} and res["changes"] == 1
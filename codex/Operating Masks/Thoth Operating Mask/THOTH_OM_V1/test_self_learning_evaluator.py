@@ -0,0 +1,156 @@
+import copy
+import json
+
+import pytest
+
+import self_learning_evaluator as sle
+from self_learning_policy import compile_policy, compile_statement
+
+SL = {"safety": {"max_delta_per_day": {"routing.call_harmonizers_below": 0.04}}}
+THR = {"thresholds": {"gates": {"profiles": {"strict": {"call_harmonizers_below": 0.60}}}}}
+DOWN = "routing.call_harmonizers_below -= 0.05 clamp[0.40,0.80]"
+
+
+def effective(thr, overrides, thread):
+    base = thr["thresholds"]["gates"]["profiles"]["strict"]["call_harmonizers_below"]
+    return round(base + overrides.get(thread, {}).get("strict", {}).get("call_harmonizers_below", 0.0), 4)
+
+
+def test_thread_and_profile_share_one_daily_budget():
+    policy = compile_policy(SL)
+    thr, overrides, spent, thread_spent = copy.deepcopy(THR), {}, {}, {}
+    planned = {"T1|strict": [compile_statement(DOWN)], "*|strict": [compile_statement(DOWN)]}
+    sle.plan_proposals(policy, thr, planned, spent, thread_spent, overrides)
+    assert effective(thr, overrides, "T1") == pytest.approx(0.56)      # not 0.52
+
+
+def test_earlier_thread_spend_limits_the_profile_move():
+    policy = compile_policy(SL)
+    thr, overrides, spent = copy.deepcopy(THR), {}, {}
+    thread_spent = {"T1": {"strict|routing.call_harmonizers_below": 0.03}}
+    overrides = {"T1": {"strict": {"call_harmonizers_below": -0.03}}}
+    sle.plan_proposals(policy, thr, {"*|strict": [compile_statement(DOWN)]}, spent, thread_spent, overrides)
+    assert thr["thresholds"]["gates"]["profiles"]["strict"]["call_harmonizers_below"] == pytest.approx(0.59)
+    assert effective(thr, overrides, "T1") == pytest.approx(0.56)
+    assert spent == {"strict|routing.call_harmonizers_below": pytest.approx(0.01)}
+
+
+def test_thread_alone_gets_the_full_budget():
+    policy = compile_policy(SL)
+    thr, overrides, spent, thread_spent = copy.deepcopy(THR), {}, {}, {}
+    sle.plan_proposals(policy, thr, {"T1|strict": [compile_statement(DOWN)]}, spent, thread_spent, overrides)
+    assert effective(thr, overrides, "T1") == pytest.approx(0.56)
+    assert thread_spent["T1"] == {"strict|routing.call_harmonizers_below": pytest.approx(0.04)}
+    assert spent == {}
+
+
+NOW = 1760745600.0
+
+
+def turn(i, thread="T1", coherence=0.8):
+    ts = sle.ISO(sle.dt.datetime.utcfromtimestamp(NOW - 3600 + i * 60))
+    return json.dumps({"ts": ts, "thread": thread, "coherence": coherence, "mirror_residual": 0.2}) + "\n"
+
+
+def fresh(tmp_path):
+    cp = sle.load_checkpoint(tmp_path / "missing.json")
+    cp["retain_s"] = 86400
+    return cp
+
+
+def test_ingest_folds_only_new_complete_lines(tmp_path):
+    tfile = tmp_path / "telemetry.jsonl"
+    tfile.write_text(turn(0) + turn(1) + turn(2)[:20])
+    cp = fresh(tmp_path)
+    assert sle.ingest(cp, tfile, NOW) == 2
+    with tfile.open("a") as f:
+        f.write(turn(2)[20:] + turn(3, "T2"))
+    assert sle.ingest(cp, tfile, NOW) == 2
+    assert sle.ingest(cp, tfile, NOW) == 0
+    full = fresh(tmp_path)
+    sle.ingest(full, tfile, NOW)
+    assert cp["partitions"] == full["partitions"]
+    assert set(cp["partitions"]) == {"T1|default", "T2|default"}
+
+
+def test_truncated_telemetry_restarts_from_zero(tmp_path):
+    tfile = tmp_path / "telemetry.jsonl"
+    tfile.write_text("".join(turn(i) for i in range(5)))
+    cp = fresh(tmp_path)
+    sle.ingest(cp, tfile, NOW)
+    tfile.write_text(turn(9))
+    assert sle.ingest(cp, tfile, NOW) == 1
+    assert sum(b[0] for b in cp["partitions"]["T1|default"].values()) == 1
+
+
+def test_expire_drops_buckets_outside_the_retained_window(tmp_path):
+    tfile = tmp_path / "telemetry.jsonl"
+    tfile.write_text(turn(0, "old") + turn(59, "new"))
+    cp = fresh(tmp_path)
+    sle.ingest(cp, tfile, NOW)
+    cp["retain_s"] = 1800
+    assert sle.expire(cp, NOW) == 1
+    assert list(cp["partitions"]) == ["new|default"]
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    """Scheduler over tmp_path with a stub evaluate() that only clears the pending count."""
+    (tmp_path / "thread").mkdir()
+    sl_path = tmp_path / "self_learning.yaml"
+    sl_path.write_text("schedule: {update_interval: 1h, trigger_samples: 5, poll: 1m}\n")
+    evals, status, cp = [], {}, fresh(tmp_path)
+
+    def evaluate(sl, policy, cp, now, folded=0):
+        cp["pending_samples"] = 0
+        evals.append(folded)
+        return {"eval": len(evals)}
+
+    monkeypatch.setattr(sle, "ROOT", tmp_path)
+    monkeypatch.setattr(sle, "read_status", lambda: {})
+    monkeypatch.setattr(sle, "write_status", status.update)
+    monkeypatch.setattr(sle, "load_checkpoint", lambda: cp)
+    monkeypatch.setattr(sle, "default_profile", lambda: "default")
+    monkeypatch.setattr(sle, "evaluate", evaluate)
+    s = sle.Scheduler(sl_path)
+    s.evals, s.status = evals, status
+    return s
+
+
+def at(offset_s):
+    return sle.dt.datetime.utcfromtimestamp(NOW + offset_s)
+
+
+def test_scheduler_runs_on_interval_or_sample_trigger(scheduler, tmp_path):
+    tfile = tmp_path / "thread" / "telemetry.jsonl"
+    assert scheduler.poll(at(0)) == {"eval": 1}                     # never evaluated yet
+    assert (scheduler.interval, scheduler.trigger_samples, scheduler.poll_s) == (3600, 5, 60)
+    tfile.write_text("".join(turn(i) for i in range(4)))
+    assert scheduler.poll(at(600)) is None                          # 4 < trigger_samples
+    assert scheduler.status["pending_samples"] == 4
+    with tfile.open("a") as f:
+        f.write(turn(4))
+    assert scheduler.poll(at(900)) == {"eval": 2}
+    assert scheduler.last_trigger == "samples" and scheduler.evals == [0, 1]
+    assert scheduler.poll(at(900 + 3599)) is None
+    assert scheduler.poll(at(900 + 3600)) == {"eval": 3} and scheduler.last_trigger == "interval"
+    assert scheduler.status["last_eval_s"] == NOW + 4500
+    assert scheduler.status["next_due"] == sle.ISO(at(4500 + 3600))
+
+
+def test_scheduler_reloads_the_policy_when_the_file_changes(scheduler, capsys):
+    import os
+    scheduler.poll(at(0))
+    policy = scheduler.policy
+    scheduler.poll(at(60))
+    assert scheduler.policy is policy                                # unchanged mtime: no recompile
+    scheduler.sl_path.write_text("schedule: {update_interval: 30m}\n")
+    os.utime(scheduler.sl_path, (NOW, NOW))
+    scheduler.poll(at(120))
+    assert scheduler.policy is not policy and scheduler.interval == 1800 and scheduler.trigger_samples == 0
+    policy = scheduler.policy
+    scheduler.sl_path.write_text("signals: {bad: 'coherence <'}\n")
+    os.utime(scheduler.sl_path, (NOW + 1, NOW + 1))
+    scheduler.poll(at(180))
+    assert scheduler.policy is policy and scheduler.interval == 1800
+    assert "keeping previous policy" in capsys.readouterr().out
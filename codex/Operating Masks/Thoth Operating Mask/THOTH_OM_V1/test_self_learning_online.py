@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+yaml = pytest.importorskip("yaml")
+
+from self_learning_online import OnlineLearner, _day
+
+T0 = 1_760_000_000.0
+KEY = "default|routing.call_harmonizers_below"
+SL = {
+    "signals": {"penalty": "coherence < 0.55"},
+    "adjustments": [{"when": "penalty", "do": ["routing.call_harmonizers_below += 0.02"]}],
+    "safety": {"max_delta_per_day": {"routing.call_harmonizers_below": 0.02}},
+    "online": {"enabled": True, "apply": True, "half_life": "1h", "min_samples": 4, "step": 0.5,
+               "cooldown": "10m", "persist_every": 1000},
+}
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "thread").mkdir()
+    (tmp_path / "thresholds_1.1.yaml").write_text(
+        "thresholds:\n  gates:\n    profiles:\n      default: {call_harmonizers_below: 0.60}\n")
+    return tmp_path
+
+
+def value(root):
+    doc = yaml.safe_load((root / "thresholds_1.1.yaml").read_text())
+    return doc["thresholds"]["gates"]["profiles"]["default"]["call_harmonizers_below"]
+
+
+def test_sums_decay_with_the_half_life(root):
+    ol = OnlineLearner(SL, root)
+    ol.observe(0.9, 0.1, samples=4, now_s=T0)
+    ol.observe(0.6, 0.1, samples=4, now_s=T0 + 3600)      # first turn now weighs half
+    s = ol.state["stats"]["default"]["s"]
+    assert s[0] == pytest.approx(6.0)
+    assert s[1] / s[0] == pytest.approx((2 * 0.9 + 4 * 0.6) / 6)
+
+
+def test_min_samples_gates_the_first_adjustment(root):
+    ol = OnlineLearner(SL, root)
+    assert [ol.observe(0.3, 0.1, now_s=T0) for _ in range(3)] == [[], [], []]
+    changes = ol.observe(0.3, 0.1, now_s=T0)
+    assert len(changes) == 1 and value(root) == pytest.approx(0.61)   # step 0.5 of += 0.02
+    assert ol.observe(0.3, 0.1, now_s=T0 + 3600) == []    # past cooldown, but 4 -> 2 + 1 samples
+    assert value(root) == pytest.approx(0.61)
+    log = [json.loads(l) for l in (root / "thread" / "patches.jsonl").read_text().splitlines()]
+    assert log[-1]["applied"] is True and log[-1]["verdict"] == "online:penalty"
+
+
+def test_cooldown_and_daily_budget(root):
+    ol = OnlineLearner(SL, root)
+    ol.observe(0.3, 0.1, samples=4, now_s=T0)
+    assert ol.observe(0.3, 0.1, now_s=T0 + 599) == []          # inside the 10m cooldown
+    assert len(ol.observe(0.3, 0.1, now_s=T0 + 600)) == 1
+    assert value(root) == pytest.approx(0.62)
+    assert ol.observe(0.3, 0.1, now_s=T0 + 1200) == []         # 0.02 spent today
+    assert ol.state["spent"] == {KEY: pytest.approx(0.02)}
+
+
+def test_budget_is_shared_with_the_batch_checkpoint(root):
+    (root / "thread" / "self_learning.checkpoint.json").write_text(json.dumps(
+        {"spend": {"day": _day(T0), "by_key": {KEY: 0.015}}}))
+    ol = OnlineLearner(SL, root)
+    ol.observe(0.3, 0.1, samples=4, now_s=T0)
+    assert value(root) == pytest.approx(0.605)                 # only the batch leftover moves
+    assert ol.state["spent"] == {KEY: pytest.approx(0.005)}    # the batch share is not counted twice
+    assert ol.observe(0.3, 0.1, now_s=T0 + 600) == []
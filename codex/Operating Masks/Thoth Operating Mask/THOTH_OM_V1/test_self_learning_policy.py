@@ -0,0 +1,83 @@
+import pytest
+
+from self_learning_policy import apply_ops, compile_policy, compile_statement
+
+GOOD = {"samples": 50, "coherence": 0.92, "mirror_residual": 0.2}
+BAD = {"samples": 50, "coherence": 0.40, "mirror_residual": 0.2}
+THIN = {"samples": 3, "coherence": 0.40, "mirror_residual": 0.2}
+
+
+def policy(window="6h"):
+    return compile_policy({
+        "schedule": {"window": "24h", "windows": ["6h"]},
+        "adjustments": [
+            {"when": "penalty", "window": window, "do": ["routing.call_harmonizers_below += 0.02"]},
+        ],
+    })
+
+
+@pytest.mark.parametrize("short", [GOOD, THIN])
+def test_gated_penalty_ignores_the_primary_window_verdict(short):
+    p = policy()
+    envs = {"6h": short, "24h": BAD}
+    assert p.combine(p.verdicts(envs)) == "penalty"         # 24h fallback says penalty
+    assert p.ops(envs) == []                                 # but the 6h window does not
+
+
+def test_gated_penalty_fires_on_its_own_window():
+    p = policy()
+    assert [op.source for op in p.ops({"6h": BAD, "24h": GOOD})] == ["routing.call_harmonizers_below += 0.02"]
+    assert len(policy("24h").ops({"6h": GOOD, "24h": BAD})) == 1
+
+
+def test_division_by_zero_does_not_fire():
+    p = compile_policy({
+        "signals": {"penalty": "mirror_residual / coherence_var > 10"},
+        "adjustments": [
+            {"when": "coherence / coherence_var > 100", "do": ["routing.call_harmonizers_below += 0.02"]},
+        ],
+    })
+    env = {**BAD, "coherence_var": 0.0}
+    assert p.verdict(env) == "neutral"
+    assert p.ops({"24h": env}) == []
+    assert p.verdict({**env, "coherence_var": 0.01}) == "penalty"
+
+
+def test_statement_and_contract_clamps_intersect():
+    thr = {"gates": {"profiles": {"strict": {"call_harmonizers_below": 0.68}}}}
+    op = compile_statement("routing.call_harmonizers_below += 0.05 clamp[0.40,0.80]")
+    apply_ops(thr, [op], clamps={"routing.call_harmonizers_below": (0.45, 0.70)})
+    assert thr["gates"]["profiles"]["strict"]["call_harmonizers_below"] == 0.70
+
+
+def test_daily_budget_caps_movement_across_calls():
+    thr = {"gates": {"profiles": {"strict": {"call_harmonizers_below": 0.60}, "loose": {"call_harmonizers_below": 0.50}}}}
+    op = compile_statement("routing.call_harmonizers_below -= 0.03")
+    budget, spent = {"routing.call_harmonizers_below": 0.04}, {}
+    apply_ops(thr, [op], max_delta=budget, spent=spent, profiles=["strict"])
+    apply_ops(thr, [op], max_delta=budget, spent=spent, profiles=["strict"])
+    assert apply_ops(thr, [op], max_delta=budget, spent=spent, profiles=["strict"]) == []
+    assert thr["gates"]["profiles"]["strict"]["call_harmonizers_below"] == pytest.approx(0.56)
+    assert thr["gates"]["profiles"]["loose"]["call_harmonizers_below"] == 0.50
+    assert spent == {"strict|routing.call_harmonizers_below": pytest.approx(0.04)}
+
+
+def test_conflicting_windows_fire_only_the_precedence_winner():
+    yaml = pytest.importorskip("yaml")
+    from pathlib import Path
+    sl = yaml.safe_load((Path(__file__).parent / "self_learning.yaml").read_text(encoding="utf-8"))
+    p = compile_policy(sl)
+    envs = {"1h": GOOD, "6h": BAD, "24h": GOOD, "7d": GOOD}
+    assert p.verdicts(envs)["24h"] == "reward" and p.combine(p.verdicts(envs)) == "penalty"
+    ops = p.ops(envs)
+    assert [op.source for op in ops] == [
+        "routing.force_serial_on_incoherent = true",
+        "routing.call_harmonizers_below += 0.02 clamp[0.45,0.80]",
+        "routing.early_severance_below -= 0.01 clamp[0.18,0.32]",
+    ]
+    thr = {"gates": {"profiles": {"strict": {"call_harmonizers_below": 0.60, "early_severance_below": 0.28}}}}
+    spent = {}
+    p.apply(thr, ops, spent)
+    assert spent == {"strict|routing.call_harmonizers_below": pytest.approx(0.02),
+                     "strict|routing.early_severance_below": pytest.approx(0.01)}
+    assert [op.source for op in p.ops({"6h": GOOD, "24h": GOOD})][0].startswith("routing.call_harmonizers_below -=")
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import telemetry_query as tq
+
+H = 1760745600          # 2025-10-18T00:00:00Z
+
+
+def write(path, recs, mode="w"):
+    with path.open(mode, encoding="utf-8") as f:
+        for r in recs:
+            f.write(json.dumps(r) + "\n")
+
+
+def turn(i, thread, coherence=0.5):
+    return {"ts": H + i * 60, "thread": thread, "coherence": coherence}
+
+
+def test_int_and_str_thread_ids_group_together_across_rollup_and_tail(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i, 7) for i in range(5)])
+    tq.build_index(p)
+    write(p, [turn(10, 7), turn(11, "7")], mode="a")
+    aggs = tq.parse_aggs("count")
+    rows = tq.aggregate(p, tq.build_filter(), ["thread"], aggs)
+    assert rows == [{"thread": "7", "count": 7}]
+    assert rows == tq.aggregate(p, tq.build_filter(), ["thread"], aggs, use_index=False)
+
+
+def test_thread_filter_matches_int_ids(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(0, 7), turn(1, 8), turn(2, None)])
+    keep = tq.build_filter(threads=["7"])
+    assert [r["thread"] for _, r in tq.iter_lines(p) if keep(r)] == [7]
+
+
+def test_rollups_match_a_full_scan(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i * 7, f"T{i % 3}", coherence=i / 50) for i in range(40)])
+    tq.build_index(p, block=8)
+    write(p, [turn(400, "T1", coherence=0.9), {"event": "activation", "thread": "T1"}], mode="a")
+    aggs = tq.parse_aggs("count,mean:coherence,max:coherence")
+    for group_by in (["thread"], ["event", "hour"]):
+        fast = tq.aggregate(p, tq.build_filter(), group_by, aggs)
+        full = tq.aggregate(p, tq.build_filter(), group_by, aggs, use_index=False)
+        assert fast == [pytest.approx(r) for r in full]
+
+
+def test_index_is_dropped_when_the_file_shrinks(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i, "T") for i in range(10)])
+    tq.build_index(p)
+    assert tq.load_index(p) is not None
+    write(p, [turn(0, "T")])
+    assert tq.load_index(p) is None
+
+
+def test_time_window_skips_whole_blocks(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i, "T") for i in range(100)])
+    idx = tq.build_index(p, block=10)
+    ranges = list(tq.scan_ranges(idx, since=H + 95 * 60))
+    assert len(ranges) == 2                     # last block + the (empty) tail
+    keep = tq.build_filter(since=H + 95 * 60)
+    assert len(list(tq.stream(p, keep, since=H + 95 * 60))) == 5
+
+
+def test_index_is_dropped_when_the_file_is_replaced(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i, "T") for i in range(10)])
+    tq.build_index(p)
+    rotated = tmp_path / "new.jsonl"
+    write(rotated, [turn(i, "U") for i in range(12)])       # larger, different inode
+    rotated.replace(p)
+    assert tq.load_index(p) is None
+
+
+def test_index_is_dropped_when_rewritten_in_place(tmp_path):
+    p = tmp_path / "telemetry.jsonl"
+    write(p, [turn(i, "T") for i in range(10)])
+    tq.build_index(p)
+    write(p, [turn(i, "U") for i in range(11)])             # same inode, grown
+    assert tq.load_index(p) is None
+    write(p, [turn(i, "T") for i in range(10)])
+    tq.build_index(p)
+    write(p, [turn(10, "T")], mode="a")                     # a plain append keeps it
+    assert tq.load_index(p) is not None
@@ -0,0 +1,91 @@
+import pytest
+
+import threshold_layers as tl
+from threshold_layers import Op, ThresholdView
+
+THR = {"thresholds": {"gates": {"triggers": {"call_harmonizers_below": 0.55, "early_severance_below": 0.28},
+                                "profiles": {"strict": {"call_harmonizers_below": 0.60}}},
+                      "meta_gate": {"coherence": {"warn_below": 0.7}}}}
+OVERRIDES = {"T42": {"strict": {"call_harmonizers_below": -0.03}}}
+
+
+def stack(thread="T42"):
+    return [l for l in (tl.base_layer(THR, 1), tl.profile_layer(THR, 1, "strict"),
+                        tl.thread_layer(OVERRIDES, 1, thread, "strict"))
+            if l is not None]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    tl.clear_cache()
+    yield
+    tl.clear_cache()
+
+
+def test_layers_resolve_lowest_first():
+    v = ThresholdView(stack())
+    assert v["gates.triggers.call_harmonizers_below"] == pytest.approx(0.57)
+    assert v["gates.triggers.early_severance_below"] == 0.28
+    assert [s["layer"] for s in v.explain("gates.triggers.call_harmonizers_below")] == \
+        ["base", "profile:strict", "thread:T42"]
+
+
+def test_flattened_stack_is_shared_per_layer_versions():
+    before = dict(tl._STATS)
+    a, b = ThresholdView(stack()), ThresholdView(stack())
+    assert a._flat is b._flat
+    assert tl._STATS["misses"] - before["misses"] == 1 and tl._STATS["hits"] - before["hits"] == 1
+    assert ThresholdView(stack(thread=None))._flat is not a._flat
+
+
+def test_request_overrides_copy_nothing_and_leave_the_base_alone():
+    base = ThresholdView(stack())
+    v = base.with_overrides({"gates.triggers.early_severance_below": 0.3,
+                             "gates.triggers.call_harmonizers_below": Op("mul", 2.0)})
+    assert v._flat is base._flat
+    assert v["gates.triggers.early_severance_below"] == 0.3
+    assert v["gates.triggers.call_harmonizers_below"] == pytest.approx(1.14)
+    assert base["gates.triggers.early_severance_below"] == 0.28
+    with pytest.raises(TypeError):
+        base._flat["gates.triggers.early_severance_below"] = 0.0
+
+
+def test_nested_round_trips_the_tree():
+    v = ThresholdView([tl.base_layer(THR, 1)])
+    assert v.nested() == THR["thresholds"]
+    assert v.section("meta_gate.coherence") == {"warn_below": 0.7}
+
+
+def test_persona_layer_reads_the_deployed_lenses(tmp_path):
+    pytest.importorskip("yaml")
+    import os
+    import shutil
+    import subprocess
+    import sys
+    from pathlib import Path
+    here = Path(__file__).parent
+    bundle = here.parent / "personas bundle" / "lenses.yaml"
+    if not bundle.exists():
+        pytest.skip("personas bundle not in this checkout")
+    for name in ("thresholds_1.1.yaml", "runtime.yaml"):
+        shutil.copy(here / name, tmp_path / name)
+    (tmp_path / "personas bundle").mkdir()
+    shutil.copy(bundle, tmp_path / "personas bundle" / "lenses.yaml")
+    env = {**os.environ, "THOTH_PROJECT_ROOT": str(tmp_path)}
+    subprocess.run([sys.executable, str(here / "thoth_loader.py")], env=env, check=True,
+                   capture_output=True, timeout=120)
+    assert (tmp_path / "personas" / "lenses.yaml").exists()
+    shutil.rmtree(tmp_path / "personas bundle")              # only the deployed copy remains
+    v = tl.effective_view(tmp_path, profile="default", personas=["P_CREATOR"], lunar=False)
+    assert v["gates.weight_deltas.Style"] == pytest.approx(0.15)
+    assert v.explain("gates.weight_deltas.Style")[0]["layer"] == "persona:P_CREATOR"
+
+
+def test_persona_layer_falls_back_to_the_uploaded_bundle(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "thresholds_1.1.yaml").write_text("thresholds: {gates: {triggers: {x: 1}}}\n")
+    (tmp_path / "personas bundle").mkdir()
+    (tmp_path / "personas bundle" / "lenses.yaml").write_text(
+        "persona_lenses: [{id: P_A, gate_weight_deltas: {Evidence: 0.2}}]\n")
+    v = tl.effective_view(tmp_path, profile="default", personas=["P_A"], lunar=False)
+    assert v["gates.weight_deltas.Evidence"] == pytest.approx(0.2)
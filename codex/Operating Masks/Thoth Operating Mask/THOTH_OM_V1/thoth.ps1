@@ -1,4 +1,7 @@
-param([Parameter(Mandatory=$true)][ValidateSet("init","activate","scaffold","diag","ship")]$cmd)
+param(
+  [Parameter(Mandatory=$true)][ValidateSet("init","activate","scaffold","diag","ship","telemetry","learn","backtest")]$cmd,
+  [Parameter(ValueFromRemainingArguments=$true)]$rest
+)
 
 function Guard([string]$msg) {
   python engine/activate_guard.py
@@ -11,4 +14,7 @@ switch ($cmd) {
   "scaffold" { Guard "Guard failed"; "build scaffold" }
   "diag"     { Guard "Guard failed"; "run diagnostics persona=thoth_om_builder_v1 show=distortions,gates detail=brief" }
   "ship"     { Guard "Guard failed"; "run diagnostics persona=thoth_om_builder_v1 show=distortions,gates detail=brief"; ">> Crown Verify your artifact in /artifacts" }
+  "telemetry" { python scripts/telemetry_query.py @rest }
+  "learn"     { python scripts/self_learning_evaluator.py @rest }
+  "backtest"  { python scripts/self_learning_backtest.py @rest }
 }
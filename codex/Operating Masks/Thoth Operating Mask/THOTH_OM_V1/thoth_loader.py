@@ -173,6 +173,7 @@ def main(argv):
         "schemas": PROJECT_ROOT / "schemas",
         "scaffolding": PROJECT_ROOT / "scaffolding",
         "memory": PROJECT_ROOT / "memory",
+        "personas": PROJECT_ROOT / "personas",
         "thread": PROJECT_ROOT / "thread",
         "thoth_om_v1": PROJECT_ROOT / "thoth_om_v1",
     }
@@ -205,12 +206,29 @@ def main(argv):
         (PROJECT_ROOT/"mask_runtime.py",                dirs["scripts"]/ "mask_runtime.py"),
         (PROJECT_ROOT/"lunar_nudge.py",                 dirs["scripts"]/ "lunar_nudge.py"),
         (PROJECT_ROOT/"self_learning_evaluator.py",     dirs["scripts"]/ "self_learning_evaluator.py"),
+        (PROJECT_ROOT/"self_learning_policy.py",        dirs["scripts"]/ "self_learning_policy.py"),
+        (PROJECT_ROOT/"self_learning_backtest.py",      dirs["scripts"]/ "self_learning_backtest.py"),
+        (PROJECT_ROOT/"self_learning_online.py",        dirs["scripts"]/ "self_learning_online.py"),
+        (PROJECT_ROOT/"learning_journal.py",            dirs["scripts"]/ "learning_journal.py"),
+        (PROJECT_ROOT/"patch_log.py",                   dirs["scripts"]/ "patch_log.py"),
         (PROJECT_ROOT/"thoth_loader.py",                dirs["scripts"]/ "thoth_loader.py"),
         (PROJECT_ROOT/"overlays.py",                    dirs["scripts"]/ "overlays.py"),      # OPTIONAL
+        (PROJECT_ROOT/"change_points.py",               dirs["scripts"]/ "change_points.py"),
+        (PROJECT_ROOT/"telemetry_query.py",             dirs["scripts"]/ "telemetry_query.py"),
+        (PROJECT_ROOT/"threshold_layers.py",            dirs["scripts"]/ "threshold_layers.py"),
+        (PROJECT_ROOT/"metatron_router.py",             dirs["scripts"]/ "metatron_router.py"),
+        (PROJECT_ROOT/"braid_executor.py",              dirs["scripts"]/ "braid_executor.py"),
+        (PROJECT_ROOT/"gate_memo.py",                   dirs["scripts"]/ "gate_memo.py"),
+        (PROJECT_ROOT/"bff_engine.py",                  dirs["scripts"]/ "bff_engine.py"),
+        (PROJECT_ROOT/"braid_hash.py",                  dirs["scripts"]/ "braid_hash.py"),
+        (PROJECT_ROOT/"rebraid.py",                     dirs["scripts"]/ "rebraid.py"),
+        (PROJECT_ROOT/"harmonizer_scheduler.py",        dirs["scripts"]/ "harmonizer_scheduler.py"),
         # scaffolding + schemas
         (PROJECT_ROOT/"scaffold_spec.yaml",             dirs["schemas"]/ "scaffold_spec.yaml"),
         (PROJECT_ROOT/"segments.schema.json",           dirs["schemas"]/ "segments.schema.json"),
         (PROJECT_ROOT/"SPACE_PROGRAM_CHECKLIST_v2_aligned.md", dirs["scaffolding"]/ "SPACE_PROGRAM_CHECKLIST_v2_aligned.md"),
+        # personas (threshold_layers reads personas/lenses.yaml; the bundle ships as "personas bundle/")
+        (PROJECT_ROOT/"personas bundle"/"lenses.yaml",  dirs["personas"]/ "lenses.yaml"),
         # memory
         (PROJECT_ROOT/"brand_voice.md",                 dirs["memory"]/ "brand_voice.md"),
         (PROJECT_ROOT/"constraints.md",                 dirs["memory"]/ "constraints.md"),
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Threshold layers — copy-on-write composition of a turn's effective thresholds.
+
+- A turn's thresholds are a stack of layers over thresholds_1.1.yaml, lowest first:
+  base → profile (gates.profiles.<p> into gates.triggers) → thread overrides
+  (thread/thread_overrides.json deltas) → lunar (phase-bin multipliers) → persona
+  lenses (gate_weight_deltas) → per-request overrides
+- Layers are flat {dotted key: value | Op}; an Op (add / mul / div) modifies the value
+  resolved from the layers below. Per-gate guards (gates.Harmonize, gates.CrownPrep)
+  are part of the base layer
+- The stack is flattened once per combination of layer versions (small LRU); a view
+  is a ChainMap over that shared flat map, so per-request overrides cost
+  O(overridden keys) and never copy the thresholds
+- Views are read-only; nested() rebuilds the thresholds_1.1.yaml shape when needed
+
+Usage:
+  python scripts/threshold_layers.py show --profile strict --thread T42 --persona P_EXEC
+  python scripts/threshold_layers.py explain gates.triggers.call_harmonizers_below --profile strict
+  python scripts/threshold_layers.py show --set gates.triggers.early_severance_below=0.3 --key gates.triggers
+"""
+from __future__ import annotations
+from pathlib import Path
+from collections import ChainMap, OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import NamedTuple
+import os, sys, json
+
+ROOT = Path(os.environ.get("THOTH_PROJECT_ROOT", "/mnt/data")).resolve()
+FLAT_MAX = 64
+# persona lenses: where thoth_loader deploys them, then the bundle as uploaded
+LENSES = ("personas/lenses.yaml", "personas bundle/lenses.yaml")
+# lunar lever -> keys it scales (same mapping as mask_runtime.apply_lunar_nudges)
+LUNAR_KEYS = {
+    "coherence": ("meta_gate.coherence.warn_below", "meta_gate.coherence.sever_below",
+                  "meta_gate.coherence.stabilize_above"),
+    "severance": ("gates.triggers.early_severance_below",),
+}
+
+class Op(NamedTuple):
+    """Modify the value resolved below instead of replacing it (numbers only)."""
+    kind: str      # "add" | "mul" | "div"
+    value: float
+
+    def apply(self, v):
+        if not isinstance(v, (int, float)) or isinstance(v, bool):
+            return v
+        if self.kind == "add":
+            return v + self.value
+        if self.kind == "mul":
+            return v * self.value
+        return v / self.value
+
+class Layer(NamedTuple):
+    name: str
+    version: object          # hashable; equal versions mean equal entries
+    entries: Mapping         # {dotted key: value | Op}
+
+def flatten(doc: dict, prefix: str = "", out: dict | None = None) -> dict:
+    """Nested dict -> {dotted key: leaf}; lists and scalars are leaves."""
+    out = {} if out is None else out
+    for k, v in doc.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict) and v:
+            flatten(v, key + ".", out)
+        else:
+            out[key] = v
+    return out
+
+def nest(flat: Mapping, prefix: str = "") -> dict:
+    """Inverse of flatten() for the keys under `prefix`."""
+    out: dict = {}
+    for key, v in flat.items():
+        if prefix:
+            if not key.startswith(prefix + "."):
+                continue
+            key = key[len(prefix) + 1:]
+        node = out
+        *parents, leaf = key.split(".")
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = v
+    return out
+
+# --- layer builders ---
+def _root(thresholds: dict) -> dict:
+    return thresholds["thresholds"] if isinstance(thresholds.get("thresholds"), dict) else thresholds
+
+def base_layer(thresholds: dict, version) -> Layer:
+    return Layer("base", version, MappingProxyType(flatten(_root(thresholds))))
+
+def profile_layer(thresholds: dict, version, profile: str | None) -> Layer | None:
+    prof = ((_root(thresholds).get("gates") or {}).get("profiles") or {}).get(profile) if profile else None
+    if not isinstance(prof, dict):
+        return None
+    return Layer(f"profile:{profile}", (version, profile),
+                 MappingProxyType({f"gates.triggers.{k}": v for k, v in prof.items()}))
+
+def thread_layer(overrides: dict, version, thread: str | None, profile: str | None) -> Layer | None:
+    deltas = ((overrides.get(thread) or {}).get(profile) or {}) if thread and profile else {}
+    if not deltas:
+        return None
+    return Layer(f"thread:{thread}", (version, thread, profile),
+                 MappingProxyType({f"gates.triggers.{k}": Op("add", float(d)) for k, d in deltas.items()}))
+
+def lunar_layer(nudges: dict | None) -> Layer | None:
+    """From compute_lunar_nudges(): one layer per phase bin and caps."""
+    if not nudges:
+        return None
+    n = nudges.get("nudges") or {}
+    entries = {}
+    for lever, keys in LUNAR_KEYS.items():
+        try:
+            m = float(n.get(lever, 1.0))
+        except (TypeError, ValueError):
+            continue
+        entries.update((k, Op("mul", m)) for k in keys)
+    try:
+        bias = float(n.get("call_harmonizers_bias", 1.0))
+    except (TypeError, ValueError):
+        bias = 1.0
+    entries["gates.triggers.call_harmonizers_below"] = Op("div", max(0.5, bias))
+    version = (nudges.get("phase_index"), tuple(nudges.get("caps") or ())) if "phase_index" in nudges \
+        else tuple(sorted((k, v) for k, v in n.items() if isinstance(v, (int, float))))
+    return Layer(f"lunar:{nudges.get('phase_name', '?')}", version, MappingProxyType(entries))
+
+def persona_layer(lenses: dict, version, personas) -> Layer | None:
+    """gate_weight_deltas of the active lenses, summed, as gates.weight_deltas.<Gate>.
+    Renormalization and lens_overlays hard_caps belong to whoever owns the weights."""
+    by_id = {l.get("id"): l for l in lenses.get("persona_lenses") or [] if isinstance(l, dict)}
+    allowed = set(((lenses.get("defaults") or {}).get("allowed_fields")) or ["gate_weight_deltas"])
+    if "gate_weight_deltas" not in allowed:
+        return None
+    sums: dict[str, float] = {}
+    for pid in personas or ():
+        for gate, d in ((by_id.get(pid) or {}).get("gate_weight_deltas") or {}).items():
+            sums[gate] = sums.get(gate, 0.0) + float(d)
+    if not sums:
+        return None
+    return Layer("persona:" + "+".join(personas), (version, tuple(personas)),
+                 MappingProxyType({f"gates.weight_deltas.{g}": Op("add", d) for g, d in sums.items()}))
+
+def request_layer(overrides: Mapping) -> Layer:
+    return Layer("request", None, MappingProxyType(dict(overrides)))
+
+# --- memoized flattening per layer combination ---
+_FLAT: OrderedDict = OrderedDict()   # ((name, version), ...) -> MappingProxy
+_STATS = {"hits": 0, "misses": 0}
+
+def compose(layers) -> Mapping:
+    """Flat read-only map of the stack (lowest layer first); built once per
+    combination of (name, version), shared afterwards."""
+    key = tuple((l.name, l.version) for l in layers)
+    hit = _FLAT.get(key)
+    if hit is not None:
+        _FLAT.move_to_end(key)
+        _STATS["hits"] += 1
+        return hit
+    _STATS["misses"] += 1
+    flat: dict = {}
+    for layer in layers:
+        for k, v in layer.entries.items():
+            if isinstance(v, Op):
+                if k in flat:
+                    flat[k] = v.apply(flat[k])
+                elif v.kind == "add":
+                    flat[k] = v.value  # a delta over nothing starts at 0
+            else:
+                flat[k] = v
+    hit = MappingProxyType(flat)
+    _FLAT[key] = hit
+    if len(_FLAT) > FLAT_MAX:
+        _FLAT.popitem(last=False)
+    return hit
+
+def clear_cache() -> None:
+    _FLAT.clear()
+    _LAYERS.clear()
+
+class ThresholdView(Mapping):
+    """Read-only dotted-key view: a ChainMap of request overrides over a shared
+    flattened stack."""
+
+    def __init__(self, layers, flat: Mapping | None = None, front: tuple = ()):
+        self.layers = tuple(layers)
+        self._flat = compose(self.layers) if flat is None else flat
+        self._front = front              # request layers, newest first
+        self._map = ChainMap(*(dict(l.entries) for l in front), self._flat) if front else self._flat
+
+    def __getitem__(self, key):
+        return self._map[key]
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def with_overrides(self, overrides: Mapping) -> "ThresholdView":
+        """New view with `overrides` on top; Ops resolve against this view.
+        O(len(overrides)) — the shared flat map is not copied."""
+        entries = {}
+        for k, v in overrides.items():
+            if isinstance(v, Op):
+                if k in self._map:
+                    entries[k] = v.apply(self._map[k])
+                elif v.kind == "add":
+                    entries[k] = v.value
+            else:
+                entries[k] = v
+        return ThresholdView(self.layers, self._flat, (request_layer(entries),) + self._front)
+
+    def section(self, prefix: str) -> dict:
+        """Nested dict for one subtree, e.g. section("gates.triggers")."""
+        return nest({k: v for k, v in self._map.items() if k.startswith(prefix + ".")}, prefix)
+
+    def nested(self) -> dict:
+        """The full thresholds tree (under no `thresholds:` wrapper); a fresh dict."""
+        return nest(self._map)
+
+    def explain(self, key: str) -> list[dict]:
+        """Layers touching `key`, lowest first, with the value after each."""
+        trail, v, seen = [], None, False
+        for layer in self.layers + tuple(reversed(self._front)):
+            if key not in layer.entries:
+                continue
+            e = layer.entries[key]
+            if isinstance(e, Op):
+                v = e.apply(v) if seen else (e.value if e.kind == "add" else v)
+                seen = seen or e.kind == "add"
+                trail.append({"layer": layer.name, "op": f"{e.kind} {e.value:g}", "value": v})
+            else:
+                v, seen = e, True
+                trail.append({"layer": layer.name, "op": "set", "value": v})
+        return trail
+
+# --- file-backed inputs (re-read when their stat changes) ---
+_FILES: dict = {}   # path -> (stamp, data)
+
+def _load_file(path: Path, loader) -> tuple[dict, object]:
+    try:
+        st = path.stat()
+    except OSError:
+        return {}, None
+    stamp = (str(path), st.st_mtime_ns, st.st_size)
+    cached = _FILES.get(str(path))
+    if cached and cached[0] == stamp:
+        return cached[1], stamp
+    try:
+        data = loader(path) or {}
+    except Exception:
+        data = {}
+    _FILES[str(path)] = (stamp, data)
+    return data, stamp
+
+_LAYERS: OrderedDict = OrderedDict()   # (kind, version, ...) -> Layer | None
+
+def _layer(key: tuple, build):
+    """Layers are rebuilt only when their inputs' version changes."""
+    if key in _LAYERS:
+        return _LAYERS[key]
+    layer = _LAYERS[key] = build()
+    if len(_LAYERS) > 4 * FLAT_MAX:
+        _LAYERS.popitem(last=False)
+    return layer
+
+def _yaml(path: Path):
+    import yaml
+    return yaml.safe_load(path.read_text(encoding="utf-8"))
+
+def _json(path: Path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def effective_view(project_root: str | Path = ROOT, profile: str | None = None, thread: str | None = None,
+                   personas=(), overrides: Mapping | None = None, lunar: bool = True) -> ThresholdView:
+    """The turn's thresholds view. profile=None uses runtime.yaml context.threshold_profile."""
+    from mask_runtime import load_thresholds, compute_lunar_nudges
+    root = Path(project_root)
+    thr, version = load_thresholds(root)
+    if profile is None:
+        rt, _ = _load_file(root / "runtime" / "runtime.yaml", _yaml)
+        profile = (rt.get("context") or {}).get("threshold_profile") or "default"
+    layers = [_layer(("base", version), lambda: base_layer(thr, version)),
+              _layer(("profile", version, profile), lambda: profile_layer(thr, version, profile))]
+    if thread:
+        ov, ov_version = _load_file(root / "thread" / "thread_overrides.json", _json)
+        layers.append(_layer(("thread", ov_version, thread, profile),
+                             lambda: thread_layer(ov, ov_version, thread, profile)))
+    if lunar:
+        ln = compute_lunar_nudges(root)
+        layers.append(_layer(("lunar", ln["phase_index"], tuple(ln["caps"])), lambda: lunar_layer(ln))
+                      if ln else None)
+    if personas:
+        personas = tuple(personas)
+        path = next((root / p for p in LENSES if (root / p).exists()), root / LENSES[0])
+        lenses, l_version = _load_file(path, _yaml)
+        layers.append(_layer(("persona", l_version, personas), lambda: persona_layer(lenses, l_version, personas)))
+    view = ThresholdView(l for l in layers if l is not None)
+    return view.with_overrides(overrides) if overrides else view
+
+def _parse_set(spec: str):
+    key, _, raw = spec.partition("=")
+    for kind, sym in (("add", "+="), ("mul", "*=")):
+        if key.endswith(sym[0]):
+            return key[:-1], Op(kind, float(raw))
+    try:
+        import yaml
+        return key, yaml.safe_load(raw)
+    except Exception:
+        return key, raw
+
+def main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="threshold_layers.py", description="Layered threshold views")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    for name, hlp in (("show", "Print the effective thresholds"), ("explain", "Trace one key through the layers")):
+        p = sp.add_parser(name, help=hlp)
+        if name == "explain":
+            p.add_argument("key")
+        p.add_argument("--profile")
+        p.add_argument("--thread")
+        p.add_argument("--persona", action="append", default=[])
+        p.add_argument("--set", action="append", default=[], metavar="KEY=V | KEY+=D | KEY*=M",
+                       help="per-request override (repeatable)")
+        p.add_argument("--no-lunar", action="store_true")
+        if name == "show":
+            p.add_argument("--key", help="only this subtree, e.g. gates.triggers")
+    args = ap.parse_args(argv)
+
+    overrides = dict(_parse_set(s) for s in args.set)
+    view = effective_view(ROOT, args.profile, args.thread, args.persona, overrides, not args.no_lunar)
+    if args.cmd == "explain":
+        print(json.dumps({"key": args.key, "value": view.get(args.key), "layers": view.explain(args.key)}, indent=2))
+    else:
+        out = view.section(args.key) if args.key else view.nested()
+        print(json.dumps({"layers": [l.name for l in view.layers], "thresholds": out}, indent=2, default=str))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
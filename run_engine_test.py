@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 """
-Local test harness for Codex Engine 2.1 Braid Core.
-Simulates a single run using local YAML schemas.
+Local test harness for the Thoth OM braid core.
+Runs one session, or a batch of sessions, through the engine modules of a Thoth
+project root (THOTH_OM_V1 source tree by default, or a loaded THOTH_PROJECT_ROOT):
+
+  python run_engine_test.py                          # one run, YAML receipt in logs/
+  python run_engine_test.py --batch 10000 --workers 8 --out logs/receipts.jsonl
+  python run_engine_test.py --batch 200 --jobs queue.jsonl   # one session per queued job
+  python run_engine_test.py --batch 100 --gates my_gates:factory   # factory(gate_id) -> fn(packet, ctx)
+
+Each session: metatron_router.route() orders the gates, braid_executor.load_executor()
+runs them (caps, severance, gate memo, harmonizer_scheduler hooks) and
+bff_engine.BFFEngine synthesizes the braid signature; a second route() on the BFF
+packet gives the next turn's gate order. Gate callables are pluggable; the default
+mock gates are deterministic in (gate, packet), so the gate memo holds. Batch mode
+loads the engine config once and hands it to every pool worker through the pool
+initializer (forked workers inherit it copy-on-write); each worker builds its
+executor once. Sessions run without gate cooldowns (unless --realtime) and receipts
+are streamed as JSONL lines to one aggregated file.
 """
 
-import yaml, uuid, time, random
+import yaml, uuid, time, random, json, os, sys, asyncio, importlib
 from datetime import datetime
 from pathlib import Path
 
+HERE = Path(__file__).parent
+DEFAULT_ROOT = HERE / "codex" / "Operating Masks" / "Thoth Operating Mask" / "THOTH_OM_V1"
+
 # ────────────────────────────────────────────────────────────────
 # Utility
 # ────────────────────────────────────────────────────────────────
@@ -15,118 +34,278 @@ def load_yaml(path):
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def rand(n=1.0):
-    return round(random.random() * n, 3)
+def rand(n=1.0, rng=random):
+    return round(rng.random() * n, 3)
 
-# ────────────────────────────────────────────────────────────────
-# Load engine config
-# ────────────────────────────────────────────────────────────────
-codex_dir = Path(__file__).parent / "codex"
-engine = load_yaml(codex_dir / "engine_2.1_braid.yaml")
-meta_gate = load_yaml(codex_dir / "meta-gate-fields.yaml")
-harmonizers = load_yaml(codex_dir / "harmonizers.yaml")
-bff = load_yaml(codex_dir / "braided-feedback-function.yaml")
+def engine_file(root, name):
+    """root/engine/<name> in a loaded project, root/<name> in the source tree."""
+    p = root / "engine" / name
+    return p if p.exists() else root / name
 
-print(f"\n🧠 Loaded Codex Engine 2.1 — {engine['name']}")
-print(f"Flow mode default: {engine['defaults']['flow_mode']}")
-print("─────────────────────────────────────────────")
+def _use_root(root):
+    # engine modules live in scripts/ (loaded project) or flat in the source tree
+    for d in (root / "scripts", root):
+        if d.is_dir() and str(d) not in sys.path:
+            sys.path.insert(0, str(d))
 
 # ────────────────────────────────────────────────────────────────
-# Mock input data
+# Load engine config
 # ────────────────────────────────────────────────────────────────
-session_id = str(uuid.uuid4())
-run_context = {
-    "session_id": session_id,
-    "timestamp": datetime.utcnow().isoformat(),
-    "vault_user": "test_user",
-    "glyph_id": "GLYPH-001",
-    "flow_mode": engine["defaults"]["flow_mode"]
-}
-
-trap_snapshot = [
-    {"id": f"TRAP-{i}", "severity": rand(), "family": f"FAM-{i%12}"}
-    for i in range(5)
-]
-family_activity = [rand() for _ in range(12)]
+def load_config(root, profile="default"):
+    root = Path(root).resolve()
+    engine = engine_file(root, "Thoth_engine_1.0.yaml")
+    if not engine.exists():
+        raise FileNotFoundError(f"no Thoth_engine_1.0.yaml under {root} (or {root / 'engine'})")
+    return {
+        "root": str(root),
+        "profile": profile,
+        "engine": load_yaml(engine),
+        "metatron": str(engine_file(root, "metatron_function.yaml")),
+        "engine_path": str(engine),
+    }
 
 # ────────────────────────────────────────────────────────────────
-# Simulate Meta-Gate stage
+# Gates: factory(gate_id) -> fn(packet, ctx) -> packet.out
 # ────────────────────────────────────────────────────────────────
-print("⚙️  Meta-Gate composing gate plan...")
-gate_plan = [{"gate_id": f"G{i+1}", "sensitivity": rand(), "cooldown": rand(2)} for i in range(7)]
-time.sleep(0.3)
-
-# Fake harmonizer activity seeds
-harmonizer_states = []
-for axis in harmonizers["harmonizers"]["axes"]:
-    harmonizer_states.append({
-        "axis_name": axis,
-        "lift": rand(0.2),
-        "attenuation": rand(0.2),
-        "residual_pre": rand(),
-        "residual_post": rand()
-    })
+def mock_gate(gate_id):
+    """Deterministic stand-in gate: metrics derived from a hash of (gate, packet)."""
+    from braid_hash import coherence_hash
+    def gate(packet, ctx):
+        h = coherence_hash({"gate": gate_id, "packet": packet})
+        u, v = int(h[:8], 16) / 0xFFFFFFFF, int(h[8:16], 16) / 0xFFFFFFFF
+        coh = round(0.3 + 0.7 * u, 4)
+        return {"payload": packet, "residuals": [round((1 - coh) * 0.5, 4)],
+                "mirror_flags": ["mirror"] if v < 0.1 else [],
+                "metrics": {"coherence": coh, "intensity": round(v, 4), "stability": round(1 - v, 4)}}
+    return gate
+
+def load_gates(spec):
+    """'module:factory' -> factory."""
+    mod, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(mod), attr or "factory")
 
 # ────────────────────────────────────────────────────────────────
-# Simulate Harmonizer balance
+# Per-process runtime: executor, router, BFF, harmonizers (built once)
 # ────────────────────────────────────────────────────────────────
-print("🎛  Harmonizers balancing field...")
-time.sleep(0.2)
-field_axes = [rand() for _ in range(7)]
+_RUNTIME = {}
+
+def runtime(cfg, gates=mock_gate, realtime=True):
+    key = (cfg["root"], cfg["profile"], gates, realtime)
+    rt = _RUNTIME.get(key)
+    if rt is not None:
+        return rt
+    root = Path(cfg["root"])
+    _use_root(root)
+    from braid_executor import load_executor
+    from bff_engine import BFFEngine, load_config as bff_config
+    from harmonizer_scheduler import HarmonizerScheduler, load_config as harmonizer_config
+    from metatron_router import get_router, coherence_min
+
+    ex = load_executor(root, profile=cfg["profile"])
+    if not realtime:
+        ex.limits = ex.limits._replace(cooldown_s=0.0)
+    for g in ex.sequence:
+        ex.register(g, gates(g))
+    harmonized = {}
+    hooks = HarmonizerScheduler(harmonizer_config(root, ex.thresholds)).executor_hooks()
+    flush = hooks["harmonizers.flush"]
+    def flush_and_keep(ctx):
+        harmonized[ctx["session_id"]] = ctx.get("harmonizers") or {}
+        flush(ctx)
+    ex.register_hook("harmonizers.apply", hooks["harmonizers.apply"])
+    ex.register_hook("harmonizers.flush", flush_and_keep)
+    ex.bff = BFFEngine(bff_config(root)).executor_step(memo=ex.memo)
+    rt = _RUNTIME[key] = {
+        "executor": ex,
+        "router": get_router(Path(cfg["metatron"]), Path(cfg["engine_path"])),
+        "coherence_min": coherence_min(ex.thresholds),
+        "harmonized": harmonized,
+    }
+    return rt
 
 # ────────────────────────────────────────────────────────────────
-# Simulate BFF synthesis
+# One session
 # ────────────────────────────────────────────────────────────────
-print("🧵  BFF synthesizing braid signature...")
-axial_coherence = rand()
-radial_balance = rand()
-clarity = rand()
-braid_quality = random.choice(["excellent", "stable", "shaky", "incoherent"])
-
-bff_signature = {
-    "axial_coherence": axial_coherence,
-    "radial_balance": radial_balance,
-    "clarity": clarity,
-    "braid_quality": braid_quality,
-    "return_note": "mock run complete"
-}
-
-learning_deltas = {
-    "sensitivity_shift": round((random.random() - 0.5) * 0.1, 3),
-    "aggressiveness_shift": round((random.random() - 0.5) * 0.1, 3),
-    "applied_now": run_context["flow_mode"] == "resonant"
-}
+def simulate_session(cfg, rng=random, realtime=True, say=None, job=None, gates=mock_gate):
+    """One session through router -> braid executor -> BFF; returns its run receipt.
+    The input packet (trap snapshot, family activity) is drawn from `rng`."""
+    say = say or (lambda msg: None)
+    rt = runtime(cfg, gates, realtime)
+    ex, router = rt["executor"], rt["router"]
+    t0 = time.perf_counter()
+
+    session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    run_context = {
+        "session_id": session_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "vault_user": (job or {}).get("vault_user", "test_user"),
+        "glyph_id": (job or {}).get("glyph_id", "GLYPH-001"),
+        "flow_mode": (job or {}).get("flow_mode", "standard")
+    }
+
+    # Input packet
+    trap_snapshot = [
+        {"id": f"TRAP-{i}", "severity": rand(rng=rng), "family": f"FAM-{i%12}"}
+        for i in range(5)
+    ]
+    family_activity = [rand(rng=rng) for _ in range(12)]
+    packet = {"glyph_id": run_context["glyph_id"], "flow_mode": run_context["flow_mode"],
+              "traps": trap_snapshot, "family_activity": family_activity}
+
+    # Meta-Gate stage
+    say("⚙️  Meta-Gate routing gates...")
+    routing = router.route(None, None, rt["coherence_min"])
+
+    # Braid: gates + harmonizer hooks, then BFF synthesis
+    say("🎛  Braiding gates (harmonizers on each gate)...")
+    record = asyncio.run(ex.run(packet, routing["gate_order"], session_id))
+    harmonizers = rt["harmonized"].pop(session_id, {})
+
+    say("🧵  BFF synthesizing braid signature...")
+    bff = record["bff"] or {}
+    next_routing = router.route(None, (bff.get("bff_packet") or {}).get("coherence"), rt["coherence_min"])
+
+    receipt = {
+        "session_id": session_id,
+        "timestamp": run_context["timestamp"],
+        "flow_mode": run_context["flow_mode"],
+        "status": record["status"],
+        "traps_detected": len(trap_snapshot),
+        "families_active": sum(1 for f in family_activity if f > 0.5),
+        "gate_order": routing["gate_order"],
+        "gates_fired": [t["gate"] for t in record["trace"]],
+        "gates_skipped": record["skipped"],
+        "harmonizers_applied": harmonizers.get("families_activated", []),
+        "bff_packet": {k: v for k, v in (bff.get("bff_packet") or {}).items() if k != "time_ms"} or None,
+        "bff_signature": bff.get("bff_signature"),
+        "coherence_hash": record["coherence_hash"],
+        "next_gate_order": next_routing["gate_order"],
+        "coherence_bump_applied": next_routing["routing_log"]["coherence_bump_applied"],
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 3),
+    }
+    if job and "job_id" in job:
+        receipt["job_id"] = job["job_id"]
+    return receipt
 
 # ────────────────────────────────────────────────────────────────
-# Create run receipt
+# Batch: config and batch params reach each worker through the pool initializer
 # ────────────────────────────────────────────────────────────────
-run_receipt = {
-    "session_id": session_id,
-    "timestamp": run_context["timestamp"],
-    "flow_mode": run_context["flow_mode"],
-    "traps_detected": len(trap_snapshot),
-    "families_active": sum(1 for f in family_activity if f > 0.5),
-    "gates_fired": [g["gate_id"] for g in gate_plan],
-    "harmonizers_applied": [h["axis_name"] for h in harmonizer_states[:4]],
-    "bff_signature": bff_signature,
-    "learning_deltas": learning_deltas,
-    "duration_ms": int(random.uniform(500, 900)),
-    "cost_units": round(random.uniform(0.05, 0.12), 3)
-}
+_WORKER = {}   # set in each pool worker by _init_worker, never by the parent
+
+def _init_worker(cfg, batch):
+    _WORKER.update(cfg=cfg, batch=batch)
+
+def _session(cfg, batch, i):
+    rng = random.Random(batch["seed"] * 1_000_003 + i)
+    job = batch["jobs"][i] if batch["jobs"] else None
+    return simulate_session(cfg, rng, realtime=batch["realtime"], job=job, gates=batch["gates"])
+
+def _run_one(i):
+    return _session(_WORKER["cfg"], _WORKER["batch"], i)
+
+def run_batch(cfg, n, out_file, workers=0, seed=0, realtime=False, jobs=None, chunksize=0,
+              start_method=None, gates=mock_gate):
+    """Push n sessions through a process pool (fork where available); stream
+    receipts to out_file (JSONL, completion order). `gates` is a picklable
+    factory(gate_id). Returns a throughput summary."""
+    import multiprocessing as mp
+    batch = {"seed": seed, "realtime": realtime, "jobs": jobs, "gates": gates}
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, min(256, n // (workers * 8)))
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    quality, status = {}, {}
+    t0 = time.perf_counter()
+    with open(out_file, "a", encoding="utf-8") as out:
+        if workers == 1:
+            receipts = (_session(cfg, batch, i) for i in range(n))
+            pool = None
+        else:
+            if start_method is None:
+                start_method = "fork" if "fork" in mp.get_all_start_methods() else None
+            ctx = mp.get_context(start_method)
+            pool = ctx.Pool(workers, initializer=_init_worker, initargs=(cfg, batch))
+            receipts = pool.imap_unordered(_run_one, range(n), chunksize)
+        try:
+            for r in receipts:
+                out.write(json.dumps(r, separators=(",", ":")) + "\n")
+                q = (r["bff_signature"] or {}).get("braid_quality", "none")
+                quality[q] = quality.get(q, 0) + 1
+                status[r["status"]] = status.get(r["status"], 0) + 1
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    wall = time.perf_counter() - t0
+    return {"sessions": n, "workers": workers, "chunksize": chunksize, "wall_s": round(wall, 3),
+            "sessions_per_s": round(n / wall, 1) if wall else None, "status": status,
+            "braid_quality": quality, "receipts": str(out_file)}
+
+def load_jobs(path):
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                jobs.append(json.loads(line))
+    return jobs
 
 # ────────────────────────────────────────────────────────────────
 # Output summary
 # ────────────────────────────────────────────────────────────────
-print("\n🧩  RUN RECEIPT")
-print("─────────────────────────────────────────────")
-for k, v in run_receipt.items():
-    print(f"{k}: {v}")
-
-# Write to logs/
-logs = Path(__file__).parent / "logs"
-logs.mkdir(exist_ok=True)
-out_file = logs / f"run_receipt_{session_id[:8]}.yaml"
-with open(out_file, "w", encoding="utf-8") as f:
-    yaml.safe_dump(run_receipt, f)
-
-print(f"\n✅  Mock run complete. Receipt saved to {out_file}")
+def run_single(cfg, logs, gates=mock_gate):
+    engine = cfg["engine"]
+    print(f"\n🧠 Loaded {engine['name']} — {cfg['engine_path']}")
+    print(f"Threshold profile: {cfg['profile']}")
+    print("─────────────────────────────────────────────")
+
+    run_receipt = simulate_session(cfg, random.Random(), say=print, gates=gates)
+
+    print("\n🧩  RUN RECEIPT")
+    print("─────────────────────────────────────────────")
+    for k, v in run_receipt.items():
+        print(f"{k}: {v}")
+
+    # Write to logs/
+    logs.mkdir(exist_ok=True)
+    out_file = logs / f"run_receipt_{run_receipt['session_id'][:8]}.yaml"
+    with open(out_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(run_receipt, f)
+
+    print(f"\n✅  Run complete ({run_receipt['status']}). Receipt saved to {out_file}")
+
+def main(argv):
+    import argparse
+    ap = argparse.ArgumentParser(description="Thoth OM braid test harness")
+    ap.add_argument("--root", default=os.environ.get("THOTH_PROJECT_ROOT", str(DEFAULT_ROOT)),
+                    help="Thoth project root (loaded layout or the THOTH_OM_V1 source tree)")
+    ap.add_argument("--profile", default="default", help="threshold profile")
+    ap.add_argument("--gates", help="gate factory as module:attr (default: deterministic mock gates)")
+    ap.add_argument("--batch", type=int, metavar="N", help="run N sessions on a process pool")
+    ap.add_argument("--jobs", help="JSONL of queued jobs (one session each; N defaults to the job count)")
+    ap.add_argument("--workers", type=int, default=0, help="pool size (default: CPU count)")
+    ap.add_argument("--out", default=str(HERE / "logs" / "receipts.jsonl"))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--realtime", action="store_true", help="keep the gate cooldowns in batch mode")
+    args = ap.parse_args(argv)
+
+    try:
+        cfg = load_config(Path(args.root), args.profile)
+    except FileNotFoundError as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return 2
+    gates = load_gates(args.gates) if args.gates else mock_gate
+    if args.batch is None and not args.jobs:
+        run_single(cfg, HERE / "logs", gates)
+        return 0
+    jobs = load_jobs(args.jobs) if args.jobs else None
+    n = args.batch if args.batch is not None else len(jobs)
+    if jobs is not None:
+        n = min(n, len(jobs))
+    summary = run_batch(cfg, n, Path(args.out), args.workers, args.seed, args.realtime, jobs, gates=gates)
+    print(f"🧵  {summary['sessions']} sessions in {summary['wall_s']}s "
+          f"({summary['sessions_per_s']}/s, {summary['workers']} workers) → {summary['receipts']}")
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
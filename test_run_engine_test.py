@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import run_engine_test as ret
+
+
+@pytest.fixture
+def cfg():
+    return ret.load_config(ret.DEFAULT_ROOT)
+
+
+def _receipts(path):
+    return [json.loads(l) for l in path.read_text().splitlines()]
+
+
+def low_gate(gate_id):
+    """Pluggable gate: G4 comes out below early_severance_below."""
+    def gate(packet, ctx):
+        coh = 0.1 if gate_id == "G4" else 0.9
+        return {"payload": packet, "residuals": [1 - coh], "metrics": {"coherence": coh}}
+    return gate
+
+
+def test_default_config_points_at_the_shipped_engine(cfg):
+    assert cfg["engine"]["name"] == "Thoth_engine_1.0"
+    with pytest.raises(FileNotFoundError):
+        ret.load_config(ret.HERE / "codex")
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_batch_workers_get_config_without_parent_globals(cfg, tmp_path, start_method):
+    out = tmp_path / "r.jsonl"
+    jobs = [{"job_id": f"J{i}"} for i in range(12)]
+    summary = ret.run_batch(cfg, 12, out, workers=2, seed=3, jobs=jobs, start_method=start_method)
+    assert summary["sessions"] == 12
+    rs = _receipts(out)
+    assert sorted(r["job_id"] for r in rs) == sorted(j["job_id"] for j in jobs)
+    assert ret._WORKER == {}          # the parent never sets worker state
+
+
+def test_batch_runs_sessions_through_router_executor_and_bff(cfg, tmp_path):
+    out = tmp_path / "r.jsonl"
+    summary = ret.run_batch(cfg, 6, out, workers=1, seed=1)
+    assert summary["status"] == {"completed": 6}
+    for r in _receipts(out):
+        assert sorted(r["gate_order"]) == ["G1", "G2", "G3", "G4", "G5", "G6", "G7"]
+        assert r["gates_fired"] == r["gate_order"]              # the executor ran the routed order
+        sig = r["bff_signature"]
+        assert sig["braid_quality"] in ("excellent", "stable", "shaky", "incoherent")
+        assert 0.0 <= r["bff_packet"]["coherence"] <= 1.0
+        assert len(r["coherence_hash"]) == 32
+        assert r["harmonizers_applied"]                          # on_cycle_start fired
+
+
+def test_batch_is_deterministic_per_seed(cfg, tmp_path):
+    a, b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    ret.run_batch(cfg, 8, a, workers=1, seed=5)
+    ret.run_batch(cfg, 8, b, workers=2, seed=5)
+    key = lambda r: (r["session_id"], r["coherence_hash"], r["bff_signature"]["axial"])
+    assert sorted(map(key, _receipts(a))) == sorted(map(key, _receipts(b)))
+
+
+def test_gates_are_pluggable(cfg, tmp_path):
+    out = tmp_path / "r.jsonl"
+    summary = ret.run_batch(cfg, 3, out, workers=2, seed=2, gates=low_gate, start_method="spawn")
+    assert summary["status"] == {"severed": 3} and summary["braid_quality"] == {"none": 3}
+    for r in _receipts(out):
+        assert r["gates_fired"][-1] == "G4" and r["bff_signature"] is None
+        assert r["gates_skipped"] == r["gate_order"][r["gate_order"].index("G4") + 1:]